@@ -1,5 +1,10 @@
 from django.contrib import admin
 
+from airport.export import (
+    CSVRenderer,
+    MANIFEST_EXPORT_COLUMNS,
+    export_response,
+)
 from airport.models import (
     Airport,
     Route,
@@ -9,6 +14,7 @@ from airport.models import (
     Flight,
     Order,
     Ticket,
+    SeatHold,
     Rating,
     RatingStarAirplane,
 )
@@ -16,7 +22,14 @@ from airport.models import (
 
 @admin.register(Airport)
 class AirportAdmin(admin.ModelAdmin):
-    list_display = ("name", "country", "city", "closest_big_city")
+    list_display = (
+        "name",
+        "country",
+        "city",
+        "closest_big_city",
+        "latitude",
+        "longitude",
+    )
     list_display_links = ("name",)
 
 
@@ -42,6 +55,16 @@ class AirplaneAdmin(admin.ModelAdmin):
 class FlightAdmin(admin.ModelAdmin):
     list_display = ("route", "airplane", "departure_time", "arrival_time")
     list_display_links = ("route",)
+    actions = ("export_manifest",)
+
+    @admin.action(description="Export ticket manifest (CSV)")
+    def export_manifest(self, request, queryset):
+        tickets = Ticket.objects.filter(flight__in=queryset).order_by(
+            "flight_id", "row", "seat"
+        )
+        return export_response(
+            CSVRenderer, "manifest", MANIFEST_EXPORT_COLUMNS, tickets
+        )
 
 
 class TicketInline(admin.TabularInline):
@@ -61,6 +84,12 @@ class TicketAdmin(admin.ModelAdmin):
     list_display_links = ("flight",)
 
 
+@admin.register(SeatHold)
+class SeatHoldAdmin(admin.ModelAdmin):
+    list_display = ("flight", "user", "row", "seat", "expires_at")
+    list_display_links = ("flight",)
+
+
 @admin.register(Rating)
 class RatingAdmin(admin.ModelAdmin):
     list_display = ("id", "star", "airplane")
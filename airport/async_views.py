@@ -0,0 +1,212 @@
+"""Async versions of the hot read endpoints for ASGI deployments.
+
+The views run on the event loop and load rows with the async ORM. In
+Django 4.2 the async ORM is a sync_to_async wrapper: every query still
+runs in a thread of its request and holds it until the database
+answers. What bounds those threads is ``database_slot``: at most
+ASYNC_DB_CONCURRENCY requests of a process load rows at a time, the
+rest wait on the event loop (without a thread) up to
+ASYNC_DB_QUEUE_TIMEOUT seconds and are answered with 503 after that.
+The payloads are the ones of the sync viewsets, without response
+caching and ETags.
+"""
+import asyncio
+import weakref
+from contextlib import asynccontextmanager
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import HttpResponse
+from django.views import View
+from rest_framework import status
+from rest_framework.exceptions import (
+    APIException,
+    AuthenticationFailed,
+    NotAuthenticated,
+    NotFound,
+    ValidationError,
+)
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+
+from airport.models import Airport, Route, Flight
+from airport.serializers import (
+    AirportSerializer,
+    RouteListSerializer,
+    FlightListSerializer,
+    FlightDetailSerializer,
+)
+from airport.service import AirportFilter, RouteFilter, FlightFilter
+from airport.views import FlightPagination
+from user.authentication import ReadOnlyClaimsJWTAuthentication
+
+_semaphores = weakref.WeakKeyDictionary()
+
+
+class DatabaseBusy(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = "Too many requests are waiting for the database."
+    default_code = "database_busy"
+    wait = 1
+
+
+def get_semaphore():
+    """Semaphore of the running event loop"""
+    loop = asyncio.get_running_loop()
+    semaphore = _semaphores.get(loop)
+    if semaphore is None:
+        semaphore = _semaphores[loop] = asyncio.Semaphore(
+            settings.ASYNC_DB_CONCURRENCY
+        )
+    return semaphore
+
+
+@asynccontextmanager
+async def database_slot():
+    semaphore = get_semaphore()
+    try:
+        await asyncio.wait_for(
+            semaphore.acquire(), settings.ASYNC_DB_QUEUE_TIMEOUT
+        )
+    except asyncio.TimeoutError:
+        raise DatabaseBusy()
+    try:
+        yield
+    finally:
+        semaphore.release()
+
+
+class AsyncAPIView(View):
+    """Async endpoint answering JSON as DRF does, errors included"""
+
+    authentication_classes = ()
+
+    @staticmethod
+    def render(data, status_code=status.HTTP_200_OK):
+        return HttpResponse(
+            JSONRenderer().render(data),
+            content_type="application/json",
+            status=status_code,
+        )
+
+    def error_response(self, request, error):
+        detail = error.detail
+        if not isinstance(detail, (list, dict)):
+            detail = {"detail": detail}
+        response = self.render(detail, error.status_code)
+        if isinstance(error, (NotAuthenticated, AuthenticationFailed)):
+            authentication = self.authentication_classes[0]()
+            response["WWW-Authenticate"] = authentication.authenticate_header(
+                request
+            )
+        wait = getattr(error, "wait", None)
+        if wait is not None:
+            response["Retry-After"] = str(wait)
+        return response
+
+
+class AsyncReadView(AsyncAPIView):
+    """GET endpoint of authenticated users, answered from the event loop.
+
+    The user is built from the JWT claims, so authentication needs no
+    query. ``get_data`` loads the rows inside ``database_slot``; by
+    default it answers the filtered queryset as a list.
+    """
+
+    http_method_names = ["get", "options"]
+    authentication_classes = (ReadOnlyClaimsJWTAuthentication,)
+    queryset = None
+    serializer_class = None
+    filterset_class = None
+
+    def authenticate(self, request):
+        for authentication_class in self.authentication_classes:
+            authentication = authentication_class()
+            result = authentication.authenticate(request)
+            if result is not None:
+                return result[0]
+        return None
+
+    def get_queryset(self):
+        return self.queryset.all()
+
+    def filter_queryset(self, request, queryset):
+        if self.filterset_class is None:
+            return queryset
+        filterset = self.filterset_class(
+            request.GET, queryset=queryset, request=request
+        )
+        if not filterset.is_valid():
+            raise ValidationError(filterset.errors)
+        return filterset.qs
+
+    def serialize(self, request, instance, many=False):
+        return self.serializer_class(
+            instance, many=many, context={"request": request}
+        ).data
+
+    async def get_data(self, request, **kwargs):
+        queryset = self.filter_queryset(request, self.get_queryset())
+        async with database_slot():
+            objects = [instance async for instance in queryset]
+        return self.serialize(request, objects, many=True)
+
+    async def get(self, request, **kwargs):
+        try:
+            user = self.authenticate(request)
+            if user is None or not user.is_authenticated:
+                raise NotAuthenticated()
+            data = await self.get_data(request, **kwargs)
+        except APIException as error:
+            return self.error_response(request, error)
+        return self.render(data)
+
+
+class AsyncAirportListView(AsyncReadView):
+    queryset = Airport.objects.all()
+    serializer_class = AirportSerializer
+    filterset_class = AirportFilter
+
+
+class AsyncRouteListView(AsyncReadView):
+    queryset = Route.objects.all().select_related("destination", "source")
+    serializer_class = RouteListSerializer
+    filterset_class = RouteFilter
+
+
+class AsyncFlightListView(AsyncReadView):
+    queryset = Flight.objects.all().select_related(
+        "route__source", "route__destination", "airplane"
+    )
+    serializer_class = FlightListSerializer
+    filterset_class = FlightFilter
+    pagination_class = FlightPagination
+
+    async def get_data(self, request, **kwargs):
+        queryset = self.filter_queryset(request, self.get_queryset())
+        paginator = self.pagination_class()
+        api_request = Request(request)
+        async with database_slot():
+            # DRF has no async paginator; the page query runs in the
+            # request's thread, as every async ORM call of Django 4.2
+            page = await sync_to_async(paginator.paginate_queryset)(
+                queryset, api_request
+            )
+        return paginator.get_paginated_response(
+            self.serialize(request, page, many=True)
+        ).data
+
+
+class AsyncFlightDetailView(AsyncReadView):
+    queryset = Flight.objects.all().select_related(
+        "route__source", "route__destination", "airplane"
+    ).prefetch_related("crew", "tickets")
+    serializer_class = FlightDetailSerializer
+
+    async def get_data(self, request, pk=None, **kwargs):
+        async with database_slot():
+            try:
+                flight = await self.get_queryset().aget(pk=pk)
+            except Flight.DoesNotExist:
+                raise NotFound()
+        return self.serialize(request, flight)
@@ -0,0 +1,145 @@
+import hashlib
+from calendar import timegm
+
+from django.db.models import Count, Max, Subquery
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+from airport.response_cache import normalized_query_params
+
+
+def last_updated_subquery(model):
+    """max(updated_at) of the whole table, resolved from its index"""
+    return Subquery(
+        model.objects.order_by("-updated_at").values("updated_at")[:1]
+    )
+
+
+class ConditionalGetMixin:
+    """Adds ETag and Last-Modified headers to list and retrieve actions.
+
+    Both are computed by a single probe query: the count and
+    max(updated_at) of the filtered queryset (for paginated lists, the
+    ids and dates of the requested page) plus max(updated_at) of every
+    model in ``conditional_dependencies`` (models rendered inside the
+    payload). A matching If-None-Match, or If-Modified-Since on a
+    detail, is answered with 304 before any row is loaded. Lists do not
+    honour If-Modified-Since because deleted rows do not move the date.
+    """
+
+    conditional_actions = ("list", "retrieve")
+    conditional_dependencies = ()
+
+    def get_etag_material(self, request):
+        """Extra request values the payload depends on"""
+        return []
+
+    def get_conditional_queryset(self):
+        queryset = self.filter_queryset(self.get_queryset())
+        if self.action == "retrieve":
+            lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+            queryset = queryset.filter(
+                **{self.lookup_field: self.kwargs[lookup_url_kwarg]}
+            )
+        return queryset.order_by()
+
+    def get_list_state(self, queryset, dependencies):
+        return queryset.aggregate(
+            count=Count("pk"),
+            updated_at=Max("updated_at"),
+            **{
+                key: Max(subquery)
+                for key, subquery in dependencies.items()
+            },
+        )
+
+    def get_page_state(self, request, queryset, dependencies):
+        """State of the requested page only: a count over the whole
+        filtered queryset would undo keyset pagination. The page rows
+        are loaded with just their ids and dates, the dependencies ride
+        along as uncorrelated subqueries."""
+        paginator = self.pagination_class()
+        ordering = paginator.get_ordering(request, queryset, self)
+        rows = paginator.paginate_queryset(
+            queryset.select_related(None)
+            .only("pk", "updated_at", *(key.lstrip("-") for key in ordering))
+            .annotate(**dependencies),
+            request,
+            view=self,
+        )
+        if not rows:
+            return {"count": 0}
+        return {
+            "count": len(rows),
+            "updated_at": max(row.updated_at for row in rows),
+            **{key: getattr(rows[0], key) for key in dependencies},
+            "page": ",".join(
+                f"{row.pk}:{row.updated_at.isoformat()}" for row in rows
+            ),
+            "links": f"{paginator.get_previous_link()}"
+            f"|{paginator.get_next_link()}",
+        }
+
+    def get_conditional_state(self, request):
+        """(etag, last modified) of the response or None when empty"""
+        dependencies = {
+            f"dependency_{index}": last_updated_subquery(model)
+            for index, model in enumerate(self.conditional_dependencies)
+        }
+        queryset = self.get_conditional_queryset()
+        if self.action == "list" and self.paginator is not None:
+            state = self.get_page_state(request, queryset, dependencies)
+        else:
+            state = self.get_list_state(queryset, dependencies)
+        if not state["count"]:
+            return None
+        dates = ["updated_at", *dependencies]
+        last_modified = max(state[key] for key in dates if state[key])
+        material = "|".join(
+            [
+                type(self).__name__,
+                self.action,
+                str(sorted(self.kwargs.items())),
+                request.get_host(),
+                normalized_query_params(request),
+                request.accepted_renderer.format or "",
+                str(state["count"]),
+                state.get("page", ""),
+                state.get("links", ""),
+                *(
+                    state[key].isoformat() if state[key] else ""
+                    for key in dates
+                ),
+                *map(str, self.get_etag_material(request)),
+            ]
+        )
+        etag = f'"{hashlib.md5(material.encode()).hexdigest()}"'
+        return etag, last_modified
+
+    def conditional_response(self, handler, request, *args, **kwargs):
+        if self.action not in self.conditional_actions:
+            return handler(request, *args, **kwargs)
+        state = self.get_conditional_state(request)
+        if state is None:
+            return handler(request, *args, **kwargs)
+        etag, last_modified = state
+        timestamp = timegm(last_modified.utctimetuple())
+        not_modified = get_conditional_response(
+            request._request,
+            etag=etag,
+            last_modified=timestamp if self.action == "retrieve" else None,
+        )
+        response = not_modified or handler(request, *args, **kwargs)
+        response["ETag"] = etag
+        response["Last-Modified"] = http_date(timestamp)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(
+            super().list, request, *args, **kwargs
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(
+            super().retrieve, request, *args, **kwargs
+        )
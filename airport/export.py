@@ -0,0 +1,110 @@
+import csv
+import json
+from datetime import date, datetime
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+from rest_framework.renderers import BaseRenderer
+
+EXPORT_CHUNK_SIZE = 2000
+
+
+class Echo:
+    """File-like object that hands the written line back to csv.writer"""
+
+    def write(self, value):
+        return value
+
+
+def _csv_value(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+
+def stream_csv(header, rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow(header)
+    for row in rows:
+        yield writer.writerow([_csv_value(value) for value in row])
+
+
+def stream_ndjson(header, rows):
+    for row in rows:
+        yield json.dumps(dict(zip(header, row)), cls=DjangoJSONEncoder) + "\n"
+
+
+class CSVRenderer(BaseRenderer):
+    media_type = "text/csv"
+    format = "csv"  # noqa: VNE003
+    charset = "utf-8"
+    stream = staticmethod(stream_csv)
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        # only error responses are rendered, exports are streamed
+        if not isinstance(data, dict):
+            data = {"detail": data}
+        return "".join(
+            self.stream(list(data), [list(data.values())])
+        ).encode(self.charset)
+
+
+class NDJSONRenderer(CSVRenderer):
+    media_type = "application/x-ndjson"
+    format = "ndjson"  # noqa: VNE003
+    stream = staticmethod(stream_ndjson)
+
+
+EXPORT_RENDERERS = (CSVRenderer, NDJSONRenderer)
+
+
+def export_response(renderer, filename, columns, queryset):
+    """Stream queryset rows as CSV or NDJSON, columns are
+    (header, field lookup) pairs"""
+    header = [name for name, _ in columns]
+    rows = queryset.values_list(
+        *[lookup for _, lookup in columns]
+    ).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    response = StreamingHttpResponse(
+        renderer.stream(header, rows),
+        content_type=f"{renderer.media_type}; charset={renderer.charset}",
+    )
+    response["Content-Disposition"] = (
+        f'attachment; filename="{filename}.{renderer.format}"'
+    )
+    return response
+
+
+FLIGHT_EXPORT_COLUMNS = (
+    ("id", "id"),
+    ("source", "route__source__name"),
+    ("destination", "route__destination__name"),
+    ("airplane", "airplane__name"),
+    ("departure_time", "departure_time"),
+    ("arrival_time", "arrival_time"),
+    ("tickets_sold", "tickets_sold"),
+    ("crew_count", "crew_count"),
+)
+
+ORDER_TICKET_EXPORT_COLUMNS = (
+    ("order", "order_id"),
+    ("created_at", "order__created_at"),
+    ("flight", "flight_id"),
+    ("source", "flight__route__source__name"),
+    ("destination", "flight__route__destination__name"),
+    ("departure_time", "flight__departure_time"),
+    ("row", "row"),
+    ("seat", "seat"),
+)
+
+MANIFEST_EXPORT_COLUMNS = (
+    ("flight", "flight_id"),
+    ("route", "flight__route_id"),
+    ("departure_time", "flight__departure_time"),
+    ("row", "row"),
+    ("seat", "seat"),
+    ("order", "order_id"),
+    ("email", "order__user__email"),
+    ("first_name", "order__user__first_name"),
+    ("last_name", "order__user__last_name"),
+)
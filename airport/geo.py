@@ -0,0 +1,50 @@
+from functools import lru_cache
+
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0088
+
+
+def great_circle_distance(
+    source_latitudes, source_longitudes,
+    destination_latitudes, destination_longitudes,
+):
+    """Haversine distance in km, vectorized over broadcastable arrays"""
+    source_latitudes = np.radians(source_latitudes)
+    destination_latitudes = np.radians(destination_latitudes)
+    delta_latitudes = destination_latitudes - source_latitudes
+    delta_longitudes = np.radians(
+        np.subtract(destination_longitudes, source_longitudes)
+    )
+    haversine = (
+        np.sin(delta_latitudes / 2) ** 2
+        + np.cos(source_latitudes)
+        * np.cos(destination_latitudes)
+        * np.sin(delta_longitudes / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(haversine, 0, 1)))
+
+
+@lru_cache(maxsize=4096)
+def cached_distance(source_coordinates, destination_coordinates):
+    return int(
+        round(
+            float(
+                great_circle_distance(
+                    *source_coordinates, *destination_coordinates
+                )
+            )
+        )
+    )
+
+
+def airport_distance(source, destination):
+    """Rounded distance in km between two airports or None if any of
+    them has no coordinates"""
+    coordinates = (
+        (source.latitude, source.longitude),
+        (destination.latitude, destination.longitude),
+    )
+    if None in coordinates[0] + coordinates[1]:
+        return None
+    return cached_distance(*coordinates)
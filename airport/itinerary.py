@@ -0,0 +1,159 @@
+import bisect
+import threading
+from collections import namedtuple
+from datetime import datetime, time, timedelta
+
+from django.core.cache import cache
+from django.utils import timezone
+
+from airport.models import Flight
+from main.cache import bump_version
+
+GRAPH_VERSION_KEY = "airport:flight_graph:version"
+
+Leg = namedtuple(
+    "Leg",
+    [
+        "departure_time",
+        "flight_id",
+        "arrival_time",
+        "source_id",
+        "destination_id",
+    ],
+)
+
+
+class FlightGraph:
+    """Time-expanded flight graph kept in process memory.
+
+    Every airport holds its departing legs sorted by departure time, so
+    the connections leaving an airport within a layover window are found
+    with a bisect. The graph is loaded lazily, patched in place when this
+    process changes flights and reloaded when another process did.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self._departures = {}
+        self._legs = {}
+        self._version = None
+
+    @staticmethod
+    def _leg_values():
+        return Flight.objects.order_by().values_list(
+            "departure_time",
+            "id",
+            "arrival_time",
+            "route__source_id",
+            "route__destination_id",
+        )
+
+    def _add(self, leg):
+        self._legs[leg.flight_id] = leg
+        bisect.insort(self._departures.setdefault(leg.source_id, []), leg)
+
+    def _remove(self, flight_id):
+        leg = self._legs.pop(flight_id, None)
+        if leg is not None:
+            departures = self._departures[leg.source_id]
+            del departures[bisect.bisect_left(departures, leg)]
+
+    def _load(self, version):
+        self.reset()
+        for values in self._leg_values().iterator(chunk_size=2000):
+            leg = Leg(*values)
+            self._legs[leg.flight_id] = leg
+            self._departures.setdefault(leg.source_id, []).append(leg)
+        for departures in self._departures.values():
+            departures.sort()
+        self._version = version
+
+    def _sync(self):
+        version = cache.get(GRAPH_VERSION_KEY, 0)
+        with self._lock:
+            if self._version != version:
+                self._load(version)
+
+    def flights_changed(self, flight_ids):
+        """Patch the graph after flights were saved or deleted."""
+        version = bump_version(GRAPH_VERSION_KEY)
+        with self._lock:
+            if self._version != version - 1:
+                # the graph is not loaded or missed a change made by
+                # another process, the next search reloads it
+                return
+            for flight_id in flight_ids:
+                self._remove(flight_id)
+            for values in self._leg_values().filter(id__in=flight_ids):
+                self._add(Leg(*values))
+            self._version = version
+
+    def invalidate(self):
+        """Make every process reload the graph, e.g. after bulk inserts."""
+        bump_version(GRAPH_VERSION_KEY)
+        with self._lock:
+            self.reset()
+
+    def _departures_between(self, airport_id, start, end):
+        departures = self._departures.get(airport_id, [])
+        index = bisect.bisect_left(departures, (start,))
+        while index < len(departures) and departures[index][0] < end:
+            yield departures[index]
+            index += 1
+
+    def search(
+        self,
+        source_ids,
+        destination_ids,
+        date,
+        max_stops=2,
+        min_layover=timedelta(minutes=45),
+        max_layover=timedelta(hours=6),
+        limit=20,
+    ):
+        """Itineraries (lists of legs) leaving one of the source airports
+        on the date and reaching one of the destinations, shortest total
+        duration first"""
+        self._sync()
+        start = timezone.make_aware(datetime.combine(date, time.min))
+        end = start + timedelta(days=1)
+        destination_ids = set(destination_ids)
+        itineraries = []
+
+        def extend(path, visited):
+            last = path[-1]
+            if last.destination_id in destination_ids:
+                itineraries.append(list(path))
+                return
+            if len(path) > max_stops:
+                return
+            for leg in self._departures_between(
+                last.destination_id,
+                last.arrival_time + min_layover,
+                last.arrival_time + max_layover,
+            ):
+                if leg.destination_id not in visited:
+                    path.append(leg)
+                    visited.add(leg.destination_id)
+                    extend(path, visited)
+                    visited.discard(leg.destination_id)
+                    path.pop()
+
+        with self._lock:
+            for source_id in set(source_ids):
+                for leg in self._departures_between(source_id, start, end):
+                    extend([leg], {source_id, leg.destination_id})
+
+        itineraries.sort(
+            key=lambda legs: (
+                legs[-1].arrival_time - legs[0].departure_time,
+                legs[0].departure_time,
+            )
+        )
+        return itineraries[:limit]
+
+
+flight_graph = FlightGraph()
@@ -0,0 +1,74 @@
+import numpy as np
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from airport.geo import great_circle_distance
+from airport.models import Airport, Flight, Route
+from airport.pricing import invalidate_fares
+from airport.response_cache import bump_model_version
+
+
+class Command(BaseCommand):
+    help = "Fill Route.distance from airport coordinates"  # noqa: VNE003
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="Recalculate routes that already have a distance",
+        )
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        coordinates = {
+            airport_id: (latitude, longitude)
+            for airport_id, latitude, longitude in Airport.objects.filter(
+                latitude__isnull=False, longitude__isnull=False
+            ).values_list("id", "latitude", "longitude")
+        }
+        routes = Route.objects.filter(
+            source_id__in=coordinates, destination_id__in=coordinates
+        )
+        if not options["all"]:
+            routes = routes.filter(distance=0)
+        routes = list(routes.only("id", "source_id", "destination_id"))
+        if not routes:
+            self.stdout.write("No routes to update")
+            return
+
+        source = np.array(
+            [coordinates[route.source_id] for route in routes]
+        )
+        destination = np.array(
+            [coordinates[route.destination_id] for route in routes]
+        )
+        distances = np.rint(
+            great_circle_distance(
+                source[:, 0], source[:, 1],
+                destination[:, 0], destination[:, 1],
+            )
+        ).astype(np.int64)
+        now = timezone.now()
+        for route, distance in zip(routes, distances.tolist()):
+            route.distance = distance
+            route.updated_at = now
+
+        with transaction.atomic():
+            Route.objects.bulk_update(
+                routes,
+                ["distance", "updated_at"],
+                batch_size=options["batch_size"],
+            )
+            bump_model_version(Route)
+            # bulk_update sends no post_save, drop the fares of the flights
+            flight_ids = list(
+                Flight.objects.filter(route__in=routes).values_list(
+                    "id", flat=True
+                )
+            )
+            if flight_ids:
+                transaction.on_commit(lambda: invalidate_fares(*flight_ids))
+        self.stdout.write(
+            self.style.SUCCESS(f"Updated distance of {len(routes)} route(s)")
+        )
@@ -0,0 +1,312 @@
+import json
+import statistics
+import time
+import uuid
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import (
+    CaptureQueriesContext,
+    override_settings,
+    setup_test_environment,
+    teardown_test_environment,
+)
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from airport.itinerary import flight_graph
+from airport.models import (
+    Airplane,
+    Flight,
+    Order,
+    Rating,
+    RatingStarAirplane,
+)
+from airport.synthetic import DataGenerator
+from airport.urls import router
+
+BENCH_PASSWORD = "bench-password"
+BENCH_CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "bench-api",
+    }
+}
+# list endpoints that answer 400 without these query params
+LIST_PARAMS = {
+    "itinerary": lambda data: {
+        "source": data["flight"].route.source_id,
+        "destination": data["flight"].route.destination_id,
+        "date": data["flight"].departure_time.date().isoformat(),
+    },
+}
+
+
+def seed(airports, flights, orders):
+    """Generate a dataset and return sample objects of it"""
+    user = get_user_model().objects.create_user(
+        f"bench-{uuid.uuid4().hex[:12]}@bench.local",
+        BENCH_PASSWORD,
+    )
+    generator = DataGenerator(
+        start=timezone.now().replace(microsecond=0) + timedelta(days=1),
+        days=30,
+        email_prefix=f"bench-{uuid.uuid4().hex[:12]}-",
+    )
+    generator.generate(
+        airports=airports,
+        routes=airports * (airports - 1),
+        airplane_types=2,
+        airplanes=10,
+        crew=10,
+        users=10,
+        flights=flights,
+    )
+    Order.objects.filter(
+        pk__in=Order.objects.order_by("pk").values("pk")[:orders]
+    ).update(user=user)
+    airplane = Airplane.objects.order_by("pk").first()
+    star, _ = RatingStarAirplane.objects.get_or_create(value=5)
+    Rating.objects.create(ip="127.0.0.1", star=star, airplane=airplane)
+    return {
+        "user": user,
+        "flight": Flight.objects.order_by("pk").first(),
+        "order": Order.objects.filter(user=user).order_by("pk").first(),
+    }
+
+
+def percentile(samples, percent):
+    if len(samples) == 1:
+        return samples[0]
+    return statistics.quantiles(samples, n=100, method="inclusive")[
+        percent - 1
+    ]
+
+
+class Command(BaseCommand):
+    help = (  # noqa: VNE003
+        "Seed a dataset in a rolled back transaction and measure latency, "
+        "queries and response size of the API endpoints"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--airports", type=int, default=10)
+        parser.add_argument("--flights", type=int, default=500)
+        parser.add_argument("--orders", type=int, default=50)
+        parser.add_argument(
+            "--iterations",
+            type=int,
+            default=20,
+            help="Measured requests per endpoint, after one warm up",
+        )
+        parser.add_argument("--output", help="Write the results JSON here")
+        parser.add_argument(
+            "--baseline", help="Compare with the results JSON in this file"
+        )
+        parser.add_argument(
+            "--threshold",
+            type=float,
+            default=20.0,
+            help="Allowed p95 latency growth over the baseline in percent",
+        )
+        parser.add_argument(
+            "--min-delta-ms",
+            type=float,
+            default=1.0,
+            help="Latency growth below this is treated as noise",
+        )
+        parser.add_argument(
+            "--save-baseline",
+            action="store_true",
+            help="Write the results to --baseline instead of comparing",
+        )
+
+    def handle(self, *args, **options):
+        if options["save_baseline"] and not options["baseline"]:
+            raise CommandError("--save-baseline needs --baseline")
+        try:
+            setup_test_environment()
+            test_environment = True
+        except RuntimeError:
+            # already set up, e.g. by the test runner
+            test_environment = False
+        try:
+            with override_settings(CACHES=BENCH_CACHES):
+                flight_graph.reset()
+                with transaction.atomic():
+                    results = self.run(options)
+                    transaction.set_rollback(True)
+                flight_graph.reset()
+        finally:
+            if test_environment:
+                teardown_test_environment()
+
+        report = {
+            "dataset": {
+                "airports": options["airports"],
+                "flights": options["flights"],
+                "orders": options["orders"],
+            },
+            "iterations": options["iterations"],
+            "endpoints": results,
+        }
+        output = json.dumps(report, indent=2, sort_keys=True)
+        if options["output"]:
+            with open(options["output"], "w") as file:
+                file.write(output + "\n")
+        else:
+            self.stdout.write(output)
+
+        if options["save_baseline"]:
+            with open(options["baseline"], "w") as file:
+                file.write(output + "\n")
+            self.stderr.write(f"Baseline saved to {options['baseline']}")
+        elif options["baseline"]:
+            self.compare(results, options)
+
+    def endpoints(self, data):
+        """(name, method, url, payload) of every endpoint to measure"""
+        endpoints = []
+        for _, viewset, basename in router.registry:
+            sample = viewset.queryset.model.objects.order_by("pk").first()
+            if basename == "order":
+                sample = data["order"]
+            if hasattr(viewset, "list"):
+                params = LIST_PARAMS.get(basename, lambda data: {})(data)
+                endpoints.append((f"{basename}-list", "get", [], params))
+            if hasattr(viewset, "retrieve") and sample is not None:
+                endpoints.append(
+                    (f"{basename}-detail", "get", [sample.pk], {})
+                )
+            for extra_action in viewset.get_extra_actions():
+                if "get" not in extra_action.mapping:
+                    continue
+                args = []
+                if extra_action.detail:
+                    if sample is None:
+                        continue
+                    args = [sample.pk]
+                endpoints.append(
+                    (
+                        f"{basename}-{extra_action.url_name}",
+                        "get",
+                        args,
+                        {},
+                    )
+                )
+        endpoints = [
+            (f"airport:{name}", method, args, payload)
+            for name, method, args, payload in endpoints
+        ]
+        user = data["user"]
+        refresh = RefreshToken.for_user(user)
+        endpoints += [
+            ("user:user-all", "get", [], {}),
+            ("user:user-detail", "get", [user.pk], {}),
+            ("user:user-update", "get", [], {}),
+            (
+                "user:token-obtain-pair",
+                "post",
+                [],
+                {"email": user.email, "password": BENCH_PASSWORD},
+            ),
+            ("user:token-refresh", "post", [], {"refresh": str(refresh)}),
+            (
+                "user:token-verify",
+                "post",
+                [],
+                {"token": str(refresh.access_token)},
+            ),
+        ]
+        return endpoints
+
+    def measure(self, client, method, url, payload, iterations):
+        def request():
+            response = getattr(client, method)(url, payload)
+            if response.streaming:
+                size = len(b"".join(response.streaming_content))
+            else:
+                size = len(response.content)
+            return response, size
+
+        request()
+        timings = []
+        for _ in range(iterations):
+            start = time.perf_counter()
+            request()
+            timings.append((time.perf_counter() - start) * 1000)
+        with CaptureQueriesContext(connection) as queries:
+            response, size = request()
+        return {
+            "status": response.status_code,
+            "p50_ms": round(percentile(timings, 50), 3),
+            "p95_ms": round(percentile(timings, 95), 3),
+            "p99_ms": round(percentile(timings, 99), 3),
+            "queries": len(queries),
+            "bytes": size,
+        }
+
+    def run(self, options):
+        data = seed(options["airports"], options["flights"], options["orders"])
+        client = APIClient()
+        client.credentials(
+            HTTP_AUTHORIZATION=(
+                f"Bearer {RefreshToken.for_user(data['user']).access_token}"
+            )
+        )
+        results = {}
+        self.stderr.write(
+            "{:<40} {:>9} {:>9} {:>9}".format(
+                "endpoint", "p50 ms", "p95 ms", "p99 ms"
+            )
+        )
+        for name, method, args, payload in self.endpoints(data):
+            key = f"{method.upper()} {name}"
+            results[key] = self.measure(
+                client,
+                method,
+                reverse(name, args=args),
+                payload,
+                max(options["iterations"], 1),
+            )
+            self.stderr.write(
+                "{:<40} {p50_ms:>9.2f} {p95_ms:>9.2f} {p99_ms:>9.2f} "
+                "{queries:>4}q {bytes:>8}B {status}".format(
+                    key, **results[key]
+                )
+            )
+        return results
+
+    def compare(self, results, options):
+        with open(options["baseline"]) as file:
+            baseline = json.load(file)["endpoints"]
+        regressions = []
+        for key, result in results.items():
+            previous = baseline.get(key)
+            if previous is None:
+                continue
+            allowed = previous["p95_ms"] * (1 + options["threshold"] / 100)
+            if (
+                result["p95_ms"] > allowed
+                and result["p95_ms"] - previous["p95_ms"]
+                > options["min_delta_ms"]
+            ):
+                regressions.append(
+                    f"{key}: p95 {previous['p95_ms']}ms -> "
+                    f"{result['p95_ms']}ms"
+                )
+            if result["queries"] > previous["queries"]:
+                regressions.append(
+                    f"{key}: {previous['queries']} -> "
+                    f"{result['queries']} queries"
+                )
+        if regressions:
+            raise CommandError(
+                f"{len(regressions)} regression(s) over the baseline:\n"
+                + "\n".join(regressions)
+            )
+        self.stderr.write(self.style.SUCCESS("No regressions"))
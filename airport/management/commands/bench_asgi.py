@@ -0,0 +1,300 @@
+import asyncio
+import io
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from wsgiref.util import setup_testing_defaults
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.asgi import get_asgi_application
+from django.core.management.base import BaseCommand, CommandError
+from django.core.wsgi import get_wsgi_application
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.test.utils import override_settings
+from django.urls import reverse
+from rest_framework_simplejwt.tokens import AccessToken
+
+from airport.management.commands.bench_api import percentile
+from airport.models import Flight
+
+# sync viewset and async view serving the same payload
+ENDPOINTS = (
+    ("airport-list", "airport:airport-list", "airport:async-airport-list"),
+    ("route-list", "airport:route-list", "airport:async-route-list"),
+    ("flight-list", "airport:flight-list", "airport:async-flight-list"),
+    (
+        "flight-detail",
+        "airport:flight-detail",
+        "airport:async-flight-detail",
+    ),
+)
+# no response cache, both sides load their rows on every request
+BENCH_CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}
+}
+
+
+class SlowDatabase:
+    """Execute wrapper adding a fixed latency to every query and
+    recording the peak of queries and threads at the same time"""
+
+    def __init__(self, latency):
+        self.latency = latency
+        self.running = 0
+        self.peak_queries = 0
+        self.peak_threads = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, execute, sql, params, many, context):
+        with self._lock:
+            self.running += 1
+            self.peak_queries = max(self.peak_queries, self.running)
+            self.peak_threads = max(
+                self.peak_threads, threading.active_count()
+            )
+        try:
+            time.sleep(self.latency)
+            return execute(sql, params, many, context)
+        finally:
+            with self._lock:
+                self.running -= 1
+
+    def install(self, connection, **kwargs):
+        if self not in connection.execute_wrappers:
+            connection.execute_wrappers.append(self)
+
+    def __enter__(self):
+        connection_created.connect(self.install)
+        for connection in connections.all(initialized_only=True):
+            self.install(connection)
+        return self
+
+    def __exit__(self, *exc_info):
+        connection_created.disconnect(self.install)
+        for connection in connections.all(initialized_only=True):
+            if self in connection.execute_wrappers:
+                connection.execute_wrappers.remove(self)
+
+
+class Command(BaseCommand):
+    help = (  # noqa: VNE003
+        "Compare throughput of the async read endpoints under ASGI with "
+        "the sync viewsets under WSGI, both served in process with a "
+        "simulated slow database; needs existing data (generate_data)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--clients",
+            type=int,
+            default=200,
+            help="Concurrent clients",
+        )
+        parser.add_argument(
+            "--requests",
+            type=int,
+            default=1000,
+            help="Requests per endpoint and server",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=8,
+            help="Threads of the WSGI server",
+        )
+        parser.add_argument(
+            "--db-latency",
+            type=float,
+            default=20.0,
+            help="Milliseconds added to every query",
+        )
+        parser.add_argument("--output", help="Write the results JSON here")
+
+    def handle(self, *args, **options):
+        flight = Flight.objects.order_by("pk").first()
+        user = get_user_model().objects.order_by("pk").first()
+        if flight is None or user is None:
+            raise CommandError(
+                "No flights or users, run generate_data first"
+            )
+        authorization = f"Bearer {AccessToken.for_user(user)}"
+        middleware = [
+            name for name in settings.MIDDLEWARE if "debug_toolbar" not in name
+        ]
+        results = {}
+        self.stderr.write(
+            "{:<16} {:<6} {:>9} {:>9} {:>9} {:>8} {:>8}".format(
+                "endpoint", "server", "req/s", "p50 ms", "p95 ms",
+                "queries", "threads",
+            )
+        )
+        with override_settings(
+            CACHES=BENCH_CACHES,
+            MIDDLEWARE=middleware,
+            ALLOWED_HOSTS=["*"],
+        ):
+            wsgi = get_wsgi_application()
+            asgi = get_asgi_application()
+            for name, sync_name, async_name in ENDPOINTS:
+                args = [flight.pk] if name.endswith("detail") else []
+                results[name] = {
+                    "wsgi": self.measure(
+                        self.wsgi_client(
+                            wsgi,
+                            reverse(sync_name, args=args),
+                            authorization,
+                            ThreadPoolExecutor(options["workers"]),
+                        ),
+                        options,
+                    ),
+                    "asgi": self.measure(
+                        self.asgi_client(
+                            asgi,
+                            reverse(async_name, args=args),
+                            authorization,
+                        ),
+                        options,
+                    ),
+                }
+                for server in ("wsgi", "asgi"):
+                    self.stderr.write(
+                        "{:<16} {:<6} {requests_per_second:>9.1f} "
+                        "{p50_ms:>9.2f} {p95_ms:>9.2f} {peak_queries:>8} "
+                        "{peak_threads:>8}".format(
+                            name, server, **results[name][server]
+                        )
+                    )
+
+        report = {
+            "clients": options["clients"],
+            "requests": options["requests"],
+            "workers": options["workers"],
+            "db_latency_ms": options["db_latency"],
+            "async_db_concurrency": settings.ASYNC_DB_CONCURRENCY,
+            "endpoints": results,
+        }
+        output = json.dumps(report, indent=2, sort_keys=True)
+        if options["output"]:
+            with open(options["output"], "w") as file:
+                file.write(output + "\n")
+        else:
+            self.stdout.write(output)
+
+    @staticmethod
+    def wsgi_client(
+        application, path, authorization, workers, method="GET", body=b""
+    ):
+        """A WSGI server: every request takes one of the worker threads"""
+
+        def call():
+            environ = {
+                "REQUEST_METHOD": method,
+                "PATH_INFO": path,
+                "wsgi.input": io.BytesIO(body),
+                "CONTENT_LENGTH": str(len(body)),
+                "CONTENT_TYPE": "application/json",
+            }
+            if authorization:
+                environ["HTTP_AUTHORIZATION"] = authorization
+            setup_testing_defaults(environ)
+            statuses = []
+            response = application(
+                environ,
+                lambda status, headers, exc_info=None: statuses.append(
+                    status
+                ),
+            )
+            try:
+                b"".join(response)
+            finally:
+                response.close()
+            return int(statuses[0].split()[0])
+
+        async def request():
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(workers, call)
+
+        request.close = workers.shutdown
+        return request
+
+    @staticmethod
+    def asgi_client(application, path, authorization, method="GET", body=b""):
+        """An ASGI server: every request is a task of one event loop"""
+        headers = [
+            (b"host", b"127.0.0.1"),
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+        ]
+        if authorization:
+            headers.append((b"authorization", authorization.encode()))
+
+        async def request():
+            messages = []
+
+            async def receive():
+                return {"type": "http.request", "body": body}
+
+            async def send(message):
+                messages.append(message)
+
+            await application(
+                {
+                    "type": "http",
+                    "asgi": {"version": "3.0"},
+                    "http_version": "1.1",
+                    "method": method,
+                    "scheme": "http",
+                    "path": path,
+                    "raw_path": path.encode(),
+                    "query_string": b"",
+                    "root_path": "",
+                    "headers": headers,
+                    "client": ("127.0.0.1", 50000),
+                    "server": ("127.0.0.1", 80),
+                },
+                receive,
+                send,
+            )
+            return messages[0]["status"]
+
+        request.close = lambda: None
+        return request
+
+    def measure(self, request, options):
+        """Requests of concurrent clients, each one after the other"""
+        total = max(options["requests"], 1)
+        clients = max(min(options["clients"], total), 1)
+        timings, statuses = [], []
+
+        async def client(count):
+            for _ in range(count):
+                start = time.perf_counter()
+                statuses.append(await request())
+                timings.append((time.perf_counter() - start) * 1000)
+
+        async def run():
+            await asyncio.gather(
+                *(
+                    client(total // clients + (index < total % clients))
+                    for index in range(clients)
+                )
+            )
+
+        with SlowDatabase(options["db_latency"] / 1000) as database:
+            start = time.perf_counter()
+            try:
+                asyncio.run(run())
+            finally:
+                request.close()
+            elapsed = time.perf_counter() - start
+        return {
+            "requests_per_second": round(total / elapsed, 1),
+            "p50_ms": round(percentile(timings, 50), 3),
+            "p95_ms": round(percentile(timings, 95), 3),
+            "errors": sum(status != 200 for status in statuses),
+            "peak_queries": database.peak_queries,
+            "peak_threads": database.peak_threads,
+        }
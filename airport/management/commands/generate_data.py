@@ -0,0 +1,83 @@
+from datetime import datetime, timezone as dt_timezone
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from airport.synthetic import DataGenerator
+
+
+class Command(BaseCommand):
+    help = (  # noqa: VNE003
+        "Generate a deterministic synthetic dataset for scale testing, "
+        "the same seed and sizes always produce the same rows"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--airports", type=int, default=100)
+        parser.add_argument("--routes", type=int, default=1000)
+        parser.add_argument("--airplane-types", type=int, default=10)
+        parser.add_argument("--airplanes", type=int, default=200)
+        parser.add_argument("--crew", type=int, default=500)
+        parser.add_argument("--users", type=int, default=1000)
+        parser.add_argument("--flights", type=int, default=10000)
+        parser.add_argument("--crew-per-flight", type=int, default=3)
+        parser.add_argument(
+            "--load-factor",
+            type=float,
+            default=0.5,
+            help="Highest share of the seats of a flight that is sold",
+        )
+        parser.add_argument(
+            "--start",
+            type=datetime.fromisoformat,
+            default=datetime(2024, 1, 1),
+            help="First departure date, UTC (YYYY-MM-DD)",
+        )
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=365,
+            help="Departures are spread over this many days",
+        )
+        parser.add_argument("--batch-size", type=int, default=5000)
+
+    def handle(self, *args, **options):
+        if not 0 <= options["load_factor"] <= 1:
+            raise CommandError("--load-factor must be between 0 and 1")
+        if options["batch_size"] < 1 or options["days"] < 1:
+            raise CommandError("--batch-size and --days must be positive")
+        if get_user_model().objects.filter(
+            email__startswith=f"user{options['seed']}-",
+            email__endswith="@example.com",
+        ).exists():
+            raise CommandError(
+                f"Data of seed {options['seed']} was already generated, "
+                "use another --seed"
+            )
+
+        generator = DataGenerator(
+            seed=options["seed"],
+            batch_size=options["batch_size"],
+            start=options["start"].replace(tzinfo=dt_timezone.utc),
+            days=options["days"],
+            load_factor=options["load_factor"],
+            crew_per_flight=options["crew_per_flight"],
+            log=self.stdout.write,
+        )
+        try:
+            counts = generator.generate(
+                airports=options["airports"],
+                routes=options["routes"],
+                airplane_types=options["airplane_types"],
+                airplanes=options["airplanes"],
+                crew=options["crew"],
+                users=options["users"],
+                flights=options["flights"],
+            )
+        except ValueError as error:
+            raise CommandError(error)
+        summary = ", ".join(
+            f"{count} {name}" for name, count in counts.items()
+        )
+        self.stdout.write(self.style.SUCCESS(f"Generated {summary}"))
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from main.profiling import make_profile_token
+
+
+class Command(BaseCommand):
+    help = (  # noqa: VNE003
+        "Print a token for the X-Profile header, valid for "
+        "PROFILE_TOKEN_MAX_AGE seconds"
+    )
+
+    def handle(self, *args, **options):
+        self.stdout.write(make_profile_token())
@@ -0,0 +1,49 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from airport.models import Airplane
+from airport.response_cache import bump_model_version
+
+
+class Command(BaseCommand):
+    help = "Recalculate airplane rating sum, count and average"  # noqa: VNE003
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            airplanes = list(
+                Airplane.objects.select_for_update()
+                .annotate(**Airplane.rating_subqueries())
+                .filter(
+                    ~Q(rating_sum=F("actual_rating_sum"))
+                    | ~Q(rating_count=F("actual_rating_count"))
+                    | Q(rating_count__gt=0, rating_average__isnull=True)
+                )
+            )
+            now = timezone.now()
+            for airplane in airplanes:
+                airplane.updated_at = now
+                airplane.rating_sum = airplane.actual_rating_sum
+                airplane.rating_count = airplane.actual_rating_count
+                airplane.rating_average = (
+                    airplane.rating_sum / airplane.rating_count
+                    if airplane.rating_count
+                    else None
+                )
+            Airplane.objects.bulk_update(
+                airplanes,
+                [
+                    "rating_sum",
+                    "rating_count",
+                    "rating_average",
+                    "updated_at",
+                ],
+                batch_size=1000,
+            )
+            bump_model_version(Airplane)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Rebuilt rating of {len(airplanes)} airplane(s)"
+            )
+        )
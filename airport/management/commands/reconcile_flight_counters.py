@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from airport.models import Flight
+
+
+class Command(BaseCommand):
+    help = "Recalculate flight ticket and crew counters"  # noqa: VNE003
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            flights = list(
+                Flight.objects.select_for_update()
+                .annotate(
+                    actual_tickets_sold=Flight.tickets_sold_subquery(),
+                    actual_crew_count=Flight.crew_count_subquery(),
+                )
+                .filter(
+                    ~Q(tickets_sold=F("actual_tickets_sold"))
+                    | ~Q(crew_count=F("actual_crew_count"))
+                )
+            )
+            now = timezone.now()
+            for flight in flights:
+                flight.tickets_sold = flight.actual_tickets_sold
+                flight.crew_count = flight.actual_crew_count
+                flight.updated_at = now
+            Flight.objects.bulk_update(
+                flights,
+                ["tickets_sold", "crew_count", "updated_at"],
+                batch_size=1000,
+            )
+        self.stdout.write(
+            self.style.SUCCESS(f"Reconciled {len(flights)} flight(s)")
+        )
@@ -0,0 +1,44 @@
+# Generated by Django 4.2.4 on 2026-10-18 04:16
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def fill_airplane_ratings(apps, schema_editor):
+    Airplane = apps.get_model("airport", "Airplane")
+    Rating = apps.get_model("airport", "Rating")
+    for aggregate in (
+        Rating.objects.order_by()
+        .values("airplane")
+        .annotate(total=Sum("star__value"), count=Count("id"))
+    ):
+        Airplane.objects.filter(pk=aggregate["airplane"]).update(
+            rating_sum=aggregate["total"],
+            rating_count=aggregate["count"],
+            rating_average=aggregate["total"] / aggregate["count"],
+        )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("airport", "0010_airport_latitude_airport_longitude"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="airplane",
+            name="rating_average",
+            field=models.FloatField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="airplane",
+            name="rating_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="airplane",
+            name="rating_sum",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(fill_airplane_ratings, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.4 on 2026-10-18 04:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("airport", "0011_airplane_rating_aggregates"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="flight",
+            index=models.Index(
+                fields=["-departure_time", "-id"], name="flight_departure_id_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,63 @@
+# Generated by Django 4.2.4 on 2026-10-18 04:21
+
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+def merge_duplicate_routes(apps, schema_editor):
+    """Keep the first route of every source and destination pair, move
+    the flights of the others to it"""
+    Route = apps.get_model("airport", "Route")
+    Flight = apps.get_model("airport", "Flight")
+    for duplicate in (
+        Route.objects.order_by()
+        .values("source", "destination")
+        .annotate(first=Min("id"), count=Count("id"))
+        .filter(count__gt=1)
+    ):
+        others = Route.objects.filter(
+            source=duplicate["source"], destination=duplicate["destination"]
+        ).exclude(pk=duplicate["first"])
+        Flight.objects.filter(route__in=others).update(
+            route=duplicate["first"]
+        )
+        others.delete()
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("airport", "0012_flight_departure_id_idx"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="flight",
+            index=models.Index(fields=["arrival_time"], name="flight_arrival_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="flight",
+            index=models.Index(
+                fields=["route", "-departure_time", "-id"],
+                name="flight_route_departure_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="order",
+            index=models.Index(
+                fields=["user", "-created_at"], name="order_user_created_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="rating",
+            index=models.Index(
+                fields=["ip", "airplane"], name="rating_ip_airplane_idx"
+            ),
+        ),
+        migrations.RunPython(merge_duplicate_routes, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name="route",
+            constraint=models.UniqueConstraint(
+                fields=("source", "destination"), name="unique_route_source_destination"
+            ),
+        ),
+    ]
@@ -1,6 +1,12 @@
+from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
+from django.db.models import Count, F, OuterRef, Subquery, Sum
+from django.db.models.functions import Cast, Coalesce, NullIf
+from django.utils import timezone
 from rest_framework.exceptions import ValidationError
 
+from airport.geo import airport_distance
+
 
 class Airport(models.Model):
     name = models.CharField(max_length=255)
@@ -10,6 +16,17 @@ class Airport(models.Model):
     image = models.ImageField(null=True,
                               blank=True,
                               upload_to="images/airport/")
+    latitude = models.FloatField(
+        null=True,
+        blank=True,
+        validators=[MinValueValidator(-90), MaxValueValidator(90)],
+    )
+    longitude = models.FloatField(
+        null=True,
+        blank=True,
+        validators=[MinValueValidator(-180), MaxValueValidator(180)],
+    )
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
 
     def __str__(self):
         return self.name
@@ -23,6 +40,22 @@ class Route(models.Model):
         Airport, on_delete=models.CASCADE, related_name="destination"
     )
     distance = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["source", "destination"],
+                name="unique_route_source_destination",
+            ),
+        ]
+
+    def save(self, *args, **kwargs):
+        if self._state.adding and not self.distance:
+            self.distance = airport_distance(
+                self.source, self.destination
+            ) or 0
+        super(Route, self).save(*args, **kwargs)
 
     def __str__(self):
         return f"{self.source} - {self.destination}"
@@ -50,6 +83,7 @@ class Crew(models.Model):
     image = models.ImageField(null=True,
                               blank=True,
                               upload_to="images/crew/")
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
 
     def __str__(self):
         return f"{self.first_name} {self.last_name}"
@@ -61,6 +95,7 @@ class AirplaneType(models.Model):
         null=True,
         blank=True,
         upload_to="images/airplane/")
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
 
     def __str__(self):
         return self.name
@@ -78,11 +113,52 @@ class Airplane(models.Model):
         on_delete=models.CASCADE,
         related_name="airplane"
     )
+    rating_sum = models.PositiveIntegerField(default=0, editable=False)
+    rating_count = models.PositiveIntegerField(default=0, editable=False)
+    rating_average = models.FloatField(null=True, editable=False)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
 
     @property
     def capacity(self) -> int:
         return self.rows * self.seats_in_row
 
+    @staticmethod
+    def update_rating(airplane_id, star_delta, count_delta):
+        rating_sum = F("rating_sum") + star_delta
+        rating_count = F("rating_count") + count_delta
+        Airplane.objects.filter(pk=airplane_id).update(
+            rating_sum=rating_sum,
+            rating_count=rating_count,
+            rating_average=(
+                Cast(rating_sum, models.FloatField())
+                / NullIf(rating_count, 0)
+            ),
+            updated_at=timezone.now(),
+        )
+
+    @staticmethod
+    def rating_subqueries():
+        ratings = (
+            Rating.objects.filter(airplane=OuterRef("pk"))
+            .order_by()
+            .values("airplane")
+        )
+        return {
+            "actual_rating_sum": Coalesce(
+                Subquery(
+                    ratings.annotate(total=Sum("star__value"))
+                    .values("total")
+                ),
+                0,
+            ),
+            "actual_rating_count": Coalesce(
+                Subquery(
+                    ratings.annotate(count=Count("id")).values("count")
+                ),
+                0,
+            ),
+        }
+
     def __str__(self):
         return self.name
 
@@ -102,9 +178,76 @@ class Flight(models.Model):
         related_name="flights")
     departure_time = models.DateTimeField()
     arrival_time = models.DateTimeField()
+    tickets_sold = models.PositiveIntegerField(default=0, editable=False)
+    crew_count = models.PositiveIntegerField(default=0, editable=False)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
 
     class Meta:
         ordering = ["-departure_time"]
+        indexes = [
+            models.Index(
+                fields=["-departure_time", "-id"],
+                name="flight_departure_id_idx",
+            ),
+            models.Index(
+                fields=["arrival_time"],
+                name="flight_arrival_idx",
+            ),
+            models.Index(
+                fields=["route", "-departure_time", "-id"],
+                name="flight_route_departure_idx",
+            ),
+        ]
+
+    @property
+    def tickets_available(self) -> int:
+        return self.airplane.capacity - self.tickets_sold
+
+    @staticmethod
+    def tickets_sold_subquery():
+        return Coalesce(
+            Subquery(
+                Ticket.objects.filter(flight=OuterRef("pk"))
+                .order_by()
+                .values("flight")
+                .annotate(count=Count("id"))
+                .values("count")
+            ),
+            0,
+        )
+
+    @staticmethod
+    def crew_count_subquery():
+        return Coalesce(
+            Subquery(
+                Flight.crew.through.objects.filter(flight=OuterRef("pk"))
+                .order_by()
+                .values("flight")
+                .annotate(count=Count("id"))
+                .values("count")
+            ),
+            0,
+        )
+
+    @staticmethod
+    def update_tickets_sold(flight_id, delta):
+        Flight.objects.filter(pk=flight_id).update(
+            tickets_sold=F("tickets_sold") + delta,
+            updated_at=timezone.now(),
+        )
+
+    @staticmethod
+    def update_crew_count(flight_ids):
+        Flight.objects.filter(pk__in=flight_ids).update(
+            crew_count=Flight.crew_count_subquery(),
+            updated_at=timezone.now(),
+        )
+
+    @staticmethod
+    def touch(flight_ids):
+        Flight.objects.filter(pk__in=flight_ids).update(
+            updated_at=timezone.now()
+        )
 
     def __str__(self):
         return f"{self.route}"
@@ -121,6 +264,12 @@ class Order(models.Model):
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(
+                fields=["user", "-created_at"],
+                name="order_user_created_idx",
+            ),
+        ]
 
 
 class Ticket(models.Model):
@@ -182,6 +331,26 @@ class Ticket(models.Model):
         ordering = ["row", "seat"]
 
 
+class SeatHold(models.Model):
+    flight = models.ForeignKey(
+        Flight,
+        on_delete=models.CASCADE,
+        related_name="seat_holds")
+    user = models.ForeignKey("user.User",
+                             on_delete=models.CASCADE,
+                             related_name="seat_holds")
+    row = models.IntegerField()
+    seat = models.IntegerField()
+    expires_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"{str(self.flight)} (row: {self.row}, seat: {self.seat})"
+
+    class Meta:
+        unique_together = ("flight", "row", "seat")
+        ordering = ["row", "seat"]
+
+
 class RatingStarAirplane(models.Model):
     value = models.PositiveSmallIntegerField("Meaning", default=0)
 
@@ -209,3 +378,9 @@ class Rating(models.Model):
     class Meta:
         verbose_name = "Rating"
         verbose_name_plural = "Ratings"
+        indexes = [
+            models.Index(
+                fields=["ip", "airplane"],
+                name="rating_ip_airplane_idx",
+            ),
+        ]
@@ -0,0 +1,132 @@
+"""Ticket fares.
+
+The fare of a seat is the route fare (FARE_BASE + FARE_PER_KM * distance)
+times the multiplier of the seat's row band, times a surcharge that grows
+with the flight's load factor. The fares of all seats of a flight are
+computed in one numpy pass and cached as a rows x seats_in_row array,
+so quoting a seat map or pricing an order is an array lookup. Amounts
+are integers in the smallest unit of FARE_CURRENCY. Cached fares carry
+the per-flight version they were built at, like the seat maps.
+"""
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+
+from airport.models import Flight
+from main.cache import bump_version
+
+FARES_KEY = "airport:fares:{}"
+FARES_VERSION_KEY = "airport:fares_version:{}"
+FARES_TIMEOUT = 300
+
+
+def fares_key(flight_id):
+    return FARES_KEY.format(flight_id)
+
+
+def fares_version_key(flight_id):
+    return FARES_VERSION_KEY.format(flight_id)
+
+
+def row_multipliers(rows, bands):
+    """Multiplier of every row, ``bands`` are (last row, multiplier)
+    pairs; rows after the last band cost the route fare"""
+    multipliers = np.ones(rows)
+    row_numbers = np.arange(1, rows + 1)
+    for last_row, multiplier in sorted(bands, reverse=True):
+        multipliers[row_numbers <= last_row] = multiplier
+    return multipliers
+
+
+def compute_fares(distance, rows, seats_in_row, tickets_sold):
+    route_fare = settings.FARE_BASE + settings.FARE_PER_KM * distance
+    load_factor = min(tickets_sold / (rows * seats_in_row), 1.0)
+    surcharge = 1 + settings.FARE_LOAD_SURCHARGE * load_factor
+    row_fares = route_fare * surcharge * row_multipliers(
+        rows, settings.FARE_ROW_BANDS
+    )
+    return np.repeat(
+        np.rint(row_fares).astype(np.int64)[:, np.newaxis],
+        seats_in_row,
+        axis=1,
+    )
+
+
+def get_cached_fares(flight_id):
+    """The cached fares, unless they were built before the last
+    invalidation of the flight"""
+    key, version_key = fares_key(flight_id), fares_version_key(flight_id)
+    cached = cache.get_many([key, version_key])
+    fares = cached.get(key)
+    if fares is None or fares["version"] != cached.get(version_key, 0):
+        return None
+    return fares
+
+
+def load_fares(flight):
+    """Fares of a flight cached for its current load.
+
+    The version is read before the flight row, which is loaded again
+    here: fares built from a row older than an invalidation are cached
+    with the old version and never served.
+    """
+    version = cache.get(fares_version_key(flight.id), 0)
+    tickets_sold, distance, rows, seats_in_row = Flight.objects.values_list(
+        "tickets_sold",
+        "route__distance",
+        "airplane__rows",
+        "airplane__seats_in_row",
+    ).get(pk=flight.id)
+    fares = {
+        "version": version,
+        "tickets_sold": tickets_sold,
+        "fares": compute_fares(distance, rows, seats_in_row, tickets_sold),
+    }
+    cache.set(fares_key(flight.id), fares, FARES_TIMEOUT)
+    return fares
+
+
+def get_fares(flight):
+    """Fares of a loaded flight, computed from it without caching when
+    the cached ones are missing or built for another load"""
+    fares = get_cached_fares(flight.id)
+    if fares is not None and fares["tickets_sold"] == flight.tickets_sold:
+        return fares["fares"]
+    return compute_fares(
+        flight.route.distance,
+        flight.airplane.rows,
+        flight.airplane.seats_in_row,
+        flight.tickets_sold,
+    )
+
+
+def invalidate_fares(*flight_ids):
+    """Drop the fares, the next read computes them from the flight"""
+    for flight_id in flight_ids:
+        bump_version(fares_version_key(flight_id))
+    cache.delete_many([fares_key(flight_id) for flight_id in flight_ids])
+
+
+def order_price(tickets):
+    """Sum of the fares of ticket dicts with a flight, row and seat"""
+    places_by_flight = {}
+    for ticket in tickets:
+        flight = ticket["flight"]
+        flight, rows, seats = places_by_flight.setdefault(
+            flight.id, (flight, [], [])
+        )
+        rows.append(ticket["row"] - 1)
+        seats.append(ticket["seat"] - 1)
+    return sum(
+        int(get_fares(flight)[rows, seats].sum())
+        for flight, rows, seats in places_by_flight.values()
+    )
+
+
+def serialize_fares(flight_id, fares):
+    return {
+        "flight": int(flight_id),
+        "currency": settings.FARE_CURRENCY,
+        "tickets_sold": fares["tickets_sold"],
+        "fares": fares["fares"].tolist(),
+    }
@@ -0,0 +1,123 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.cache import get_conditional_response
+from django.utils.http import parse_http_date_safe, urlencode
+from rest_framework import status
+from rest_framework.response import Response
+
+from main.cache import bump_version
+
+MODEL_VERSION_KEY = "airport:model_version:{}"
+RESPONSE_KEY = "airport:response:{}"
+CACHED_HEADERS = ("ETag", "Last-Modified")
+
+
+def model_version_key(model):
+    return MODEL_VERSION_KEY.format(model._meta.label_lower)
+
+
+def get_model_versions(models):
+    versions = cache.get_many([model_version_key(model) for model in models])
+    return [versions.get(model_version_key(model), 0) for model in models]
+
+
+def normalized_query_params(request):
+    """Query string with sorted keys and values"""
+    return urlencode(
+        sorted(
+            (key, sorted(values))
+            for key, values in request.query_params.lists()
+        ),
+        doseq=True,
+    )
+
+
+def bump_model_version(model):
+    """Invalidate every cached response built from the model.
+
+    The version is bumped right away and once more after commit, so a
+    response cached from the state before the commit is dropped too.
+    """
+    key = model_version_key(model)
+    bump_version(key)
+    transaction.on_commit(lambda: bump_version(key))
+
+
+class CachedResponseMixin:
+    """Caches list and retrieve responses of a viewset.
+
+    Keys are built from the action, URL kwargs, normalized query params
+    and the versions of ``cache_models`` (the queryset model when
+    empty), so a model change invalidates them without scanning keys.
+    """
+
+    cache_models = ()
+    cached_actions = ("list", "retrieve")
+
+    def get_cache_models(self):
+        return self.cache_models or (self.get_queryset().model,)
+
+    def get_response_cache_key(self, request):
+        versions = get_model_versions(self.get_cache_models())
+        material = "|".join(
+            [
+                type(self).__name__,
+                self.action,
+                urlencode(sorted(self.kwargs.items())),
+                request.get_host(),
+                normalized_query_params(request),
+                request.accepted_renderer.format or "",
+                ",".join(map(str, versions)),
+            ]
+        )
+        return RESPONSE_KEY.format(hashlib.md5(material.encode()).hexdigest())
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        if self.action not in self.cached_actions:
+            return handler(request, *args, **kwargs)
+        key = self.get_response_cache_key(request)
+        cached = cache.get(key)
+        if cached is not None:
+            data, headers = cached
+            return self.cached_conditional_response(
+                request, Response(data, headers=headers)
+            )
+        response = handler(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            headers = {
+                header: response[header]
+                for header in CACHED_HEADERS
+                if header in response
+            }
+            cache.set(
+                key, (response.data, headers), settings.RESPONSE_CACHE_TIMEOUT
+            )
+        return response
+
+    def cached_conditional_response(self, request, response):
+        """304 for a cached response whose validators the client has,
+        the same rules as ConditionalGetMixin apply"""
+        if "ETag" not in response:
+            return response
+        last_modified = None
+        if self.action == "retrieve":
+            last_modified = parse_http_date_safe(
+                response.get("Last-Modified")
+            )
+        return get_conditional_response(
+            request._request,
+            etag=response["ETag"],
+            last_modified=last_modified,
+            response=response,
+        )
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(
+            super().retrieve, request, *args, **kwargs
+        )
@@ -0,0 +1,118 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+from airport.models import SeatHold, Ticket
+
+
+def get_seat_hold_ttl():
+    return timedelta(seconds=getattr(settings, "SEAT_HOLD_TTL", 15 * 60))
+
+
+class SeatConflict(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = "Some of the seats are already taken."
+    default_code = "seat_conflict"
+
+    def __init__(self, places):
+        self.places = sorted(places)
+        super().__init__()
+        # keep seat numbers as integers in the response
+        self.detail = {
+            "detail": self.detail,
+            "seats": [
+                {"flight": flight_id, "row": row, "seat": seat}
+                for flight_id, row, seat in self.places
+            ],
+        }
+
+
+def _filter_places(queryset, places):
+    return queryset.filter(
+        flight_id__in={flight_id for flight_id, _, _ in places},
+        row__in={row for _, row, _ in places},
+    ).order_by()
+
+
+def find_conflicts(places, user=None):
+    """(flight_id, row, seat) places that are sold or held by someone
+    other than the user"""
+    places = set(places)
+    taken_places = set(
+        _filter_places(Ticket.objects, places).values_list(
+            "flight_id", "row", "seat"
+        )
+    )
+    holds = _filter_places(SeatHold.objects, places).filter(
+        expires_at__gt=timezone.now()
+    )
+    if user is not None:
+        holds = holds.exclude(user=user)
+    taken_places.update(holds.values_list("flight_id", "row", "seat"))
+    return taken_places & places
+
+
+def hold_seats(user, flight, seats, ttl=None):
+    """Hold (row, seat) pairs of a flight for the user until they expire.
+
+    Holds are inserted first and the unique (flight, row, seat) index
+    decides the race, so concurrent buyers get a SeatConflict instead
+    of an IntegrityError.
+    """
+    now = timezone.now()
+    expires_at = now + (ttl or get_seat_hold_ttl())
+    places = {(flight.id, row, seat) for row, seat in seats}
+    with transaction.atomic():
+        # expired holds and the user's own holds on these seats are
+        # replaced by the new ones
+        SeatHold.objects.filter(
+            id__in=[
+                hold_id
+                for hold_id, flight_id, row, seat, expires, user_id in (
+                    _filter_places(SeatHold.objects, places).values_list(
+                        "id", "flight_id", "row", "seat",
+                        "expires_at", "user_id",
+                    )
+                )
+                if (flight_id, row, seat) in places
+                and (expires <= now or user_id == user.id)
+            ]
+        ).delete()
+
+        conflicts = find_conflicts(places, user)
+        if conflicts:
+            raise SeatConflict(conflicts)
+        try:
+            with transaction.atomic():
+                holds = SeatHold.objects.bulk_create(
+                    SeatHold(
+                        flight=flight,
+                        user=user,
+                        row=row,
+                        seat=seat,
+                        expires_at=expires_at,
+                    )
+                    for _, row, seat in sorted(places)
+                )
+        except IntegrityError:
+            raise SeatConflict(find_conflicts(places, user) or places)
+    return holds
+
+
+def release_seats(user, places):
+    places = set(places)
+    return SeatHold.objects.filter(
+        id__in=[
+            hold_id
+            for hold_id, flight_id, row, seat in (
+                _filter_places(SeatHold.objects, places)
+                .filter(user=user)
+                .values_list("id", "flight_id", "row", "seat")
+            )
+            if (flight_id, row, seat) in places
+        ]
+    ).delete()[0]
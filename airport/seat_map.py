@@ -0,0 +1,85 @@
+import base64
+
+from django.core.cache import cache
+
+from main.cache import bump_version
+
+SEAT_MAP_KEY = "airport:seat_map:{}"
+SEAT_MAP_VERSION_KEY = "airport:seat_map_version:{}"
+SEAT_MAP_TIMEOUT = 300
+
+
+def seat_map_key(flight_id):
+    return SEAT_MAP_KEY.format(flight_id)
+
+
+def seat_map_version_key(flight_id):
+    return SEAT_MAP_VERSION_KEY.format(flight_id)
+
+
+def seat_index(row, seat, seats_in_row):
+    return (row - 1) * seats_in_row + (seat - 1)
+
+
+def _set_bit(bitmap, index):
+    bitmap[index // 8] |= 0x80 >> (index % 8)
+
+
+def build_seat_map(rows, seats_in_row, taken_places):
+    """Pack (row, seat) pairs into a bitmap, MSB first, row-major."""
+    bitmap = bytearray((rows * seats_in_row + 7) // 8)
+    for row, seat in taken_places:
+        _set_bit(bitmap, seat_index(row, seat, seats_in_row))
+    return {
+        "rows": rows,
+        "seats_in_row": seats_in_row,
+        "bitmap": bytes(bitmap),
+    }
+
+
+def get_cached_seat_map(flight_id):
+    """The cached seat map, unless it was built before the last
+    invalidation of the flight"""
+    key, version_key = seat_map_key(flight_id), seat_map_version_key(flight_id)
+    cached = cache.get_many([key, version_key])
+    seat_map = cached.get(key)
+    if seat_map is None or seat_map["version"] != cached.get(version_key, 0):
+        return None
+    return seat_map
+
+
+def load_seat_map(flight):
+    """Build the seat map of a flight from its tickets and cache it.
+
+    The version is read before the tickets: when a ticket change commits
+    while the map is built, the map is cached with the old version and
+    never served.
+    """
+    version = cache.get(seat_map_version_key(flight.id), 0)
+    taken_places = flight.tickets.order_by().values_list("row", "seat")
+    seat_map = build_seat_map(
+        flight.airplane.rows,
+        flight.airplane.seats_in_row,
+        taken_places,
+    )
+    seat_map["version"] = version
+    cache.set(seat_map_key(flight.id), seat_map, SEAT_MAP_TIMEOUT)
+    return seat_map
+
+
+def invalidate_seat_map(*flight_ids):
+    """Drop the seat maps, the next read rebuilds them from the tickets"""
+    for flight_id in flight_ids:
+        bump_version(seat_map_version_key(flight_id))
+    cache.delete_many([seat_map_key(flight_id) for flight_id in flight_ids])
+
+
+def serialize_seat_map(flight_id, seat_map):
+    bitmap = seat_map["bitmap"]
+    return {
+        "flight": int(flight_id),
+        "rows": seat_map["rows"],
+        "seats_in_row": seat_map["seats_in_row"],
+        "taken": sum(bin(byte).count("1") for byte in bitmap),
+        "bitmap": base64.b64encode(bitmap).decode("ascii"),
+    }
@@ -1,6 +1,9 @@
-from django.db import transaction
+from collections import Counter
+
+from django.db import IntegrityError, transaction
 from rest_framework import serializers
 from rest_framework.exceptions import ValidationError
+from rest_framework.validators import UniqueTogetherValidator
 
 from airport.models import (
     Airport,
@@ -13,6 +16,9 @@ from airport.models import (
     Ticket,
     Rating,
 )
+from airport.pricing import invalidate_fares, order_price
+from airport.seat_holds import SeatConflict, find_conflicts, release_seats
+from airport.seat_map import invalidate_seat_map
 
 
 class AirportSerializer(serializers.ModelSerializer):
@@ -25,6 +31,8 @@ class AirportSerializer(serializers.ModelSerializer):
             "city",
             "closest_big_city",
             "image",
+            "latitude",
+            "longitude",
         )
 
 
@@ -37,6 +45,13 @@ class RouteSerializer(serializers.ModelSerializer):
             "destination",
             "distance",
         )
+        # DRF 3.14 builds no validator from the UniqueConstraint
+        validators = [
+            UniqueTogetherValidator(
+                queryset=Route.objects.all(),
+                fields=("source", "destination"),
+            )
+        ]
 
 
 class RouteListSerializer(RouteSerializer):
@@ -84,8 +99,9 @@ class AirplaneListSerializer(serializers.ModelSerializer):
     airplane_type = serializers.SlugRelatedField(
         many=False, read_only=True, slug_field="name"
     )
-    middle_star = serializers.IntegerField()
-    rating_user = serializers.BooleanField()
+    middle_star = serializers.IntegerField(
+        source="rating_average", read_only=True
+    )
 
     class Meta:
         model = Airplane
@@ -96,7 +112,6 @@ class AirplaneListSerializer(serializers.ModelSerializer):
             "seats_in_row",
             "airplane_type",
             "middle_star",
-            "rating_user",
         )
 
 
@@ -121,7 +136,27 @@ class CrewSerializer(serializers.ModelSerializer):
         fields = ("first_name", "last_name", "crew_position", "image")
 
 
+class FlightPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """Resolves every flight (with its airplane and route) once per
+    serializer, so the tickets of one order do not look up the same
+    flight again"""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self._flights = {}
+
+    def to_internal_value(self, data):
+        key = str(data)
+        if key not in self._flights:
+            self._flights[key] = super().to_internal_value(data)
+        return self._flights[key]
+
+
 class TicketSerializer(serializers.ModelSerializer):
+    flight = FlightPrimaryKeyRelatedField(
+        queryset=Flight.objects.select_related("airplane", "route")
+    )
+
     def validate(self, attrs):
         data = super(TicketSerializer, self).validate(attrs=attrs)
         Ticket.validate_ticket(
@@ -140,6 +175,9 @@ class TicketSerializer(serializers.ModelSerializer):
             "seat",
             "flight",
         )
+        # seat uniqueness is checked for all tickets of an order at once
+        # in OrderSerializer.validate_tickets
+        validators = []
 
 
 class TicketSeatsSerializer(TicketSerializer):
@@ -148,6 +186,25 @@ class TicketSeatsSerializer(TicketSerializer):
         fields = ("row", "seat")
 
 
+class SeatSerializer(serializers.Serializer):
+    row = serializers.IntegerField(min_value=1)
+    seat = serializers.IntegerField(min_value=1)
+
+
+class SeatHoldSerializer(serializers.Serializer):
+    seats = SeatSerializer(many=True, allow_empty=False)
+
+    def validate_seats(self, seats):
+        for seat in seats:
+            Ticket.validate_ticket(
+                seat["row"],
+                seat["seat"],
+                self.context["flight"].airplane,
+                ValidationError,
+            )
+        return seats
+
+
 class FlightSerializer(serializers.ModelSerializer):
     class Meta:
         model = Flight
@@ -167,12 +224,9 @@ class FlightListSerializer(FlightSerializer):
     airplane_capacity = serializers.IntegerField(
         source="airplane.capacity", read_only=True
     )
-    crew_count = serializers.SerializerMethodField()
+    crew_count = serializers.IntegerField(read_only=True)
     tickets_available = serializers.IntegerField(read_only=True)
 
-    def get_crew_count(self, obj):
-        return obj.crew.count()
-
     class Meta:
         model = Flight
         fields = (
@@ -208,6 +262,30 @@ class FlightDetailSerializer(FlightSerializer):
         )
 
 
+class ItinerarySearchSerializer(serializers.Serializer):
+    source = serializers.CharField()
+    destination = serializers.CharField()
+    date = serializers.DateField()
+    max_stops = serializers.IntegerField(min_value=0, max_value=2, default=2)
+    min_layover = serializers.IntegerField(min_value=0, default=45)
+    max_layover = serializers.IntegerField(min_value=0, default=360)
+
+    def validate(self, attrs):
+        if attrs["min_layover"] > attrs["max_layover"]:
+            raise ValidationError(
+                {"min_layover": "min_layover must not exceed max_layover"}
+            )
+        return attrs
+
+
+class ItinerarySerializer(serializers.Serializer):
+    departure_time = serializers.DateTimeField()
+    arrival_time = serializers.DateTimeField()
+    duration = serializers.DurationField()
+    stops = serializers.IntegerField()
+    flights = FlightListSerializer(many=True)
+
+
 class TicketListSerializer(TicketSerializer):
     flight = FlightListSerializer(many=False, read_only=True)
 
@@ -220,15 +298,58 @@ class OrderSerializer(serializers.ModelSerializer):
         fields = (
             "id",
             "created_at",
+            "price",
             "tickets",
         )
+        read_only_fields = ("price",)
+
+    def validate_tickets(self, tickets):
+        places = [
+            (ticket["flight"].id, ticket["row"], ticket["seat"])
+            for ticket in tickets
+        ]
+        if len(set(places)) != len(places):
+            raise ValidationError("The same seat is ordered more than once.")
+
+        request = self.context.get("request")
+        conflicts = find_conflicts(
+            places, request.user if request else None
+        )
+        if conflicts:
+            raise SeatConflict(conflicts)
+        return tickets
 
     def create(self, validated_data):
         with transaction.atomic():
             tickets_data = validated_data.pop("tickets")
-            order = Order.objects.create(**validated_data)
-            for ticket_data in tickets_data:
-                Ticket.objects.create(order=order, **ticket_data)
+            places = [
+                (ticket["flight"].id, ticket["row"], ticket["seat"])
+                for ticket in tickets_data
+            ]
+            # fares at the load the buyer was quoted, before this sale
+            order = Order.objects.create(
+                price=order_price(tickets_data), **validated_data
+            )
+            # tickets are validated in bulk above, so Ticket.full_clean
+            # is not needed per row
+            try:
+                with transaction.atomic():
+                    tickets = Ticket.objects.bulk_create(
+                        Ticket(order=order, **ticket_data)
+                        for ticket_data in tickets_data
+                    )
+            except IntegrityError:
+                raise SeatConflict(
+                    find_conflicts(places, order.user) or places
+                )
+            release_seats(order.user, places)
+            for flight_id, count in Counter(
+                ticket.flight_id for ticket in tickets
+            ).items():
+                Flight.update_tickets_sold(flight_id, count)
+            flight_ids = {ticket.flight_id for ticket in tickets}
+            transaction.on_commit(lambda: invalidate_seat_map(*flight_ids))
+            transaction.on_commit(lambda: invalidate_fares(*flight_ids))
             return order
 
 
@@ -240,11 +361,12 @@ class CreateRatingSerializer(serializers.ModelSerializer):
     class Meta:
         model = Rating
         fields = ("star", "airplane", "ip")
+        read_only_fields = ("ip",)
 
-        def create(self, validate_data):
-            rating = Rating.objects.update_or_create(
-                ip=validate_data.get("ip", None),
-                airplane=validate_data.get("airplane", None),
-                defaults={"star": validate_data.get("star")},
-            )
-            return rating
+    def create(self, validate_data):
+        rating, _ = Rating.objects.update_or_create(
+            ip=validate_data.get("ip", None),
+            airplane=validate_data.get("airplane", None),
+            defaults={"star": validate_data.get("star")},
+        )
+        return rating
@@ -1,3 +1,4 @@
+from django.db.models import F
 from django_filters import rest_framework as filters
 
 from airport.models import Airport, Route, Crew, Airplane, Flight, Order
@@ -65,6 +66,7 @@ class FlightFilter(filters.FilterSet):
                                   lookup_expr="in")
     departure_time = filters.DateTimeFromToRangeFilter()
     arrival_time = filters.DateTimeFromToRangeFilter()
+    available = filters.BooleanFilter(method="filter_available")
 
     class Meta:
         model = Flight
@@ -73,8 +75,15 @@ class FlightFilter(filters.FilterSet):
             "airplane",
             "departure_time",
             "arrival_time",
+            "available",
         ]
 
+    def filter_available(self, queryset, name, value):
+        capacity = F("airplane__rows") * F("airplane__seats_in_row")
+        if value:
+            return queryset.filter(tickets_sold__lt=capacity)
+        return queryset.filter(tickets_sold__gte=capacity)
+
 
 class OrderFilter(filters.FilterSet):
     created_at = filters.DateTimeFromToRangeFilter()
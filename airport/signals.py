@@ -0,0 +1,216 @@
+from django.db import transaction
+from django.db.models.signals import (
+    post_save,
+    post_delete,
+    pre_delete,
+    pre_save,
+    m2m_changed,
+)
+from django.dispatch import receiver
+
+from airport.itinerary import flight_graph
+from airport.models import (
+    Airplane,
+    AirplaneType,
+    Airport,
+    Crew,
+    Flight,
+    Rating,
+    Route,
+    Ticket,
+)
+from airport.pricing import invalidate_fares
+from airport.response_cache import bump_model_version
+from airport.seat_map import invalidate_seat_map
+
+
+@receiver(pre_save, sender=Ticket)
+def remember_previous_flight(sender, instance, **kwargs):
+    instance._previous_flight_id = (
+        Ticket.objects.filter(pk=instance.pk)
+        .values_list("flight_id", flat=True)
+        .first()
+        if instance.pk
+        else None
+    )
+
+
+def ticket_flight_ids(ticket):
+    """The flight of a ticket and the one it was moved from, if any"""
+    previous_flight_id = ticket.__dict__.get("_previous_flight_id")
+    return {ticket.flight_id, previous_flight_id} - {None}
+
+
+@receiver(post_save, sender=Ticket)
+@receiver(post_delete, sender=Ticket)
+def invalidate_seat_map_on_ticket_change(sender, instance, **kwargs):
+    flight_ids = ticket_flight_ids(instance)
+    transaction.on_commit(lambda: invalidate_seat_map(*flight_ids))
+
+
+@receiver(post_save, sender=Flight)
+def invalidate_seat_map_on_flight_save(sender, instance, created, **kwargs):
+    if not created:
+        transaction.on_commit(lambda: invalidate_seat_map(instance.id))
+
+
+@receiver(post_delete, sender=Flight)
+def invalidate_seat_map_on_flight_delete(sender, instance, **kwargs):
+    transaction.on_commit(lambda: invalidate_seat_map(instance.id))
+
+
+@receiver(post_save, sender=Airplane)
+def invalidate_seat_map_on_airplane_save(sender, instance, created, **kwargs):
+    if not created:
+        flight_ids = list(instance.flights.values_list("id", flat=True))
+        if flight_ids:
+            transaction.on_commit(lambda: invalidate_seat_map(*flight_ids))
+
+
+@receiver(post_save, sender=Ticket)
+@receiver(post_delete, sender=Ticket)
+def invalidate_fares_on_ticket_change(sender, instance, **kwargs):
+    flight_ids = ticket_flight_ids(instance)
+    transaction.on_commit(lambda: invalidate_fares(*flight_ids))
+
+
+@receiver(post_save, sender=Flight)
+def invalidate_fares_on_flight_save(sender, instance, created, **kwargs):
+    if not created:
+        transaction.on_commit(lambda: invalidate_fares(instance.id))
+
+
+@receiver(post_save, sender=Route)
+@receiver(post_save, sender=Airplane)
+def invalidate_fares_on_route_or_airplane_save(
+    sender, instance, created, **kwargs
+):
+    if not created:
+        flight_ids = list(
+            Flight.objects.filter(
+                **{sender._meta.model_name: instance}
+            ).values_list("id", flat=True)
+        )
+        if flight_ids:
+            transaction.on_commit(lambda: invalidate_fares(*flight_ids))
+
+
+@receiver(post_save, sender=Ticket)
+def increase_tickets_sold(sender, instance, created, **kwargs):
+    # the cache receivers above read it too, so it is popped last
+    previous_flight_id = instance.__dict__.pop("_previous_flight_id", None)
+    if created:
+        Flight.update_tickets_sold(instance.flight_id, 1)
+    elif previous_flight_id not in (None, instance.flight_id):
+        Flight.update_tickets_sold(previous_flight_id, -1)
+        Flight.update_tickets_sold(instance.flight_id, 1)
+    else:
+        # taken places are part of the flight detail
+        Flight.touch([instance.flight_id])
+
+
+@receiver(post_delete, sender=Ticket)
+def decrease_tickets_sold(sender, instance, **kwargs):
+    Flight.update_tickets_sold(instance.flight_id, -1)
+
+
+@receiver(m2m_changed, sender=Flight.crew.through)
+def update_crew_count(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == "pre_clear" and reverse:
+        instance._cleared_flight_ids = list(
+            instance.flights.values_list("id", flat=True)
+        )
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    if not reverse:
+        flight_ids = [instance.id]
+    elif action == "post_clear":
+        flight_ids = instance.__dict__.pop("_cleared_flight_ids", [])
+    else:
+        flight_ids = pk_set
+    Flight.update_crew_count(flight_ids)
+
+
+@receiver(pre_delete, sender=Crew)
+def remember_crew_flights(sender, instance, **kwargs):
+    instance._deleted_flight_ids = list(
+        instance.flights.values_list("id", flat=True)
+    )
+
+
+@receiver(post_delete, sender=Crew)
+def update_crew_count_on_crew_delete(sender, instance, **kwargs):
+    Flight.update_crew_count(instance.__dict__.pop("_deleted_flight_ids", []))
+
+
+@receiver(post_save, sender=Flight)
+@receiver(post_delete, sender=Flight)
+def update_flight_graph(sender, instance, **kwargs):
+    transaction.on_commit(lambda: flight_graph.flights_changed([instance.id]))
+
+
+@receiver(post_save, sender=Route)
+def update_flight_graph_on_route_save(sender, instance, created, **kwargs):
+    if not created:
+        flight_ids = list(instance.flight.values_list("id", flat=True))
+        if flight_ids:
+            transaction.on_commit(
+                lambda: flight_graph.flights_changed(flight_ids)
+            )
+
+
+@receiver(pre_save, sender=Rating)
+def remember_previous_rating(sender, instance, **kwargs):
+    instance._previous_rating = (
+        Rating.objects.filter(pk=instance.pk)
+        .values_list("airplane_id", "star__value")
+        .first()
+        if instance.pk
+        else None
+    )
+
+
+@receiver(post_save, sender=Rating)
+def update_airplane_rating(sender, instance, **kwargs):
+    previous = instance.__dict__.pop("_previous_rating", None)
+    value = instance.star.value
+    if previous is None:
+        Airplane.update_rating(instance.airplane_id, value, 1)
+        return
+    previous_airplane_id, previous_value = previous
+    if previous_airplane_id == instance.airplane_id:
+        Airplane.update_rating(instance.airplane_id, value - previous_value, 0)
+    else:
+        Airplane.update_rating(previous_airplane_id, -previous_value, -1)
+        Airplane.update_rating(instance.airplane_id, value, 1)
+
+
+@receiver(post_delete, sender=Rating)
+def update_airplane_rating_on_delete(sender, instance, **kwargs):
+    Airplane.update_rating(instance.airplane_id, -instance.star.value, -1)
+
+
+RESPONSE_CACHED_MODELS = (Airplane, Airport, AirplaneType, Crew, Route)
+
+
+@receiver(post_save)
+@receiver(post_delete)
+def bump_cached_model_version(sender, **kwargs):
+    if sender in RESPONSE_CACHED_MODELS:
+        bump_model_version(sender)
+
+
+@receiver(post_save, sender=Rating)
+@receiver(post_delete, sender=Rating)
+def bump_airplane_version_on_rating(sender, **kwargs):
+    # ratings reach the airplane rows through update(), without signals
+    bump_model_version(Airplane)
+
+
+@receiver(m2m_changed)
+def bump_cached_model_version_on_m2m(instance, action, model, **kwargs):
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    for changed in {type(instance), model}:
+        if changed in RESPONSE_CACHED_MODELS:
+            bump_model_version(changed)
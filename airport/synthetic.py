@@ -0,0 +1,303 @@
+"""Deterministic synthetic data for scale testing.
+
+Rows are inserted with batched bulk_create, so model save(), full_clean
+and signals are skipped; the counters they maintain (tickets_sold,
+crew_count) are set while the rows are built and the caches fed by the
+signals are invalidated once at the end.
+"""
+import random
+from datetime import datetime, timedelta, timezone as dt_timezone
+from itertools import islice
+
+import numpy as np
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+
+from airport.geo import great_circle_distance
+from airport.itinerary import flight_graph
+from airport.models import (
+    Airport,
+    Route,
+    AirplaneType,
+    Airplane,
+    Crew,
+    Flight,
+    Order,
+    Ticket,
+)
+from airport.response_cache import bump_model_version
+from payments.models import UserPayment
+
+FIRST_NAMES = (
+    "Anna", "Bohdan", "Daria", "Emma", "Ivan", "James", "Maria", "Olena",
+    "Oliver", "Petro", "Sofia", "Taras",
+)
+LAST_NAMES = (
+    "Bondarenko", "Brown", "Kovalenko", "Melnyk", "Müller", "Shevchenko",
+    "Smith", "Tkachenko", "Wilson",
+)
+CRUISE_SPEED_KMH = 800
+
+
+def batched(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+class DataGenerator:
+    """Generates the same rows for the same seed and sizes.
+
+    Tickets are generated per flight: a share of its seats (up to
+    ``load_factor``) is sampled from the airplane's rows x seats_in_row,
+    so (flight, row, seat) stays unique, and the seats are split into
+    orders of 1 to ``max_tickets_per_order`` tickets of random users.
+    """
+
+    def __init__(
+        self,
+        seed=0,
+        batch_size=5000,
+        start=datetime(2024, 1, 1, tzinfo=dt_timezone.utc),
+        days=365,
+        load_factor=0.5,
+        crew_per_flight=3,
+        max_tickets_per_order=4,
+        password="password",
+        email_prefix="user",
+        log=None,
+    ):
+        self.random = random.Random(seed)
+        self.seed = seed
+        self.batch_size = batch_size
+        self.start = start
+        self.days = days
+        self.load_factor = load_factor
+        self.crew_per_flight = crew_per_flight
+        self.max_tickets_per_order = max_tickets_per_order
+        self.password = password
+        self.email_prefix = email_prefix
+        self.log = log or (lambda message: None)
+        self.counts = {}
+
+    def bulk_create(self, model, objects):
+        created = []
+        for batch in batched(objects, self.batch_size):
+            with transaction.atomic():
+                created += model.objects.bulk_create(batch)
+        self.counts[model._meta.verbose_name_plural] = (
+            self.counts.get(model._meta.verbose_name_plural, 0)
+            + len(created)
+        )
+        self.log(f"{len(created)} {model._meta.verbose_name_plural}")
+        return created
+
+    def airports(self, count):
+        return self.bulk_create(
+            Airport,
+            (
+                Airport(
+                    name=f"Airport {self.seed}-{index}",
+                    country=f"Country {index % 50}",
+                    city=f"City {self.seed}-{index}",
+                    closest_big_city=f"City {self.seed}-{index}",
+                    latitude=round(self.random.uniform(-60, 70), 6),
+                    longitude=round(self.random.uniform(-180, 180), 6),
+                )
+                for index in range(count)
+            ),
+        )
+
+    def routes(self, airports, count):
+        count = min(count, len(airports) * (len(airports) - 1))
+        pairs = set()
+        while len(pairs) < count:
+            source, destination = self.random.sample(airports, 2)
+            pairs.add((source, destination))
+        pairs = sorted(pairs, key=lambda pair: (pair[0].pk, pair[1].pk))
+        distances = np.rint(
+            great_circle_distance(
+                [source.latitude for source, _ in pairs],
+                [source.longitude for source, _ in pairs],
+                [destination.latitude for _, destination in pairs],
+                [destination.longitude for _, destination in pairs],
+            )
+        ).astype(np.int64)
+        return self.bulk_create(
+            Route,
+            (
+                Route(
+                    source=source,
+                    destination=destination,
+                    distance=max(int(distance), 1),
+                )
+                for (source, destination), distance in zip(pairs, distances)
+            ),
+        )
+
+    def airplanes(self, type_count, count):
+        airplane_types = self.bulk_create(
+            AirplaneType,
+            (
+                AirplaneType(name=f"Airplane type {self.seed}-{index}")
+                for index in range(type_count)
+            ),
+        )
+        return self.bulk_create(
+            Airplane,
+            (
+                Airplane(
+                    name=f"Airplane {self.seed}-{index}",
+                    rows=self.random.randint(10, 40),
+                    seats_in_row=self.random.randint(4, 10),
+                    airplane_type=self.random.choice(airplane_types),
+                )
+                for index in range(count)
+            ),
+        )
+
+    def crew(self, count):
+        positions = [position for position, _ in Crew.CrewPosition.choices]
+        return self.bulk_create(
+            Crew,
+            (
+                Crew(
+                    first_name=self.random.choice(FIRST_NAMES),
+                    last_name=self.random.choice(LAST_NAMES),
+                    crew_position=self.random.choice(positions),
+                )
+                for _ in range(count)
+            ),
+        )
+
+    def users(self, count):
+        # one hash for everybody, hashing each password takes ~0.2s
+        password = make_password(self.password)
+        users = self.bulk_create(
+            get_user_model(),
+            (
+                get_user_model()(
+                    email=(
+                        f"{self.email_prefix}{self.seed}-{index}"
+                        "@example.com"
+                    ),
+                    password=password,
+                    first_name=self.random.choice(FIRST_NAMES),
+                    last_name=self.random.choice(LAST_NAMES),
+                )
+                for index in range(count)
+            ),
+        )
+        # the post_save signal creates these for users saved one by one
+        self.bulk_create(
+            UserPayment, (UserPayment(app_user=user) for user in users)
+        )
+        return users
+
+    def flight(self, route, airplane, crew):
+        departure_time = self.start + timedelta(
+            minutes=5 * self.random.randrange(self.days * 24 * 12)
+        )
+        duration = timedelta(
+            minutes=30 + round(route.distance / CRUISE_SPEED_KMH * 60)
+        )
+        capacity = airplane.rows * airplane.seats_in_row
+        seats = self.random.sample(
+            range(capacity),
+            self.random.randint(0, int(capacity * self.load_factor)),
+        )
+        flight = Flight(
+            route=route,
+            airplane=airplane,
+            departure_time=departure_time,
+            arrival_time=departure_time + duration,
+            tickets_sold=len(seats),
+            crew_count=min(self.crew_per_flight, len(crew)),
+        )
+        crew_members = self.random.sample(crew, flight.crew_count)
+        return flight, crew_members, seats
+
+    def flights(self, count, routes, airplanes, crew, users):
+        """Flights with their crew, orders and tickets, one batch of
+        flights at a time"""
+        created = 0
+        for batch_start in range(0, count, self.batch_size):
+            size = min(self.batch_size, count - batch_start)
+            planned = [
+                self.flight(
+                    self.random.choice(routes),
+                    self.random.choice(airplanes),
+                    crew,
+                )
+                for _ in range(size)
+            ]
+            with transaction.atomic():
+                flights = Flight.objects.bulk_create(
+                    [flight for flight, _, _ in planned]
+                )
+                Flight.crew.through.objects.bulk_create(
+                    [
+                        Flight.crew.through(flight=flight, crew=member)
+                        for flight, members, _ in planned
+                        for member in members
+                    ],
+                    batch_size=self.batch_size,
+                )
+                self.orders(planned, users)
+            created += len(flights)
+            self.log(f"{created}/{count} flights")
+        self.counts["flights"] = self.counts.get("flights", 0) + created
+
+    def orders(self, planned, users):
+        orders, tickets = [], []
+        for flight, _, seats in planned:
+            seats_in_row = flight.airplane.seats_in_row
+            while seats:
+                size = self.random.randint(1, self.max_tickets_per_order)
+                order = Order(user=self.random.choice(users))
+                orders.append(order)
+                for place in seats[:size]:
+                    tickets.append(
+                        Ticket(
+                            flight=flight,
+                            order=order,
+                            row=place // seats_in_row + 1,
+                            seat=place % seats_in_row + 1,
+                        )
+                    )
+                seats = seats[size:]
+        Order.objects.bulk_create(orders, batch_size=self.batch_size)
+        Ticket.objects.bulk_create(tickets, batch_size=self.batch_size)
+        for name, rows in (("orders", orders), ("tickets", tickets)):
+            self.counts[name] = self.counts.get(name, 0) + len(rows)
+
+    def generate(
+        self,
+        airports=100,
+        routes=1000,
+        airplane_types=10,
+        airplanes=200,
+        crew=500,
+        users=1000,
+        flights=10000,
+    ):
+        airport_rows = self.airports(airports)
+        route_rows = self.routes(airport_rows, routes)
+        airplane_rows = self.airplanes(airplane_types, airplanes)
+        crew_rows = self.crew(crew)
+        user_rows = self.users(users)
+        if flights and not (route_rows and airplane_rows and user_rows):
+            raise ValueError(
+                "Flights need at least 2 airports, an airplane and a user"
+            )
+        self.flights(flights, route_rows, airplane_rows, crew_rows, user_rows)
+        self.invalidate_caches()
+        return self.counts
+
+    @staticmethod
+    def invalidate_caches():
+        """bulk_create sends no signals, drop what they would have"""
+        for model in (Airport, Route, AirplaneType, Airplane, Crew):
+            bump_model_version(model)
+        flight_graph.invalidate()
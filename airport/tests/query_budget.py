@@ -0,0 +1,24 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from main.metrics import view_label
+
+
+class QueryBudgetMixin:
+    """Asserts the number of SQL queries an endpoint may run.
+
+    Budgets should be checked with several rows per related table so
+    that an N+1 lookup goes over the budget.
+    """
+
+    def assertQueryBudget(self, budget, path, data=None, method="get"):
+        with CaptureQueriesContext(connection) as queries:
+            response = getattr(self.client, method)(path, data)
+        view = view_label(response.wsgi_request)
+        self.assertLessEqual(
+            len(queries),
+            budget,
+            f"{view} ran {len(queries)} queries, the budget is {budget}:\n"
+            + "\n".join(query["sql"] for query in queries),
+        )
+        return response
@@ -1,20 +1,26 @@
-from unittest import mock
-
+from io import StringIO
 from django.contrib.auth import get_user_model
-from django.db import models
+from django.core.management import call_command
 from django.test import TestCase
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APIClient
 
 
-from airport.models import Airplane, AirplaneType
+from airport.models import (
+    Airplane,
+    AirplaneType,
+    Rating,
+    RatingStarAirplane,
+)
 from airport.serializers import (
     AirplaneListSerializer,
     AirplaneDetailSerializer,
 )
 
 AIRPLANE_URL = reverse("airport:airplane-list")
+RATING_URL = reverse("airport:rating-list")
+RATED_URL = reverse("airport:airplane-rated")
 
 
 def detail_url(airplane_id: int):
@@ -52,25 +58,12 @@ class AuthenticatedAirplaneApiTest(TestCase):
         )
         self.client.force_authenticate(self.user)
 
-    @mock.patch("airport.service.get_client_ip")
-    def test_list_airplane(self, mock_get_client_ip):
-        mock_get_client_ip.return_value = "127.1.1.1."
+    def test_list_airplane(self):
         sample_airplane()
         res = self.client.get(
             AIRPLANE_URL,
         )
-        airplanes = (
-            Airplane.objects.all()
-            .annotate(
-                rating_user=models.Count(
-                    "ratings", filter=models.Q(ratings__ip=mock_get_client_ip())
-                )
-            )
-            .annotate(
-                middle_star=models.Sum(models.F("ratings__star"))
-                / models.Count(models.F("ratings"))
-            )
-        )
+        airplanes = Airplane.objects.all()
         serializer = AirplaneListSerializer(airplanes, many=True)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
         self.assertEqual(res.data, serializer.data)
@@ -141,3 +134,101 @@ class AdminAirplaneApiTest(TestCase):
         url = detail_url(airplane.id)
         res = self.client.delete(url)
         self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+
+
+class AirplaneRatingTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "admin@admin.com",
+            "admin12345",
+        )
+        self.client.force_authenticate(self.user)
+        self.airplane = sample_airplane()
+        self.stars = {
+            value: RatingStarAirplane.objects.create(value=value)
+            for value in range(1, 6)
+        }
+
+    def rate(self, value, ip="127.0.0.1"):
+        return self.client.post(
+            RATING_URL,
+            {"star": self.stars[value].id, "airplane": self.airplane.id},
+            REMOTE_ADDR=ip,
+        )
+
+    def test_rating_updates_aggregates(self):
+        self.rate(5)
+        self.rate(2, ip="127.0.0.2")
+
+        self.airplane.refresh_from_db()
+        self.assertEqual(self.airplane.rating_sum, 7)
+        self.assertEqual(self.airplane.rating_count, 2)
+        self.assertEqual(self.airplane.rating_average, 3.5)
+
+        res = self.client.get(AIRPLANE_URL)
+        self.assertEqual(res.data[0]["middle_star"], 3)
+
+    def test_rated_airplanes_of_client(self):
+        other = sample_airplane(name="Other airplane")
+        self.rate(5)
+
+        res = self.client.get(RATED_URL)
+        self.assertEqual(res.data, {"airplanes": [self.airplane.id]})
+
+        res = self.client.get(RATED_URL, REMOTE_ADDR="127.0.0.2")
+        self.assertEqual(res.data, {"airplanes": []})
+
+        res = self.client.get(RATED_URL, {"ids": f"{other.id}"})
+        self.assertEqual(res.data, {"airplanes": []})
+
+    def test_rated_airplane_is_listed_once(self):
+        self.rate(5)
+        rating = Rating.objects.get()
+        Rating.objects.create(
+            ip=rating.ip, star=rating.star, airplane=self.airplane
+        )
+
+        res = self.client.get(RATED_URL)
+        self.assertEqual(res.data, {"airplanes": [self.airplane.id]})
+
+    def test_list_is_the_same_for_every_client(self):
+        self.rate(5)
+
+        res = self.client.get(AIRPLANE_URL)
+        other = self.client.get(AIRPLANE_URL, REMOTE_ADDR="127.0.0.2")
+
+        self.assertEqual(res.data, other.data)
+        self.assertEqual(res["ETag"], other["ETag"])
+
+    def test_rating_again_changes_star(self):
+        res = self.rate(1)
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.rate(4)
+
+        self.assertEqual(Rating.objects.count(), 1)
+        self.airplane.refresh_from_db()
+        self.assertEqual(self.airplane.rating_sum, 4)
+        self.assertEqual(self.airplane.rating_count, 1)
+
+    def test_deleting_rating_updates_aggregates(self):
+        self.rate(3)
+
+        Rating.objects.get().delete()
+
+        self.airplane.refresh_from_db()
+        self.assertEqual(self.airplane.rating_count, 0)
+        self.assertIsNone(self.airplane.rating_average)
+
+    def test_rebuild_airplane_ratings(self):
+        self.rate(3)
+        Airplane.objects.update(rating_sum=0, rating_count=0)
+        out = StringIO()
+
+        call_command("rebuild_airplane_ratings", stdout=out)
+
+        self.airplane.refresh_from_db()
+        self.assertEqual(self.airplane.rating_sum, 3)
+        self.assertEqual(self.airplane.rating_count, 1)
+        self.assertEqual(self.airplane.rating_average, 3)
+        self.assertIn("Rebuilt rating of 1 airplane(s)", out.getvalue())
@@ -0,0 +1,193 @@
+from datetime import datetime, timedelta
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from airport.async_views import database_slot
+from airport.models import (
+    Airport,
+    Route,
+    AirplaneType,
+    Airplane,
+    Crew,
+    Flight,
+    Order,
+    Ticket,
+)
+from main.metrics import registry
+
+
+class AsyncReadViewTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(
+            "admin@admin.com",
+            "admin12345",
+        )
+        kyiv = Airport.objects.create(
+            name="Boryspil", country="Ukraine", city="Kiev"
+        )
+        london = Airport.objects.create(
+            name="Heathrow", country="UK", city="London"
+        )
+        route = Route.objects.create(
+            source=kyiv, destination=london, distance=2100
+        )
+        Route.objects.create(source=london, destination=kyiv, distance=2100)
+        airplane = Airplane.objects.create(
+            name="Boeing",
+            rows=10,
+            seats_in_row=4,
+            airplane_type=AirplaneType.objects.create(name="Jet"),
+        )
+        crew = Crew.objects.create(first_name="Anna", last_name="Melnyk")
+        departure = timezone.make_aware(datetime(2030, 1, 1, 10))
+        cls.flights = []
+        for hours in range(3):
+            flight = Flight.objects.create(
+                route=route,
+                airplane=airplane,
+                departure_time=departure + timedelta(hours=hours),
+                arrival_time=departure + timedelta(hours=hours + 3),
+            )
+            flight.crew.add(crew)
+            cls.flights.append(flight)
+        order = Order.objects.create(user=cls.user)
+        Ticket.objects.create(
+            flight=cls.flights[0], order=order, row=2, seat=3
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.headers = {
+            "authorization": f"Bearer {AccessToken.for_user(self.user)}"
+        }
+        self.api_client = APIClient()
+        self.api_client.force_authenticate(self.user)
+
+    async def test_lists_match_the_sync_endpoints(self):
+        for name in ("airport", "route"):
+            with self.subTest(endpoint=name):
+                res = await self.async_client.get(
+                    reverse(f"airport:async-{name}-list"),
+                    headers=self.headers,
+                )
+                sync_res = await self.sync_get(
+                    reverse(f"airport:{name}-list")
+                )
+
+                self.assertEqual(res.status_code, status.HTTP_200_OK)
+                self.assertEqual(res.json(), sync_res.json())
+
+    async def test_flight_list_is_paginated_like_the_sync_endpoint(self):
+        url = reverse("airport:async-flight-list")
+        res = await self.async_client.get(
+            url, {"page_size": 2}, headers=self.headers
+        )
+        sync_res = await self.sync_get(
+            reverse("airport:flight-list"), {"page_size": 2}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.json()["results"], sync_res.json()["results"])
+        self.assertIsNotNone(res.json()["next"])
+        self.assertTrue(res.json()["next"].split("?")[0].endswith(url))
+
+        next_page = await self.async_client.get(
+            res.json()["next"], headers=self.headers
+        )
+        self.assertEqual(
+            [flight["id"] for flight in next_page.json()["results"]],
+            [self.flights[0].id],
+        )
+
+    async def test_flight_list_is_filtered(self):
+        res = await self.async_client.get(
+            reverse("airport:async-flight-list"),
+            {"departure_time_after": "2030-01-01T11:00:00"},
+            headers=self.headers,
+        )
+
+        self.assertEqual(len(res.json()["results"]), 2)
+
+    async def test_invalid_filter(self):
+        res = await self.async_client.get(
+            reverse("airport:async-flight-list"),
+            {"departure_time_after": "tomorrow"},
+            headers=self.headers,
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("departure_time", res.json())
+
+    async def test_flight_detail_matches_the_sync_endpoint(self):
+        flight = self.flights[0]
+        res = await self.async_client.get(
+            reverse("airport:async-flight-detail", args=[flight.id]),
+            headers=self.headers,
+        )
+        sync_res = await self.sync_get(
+            reverse("airport:flight-detail", args=[flight.id])
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.json(), sync_res.json())
+        self.assertEqual(res.json()["taken_places"], [{"row": 2, "seat": 3}])
+
+    async def test_missing_flight(self):
+        res = await self.async_client.get(
+            reverse("airport:async-flight-detail", args=[0]),
+            headers=self.headers,
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    async def test_auth_required(self):
+        res = await self.async_client.get(reverse("airport:async-route-list"))
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertIn("Bearer", res["WWW-Authenticate"])
+
+        res = await self.async_client.get(
+            reverse("airport:async-route-list"),
+            headers={"authorization": "Bearer broken"},
+        )
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    @override_settings(ASYNC_DB_CONCURRENCY=1, ASYNC_DB_QUEUE_TIMEOUT=0.01)
+    async def test_busy_database_is_answered_with_503(self):
+        async with database_slot():
+            res = await self.async_client.get(
+                reverse("airport:async-airport-list"), headers=self.headers
+            )
+
+        self.assertEqual(res.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertEqual(res["Retry-After"], "1")
+
+        res = await self.async_client.get(
+            reverse("airport:async-airport-list"), headers=self.headers
+        )
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    async def test_queries_are_recorded_in_metrics(self):
+        registry.reset()
+
+        await self.async_client.get(
+            reverse("airport:async-route-list"), headers=self.headers
+        )
+
+        text = registry.render()
+        self.assertIn(
+            'db_queries_per_request_sum{view="airport:async-route-list"} 1',
+            text,
+        )
+
+    async def sync_get(self, url, data=None):
+        return await sync_to_async(self.api_client.get)(url, data)
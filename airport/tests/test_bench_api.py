@@ -0,0 +1,73 @@
+import json
+import tempfile
+from io import StringIO
+from pathlib import Path
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+
+from airport.models import Flight
+from airport.urls import router
+
+
+class BenchApiCommandTests(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = Path(directory.name)
+
+    def bench(self, **options):
+        output = self.directory / "bench.json"
+        call_command(
+            "bench_api",
+            airports=3,
+            flights=5,
+            orders=3,
+            iterations=2,
+            output=str(output),
+            stderr=StringIO(),
+            **options,
+        )
+        return json.loads(output.read_text())
+
+    def test_every_router_endpoint_is_measured(self):
+        endpoints = self.bench()["endpoints"]
+
+        for _, _, basename in router.registry:
+            self.assertIn(f"GET airport:{basename}-list", endpoints)
+        self.assertIn("GET airport:flight-seatmap", endpoints)
+        self.assertIn("POST user:token-obtain-pair", endpoints)
+        for key, result in endpoints.items():
+            with self.subTest(endpoint=key):
+                self.assertEqual(result["status"], 200)
+                self.assertLessEqual(result["p50_ms"], result["p99_ms"])
+                self.assertGreater(result["bytes"], 0)
+
+    def test_dataset_is_rolled_back(self):
+        self.bench()
+
+        self.assertFalse(Flight.objects.exists())
+
+    def test_regression_over_baseline_fails(self):
+        baseline = self.directory / "baseline.json"
+        self.bench(baseline=str(baseline), save_baseline=True)
+        report = json.loads(baseline.read_text())
+        for result in report["endpoints"].values():
+            result["p95_ms"] = 0.0001
+        report["endpoints"]["GET airport:flight-list"]["queries"] = 0
+        baseline.write_text(json.dumps(report))
+
+        with self.assertRaisesMessage(CommandError, "regression(s)"):
+            self.bench(baseline=str(baseline))
+
+    def test_results_within_threshold_pass(self):
+        baseline = self.directory / "baseline.json"
+        self.bench(baseline=str(baseline), save_baseline=True)
+        report = json.loads(baseline.read_text())
+        for result in report["endpoints"].values():
+            result["p95_ms"] = 10**6
+            result["queries"] = 10**6
+        baseline.write_text(json.dumps(report))
+
+        self.bench(baseline=str(baseline))
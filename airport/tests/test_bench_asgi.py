@@ -0,0 +1,62 @@
+import json
+import tempfile
+from io import StringIO
+from pathlib import Path
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TransactionTestCase
+
+from airport.synthetic import DataGenerator
+
+
+class BenchAsgiCommandTests(TransactionTestCase):
+    def bench(self):
+        with tempfile.TemporaryDirectory() as directory:
+            output = Path(directory) / "bench.json"
+            call_command(
+                "bench_asgi",
+                clients=8,
+                requests=16,
+                workers=2,
+                db_latency=1,
+                output=str(output),
+                stderr=StringIO(),
+            )
+            return json.loads(output.read_text())
+
+    def test_both_servers_are_measured(self):
+        DataGenerator().generate(
+            airports=3,
+            routes=6,
+            airplane_types=1,
+            airplanes=2,
+            crew=3,
+            users=2,
+            flights=5,
+        )
+
+        report = self.bench()
+
+        self.assertEqual(
+            set(report["endpoints"]),
+            {"airport-list", "route-list", "flight-list", "flight-detail"},
+        )
+        for name, servers in report["endpoints"].items():
+            for server in ("wsgi", "asgi"):
+                with self.subTest(endpoint=name, server=server):
+                    result = servers[server]
+                    self.assertEqual(result["errors"], 0)
+                    self.assertGreater(result["requests_per_second"], 0)
+                    self.assertGreater(result["peak_queries"], 0)
+            self.assertLessEqual(
+                servers["wsgi"]["peak_queries"], report["workers"]
+            )
+            self.assertLessEqual(
+                servers["asgi"]["peak_queries"],
+                report["async_db_concurrency"],
+            )
+
+    def test_data_is_required(self):
+        with self.assertRaisesMessage(CommandError, "generate_data"):
+            self.bench()
@@ -0,0 +1,200 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.http import http_date
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from airport.models import (
+    Airport,
+    Route,
+    AirplaneType,
+    Airplane,
+    Crew,
+    Flight,
+    Order,
+    Ticket,
+)
+
+AIRPORT_URL = reverse("airport:airport-list")
+FLIGHT_URL = reverse("airport:flight-list")
+
+
+def flight_url(flight_id: int):
+    return reverse("airport:flight-detail", args=[flight_id])
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "admin@admin.com",
+            "admin12345",
+        )
+        self.client.force_authenticate(self.user)
+        self.source = Airport.objects.create(
+            name="Boryspil", country="Ukraine", city="Kiev"
+        )
+        self.destination = Airport.objects.create(
+            name="Heathrow", country="United Kingdom", city="London"
+        )
+        self.route = Route.objects.create(
+            source=self.source, destination=self.destination, distance=2185
+        )
+        self.airplane = Airplane.objects.create(
+            name="Airbus A320",
+            rows=30,
+            seats_in_row=6,
+            airplane_type=AirplaneType.objects.create(name="Airbus"),
+        )
+        self.flight = Flight.objects.create(
+            route=self.route,
+            airplane=self.airplane,
+            departure_time="2023-09-05 10:00+03:00",
+            arrival_time="2023-09-05 13:00+03:00",
+        )
+
+    def revalidate(self, url, res, **headers):
+        return self.client.get(url, HTTP_IF_NONE_MATCH=res["ETag"], **headers)
+
+    def test_list_has_validators(self):
+        res = self.client.get(FLIGHT_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertRegex(res["ETag"], r'^"[0-9a-f]{32}"$')
+        self.assertEqual(
+            res["Last-Modified"],
+            http_date(self.flight.updated_at.timestamp()),
+        )
+
+    def test_unchanged_list_is_not_modified(self):
+        res = self.client.get(FLIGHT_URL)
+
+        with CaptureQueriesContext(connection) as queries:
+            revalidated = self.revalidate(FLIGHT_URL, res)
+
+        self.assertEqual(revalidated.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(revalidated.content, b"")
+        self.assertEqual(revalidated["ETag"], res["ETag"])
+        self.assertEqual(len(queries), 1)
+
+    def test_list_probe_reads_only_the_page(self):
+        res = self.client.get(FLIGHT_URL)
+
+        with CaptureQueriesContext(connection) as queries:
+            self.revalidate(FLIGHT_URL, res)
+
+        self.assertNotIn("COUNT(", queries[0]["sql"])
+        self.assertIn("LIMIT", queries[0]["sql"])
+
+    def test_change_on_another_page_keeps_the_etag(self):
+        for hour in range(20):
+            Flight.objects.create(
+                route=self.route,
+                airplane=self.airplane,
+                departure_time=timezone.now() + timedelta(hours=hour + 1),
+                arrival_time=timezone.now() + timedelta(hours=hour + 4),
+            )
+        res = self.client.get(FLIGHT_URL)
+        Flight.touch([self.flight.id])
+
+        revalidated = self.revalidate(FLIGHT_URL, res)
+
+        self.assertEqual(revalidated.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.flight.delete()
+        revalidated = self.revalidate(FLIGHT_URL, res)
+        self.assertEqual(revalidated.status_code, status.HTTP_200_OK)
+
+    def test_etag_depends_on_query_params(self):
+        res = self.client.get(FLIGHT_URL)
+        filtered = self.client.get(FLIGHT_URL, {"route": self.route.id})
+
+        self.assertNotEqual(res["ETag"], filtered["ETag"])
+
+    def test_sold_ticket_changes_flight_etag(self):
+        res = self.client.get(flight_url(self.flight.id))
+        Ticket.objects.create(
+            flight=self.flight,
+            order=Order.objects.create(user=self.user),
+            row=1,
+            seat=1,
+        )
+
+        revalidated = self.revalidate(flight_url(self.flight.id), res)
+
+        self.assertEqual(revalidated.status_code, status.HTTP_200_OK)
+        self.assertEqual(revalidated.data["taken_places"][0]["seat"], 1)
+
+    def test_related_change_changes_etag(self):
+        res = self.client.get(FLIGHT_URL)
+        self.destination.name = "Gatwick"
+        self.destination.save()
+
+        revalidated = self.revalidate(FLIGHT_URL, res)
+
+        self.assertEqual(revalidated.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            revalidated.data["results"][0]["route"], "Boryspil - Gatwick"
+        )
+
+    def test_crew_change_changes_etag(self):
+        res = self.client.get(flight_url(self.flight.id))
+        self.flight.crew.add(Crew.objects.create(first_name="J", last_name="D"))
+
+        revalidated = self.revalidate(flight_url(self.flight.id), res)
+
+        self.assertEqual(revalidated.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(revalidated.data["crew"]), 1)
+
+    def test_deleted_row_changes_list_etag(self):
+        other = Airport.objects.create(name="Orly", country="F", city="P")
+        res = self.client.get(AIRPORT_URL)
+        other.delete()
+
+        revalidated = self.revalidate(AIRPORT_URL, res)
+
+        self.assertEqual(revalidated.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(revalidated.data), 2)
+
+    def test_cached_response_is_revalidated_without_queries(self):
+        res = self.client.get(AIRPORT_URL)
+
+        with CaptureQueriesContext(connection) as queries:
+            revalidated = self.revalidate(AIRPORT_URL, res)
+
+        self.assertEqual(revalidated.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(len(queries), 0)
+
+    def test_detail_if_modified_since(self):
+        url = flight_url(self.flight.id)
+        later = http_date((timezone.now() + timedelta(minutes=1)).timestamp())
+        earlier = http_date(
+            (self.flight.updated_at - timedelta(minutes=1)).timestamp()
+        )
+
+        res = self.client.get(url, HTTP_IF_MODIFIED_SINCE=later)
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        res = self.client.get(url, HTTP_IF_MODIFIED_SINCE=earlier)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_list_ignores_if_modified_since(self):
+        later = http_date((timezone.now() + timedelta(minutes=1)).timestamp())
+
+        res = self.client.get(FLIGHT_URL, HTTP_IF_MODIFIED_SINCE=later)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_missing_detail_is_not_found(self):
+        res = self.client.get(
+            flight_url(self.flight.id + 1), HTTP_IF_NONE_MATCH="*"
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
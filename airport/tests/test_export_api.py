@@ -0,0 +1,172 @@
+import csv
+import json
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from airport.models import (
+    Airport,
+    Route,
+    AirplaneType,
+    Airplane,
+    Flight,
+    Order,
+    Ticket,
+)
+
+FLIGHT_EXPORT_URL = reverse("airport:flight-export")
+ORDER_EXPORT_URL = reverse("airport:order-export")
+
+
+def content(response):
+    return b"".join(response.streaming_content).decode()
+
+
+def csv_rows(response):
+    return list(csv.DictReader(StringIO(content(response))))
+
+
+class ExportApiTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "user@user.com",
+            "user123456",
+        )
+        self.other_user = get_user_model().objects.create_user(
+            "other@user.com",
+            "other123456",
+        )
+        self.client.force_authenticate(self.user)
+
+        source = Airport.objects.create(
+            name="Boryspil", country="Ukraine", city="Kiev"
+        )
+        destination = Airport.objects.create(
+            name="Heathrow", country="United Kingdom", city="London"
+        )
+        route = Route.objects.create(
+            source=source, destination=destination, distance=2185
+        )
+        airplane = Airplane.objects.create(
+            name="Airbus A320",
+            rows=30,
+            seats_in_row=6,
+            airplane_type=AirplaneType.objects.create(name="Airbus"),
+        )
+        self.flights = [
+            Flight.objects.create(
+                route=route,
+                airplane=airplane,
+                departure_time=f"2023-09-0{day} 10:00+03:00",
+                arrival_time=f"2023-09-0{day} 13:00+03:00",
+            )
+            for day in (5, 6)
+        ]
+        self.order = Order.objects.create(user=self.user)
+        Ticket.objects.create(
+            flight=self.flights[0], order=self.order, row=1, seat=2
+        )
+        Ticket.objects.create(
+            flight=self.flights[1], order=self.order, row=3, seat=4
+        )
+        Ticket.objects.create(
+            flight=self.flights[1],
+            order=Order.objects.create(user=self.other_user),
+            row=5,
+            seat=6,
+        )
+
+    def test_export_requires_auth(self):
+        res = APIClient().get(FLIGHT_EXPORT_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_export_flights_csv(self):
+        res = self.client.get(FLIGHT_EXPORT_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res.streaming)
+        self.assertEqual(res["Content-Type"], "text/csv; charset=utf-8")
+        rows = csv_rows(res)
+        self.assertEqual(
+            [int(row["id"]) for row in rows],
+            [self.flights[1].id, self.flights[0].id],
+        )
+        self.assertEqual(rows[0]["source"], "Boryspil")
+        self.assertEqual(rows[0]["tickets_sold"], "2")
+        self.assertEqual(rows[0]["departure_time"], "2023-09-06T07:00:00+00:00")
+
+    def test_export_flights_ndjson(self):
+        res = self.client.get(
+            FLIGHT_EXPORT_URL, HTTP_ACCEPT="application/x-ndjson"
+        )
+
+        self.assertEqual(res["Content-Type"], "application/x-ndjson; charset=utf-8")
+        lines = [json.loads(line) for line in content(res).splitlines()]
+        self.assertEqual(len(lines), 2)
+        self.assertEqual(lines[1]["id"], self.flights[0].id)
+        self.assertEqual(lines[1]["destination"], "Heathrow")
+
+    def test_export_flights_honours_filters(self):
+        res = self.client.get(
+            FLIGHT_EXPORT_URL,
+            {"format": "ndjson", "departure_time_after": "2023-09-06"},
+        )
+
+        lines = content(res).splitlines()
+        self.assertEqual(len(lines), 1)
+        self.assertEqual(json.loads(lines[0])["id"], self.flights[1].id)
+
+    def test_export_own_order_tickets(self):
+        res = self.client.get(ORDER_EXPORT_URL)
+
+        rows = csv_rows(res)
+        self.assertEqual(
+            [(row["order"], row["row"], row["seat"]) for row in rows],
+            [(str(self.order.id), "1", "2"), (str(self.order.id), "3", "4")],
+        )
+
+
+class AdminManifestExportTests(TestCase):
+    def setUp(self):
+        self.admin = get_user_model().objects.create_superuser(
+            "admin@admin.com", "admin12345"
+        )
+        self.client.force_login(self.admin)
+        route = Route.objects.create(
+            source=Airport.objects.create(name="A", country="C", city="A"),
+            destination=Airport.objects.create(name="B", country="C", city="B"),
+            distance=100,
+        )
+        self.flight = Flight.objects.create(
+            route=route,
+            airplane=Airplane.objects.create(
+                name="Plane",
+                rows=10,
+                seats_in_row=4,
+                airplane_type=AirplaneType.objects.create(name="Type"),
+            ),
+            departure_time="2023-09-05 10:00+03:00",
+            arrival_time="2023-09-05 11:00+03:00",
+        )
+        order = Order.objects.create(user=self.admin)
+        for seat in (2, 1):
+            Ticket.objects.create(
+                flight=self.flight, order=order, row=1, seat=seat
+            )
+
+    def test_export_manifest(self):
+        res = self.client.post(
+            reverse("admin:airport_flight_changelist"),
+            {"action": "export_manifest", "_selected_action": [self.flight.id]},
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        rows = csv_rows(res)
+        self.assertEqual([row["seat"] for row in rows], ["1", "2"])
+        self.assertEqual(rows[0]["email"], "admin@admin.com")
@@ -1,6 +1,8 @@
 from datetime import datetime
+from io import StringIO
 
 from django.contrib.auth import get_user_model
+from django.core.management import call_command
 from django.urls import reverse
 from django.test import TestCase
 from django.utils import timezone
@@ -14,8 +16,12 @@ from airport.models import (
     Airplane,
     Crew,
     Flight,
+    Order,
+    Ticket,
 )
 
+from airport.pricing import get_cached_fares, load_fares
+from airport.seat_map import get_cached_seat_map, load_seat_map
 from airport.serializers import (
     FlightListSerializer,
     FlightDetailSerializer
@@ -117,21 +123,48 @@ class AuthenticatedFlightApiTests(TestCase):
         for i in range(2):
             self.assertEqual(
                 serializer.data[i]["route"],
-                request.data[i]["route"]
+                request.data["results"][i]["route"]
             ),
             self.assertEqual(
                 serializer.data[i]["airplane"],
-                request.data[i]["airplane"]
+                request.data["results"][i]["airplane"]
             ),
             self.assertEqual(
                 serializer.data[i]["departure_time"],
-                request.data[i]["departure_time"]
+                request.data["results"][i]["departure_time"]
             ),
             self.assertEqual(
                 serializer.data[i]["arrival_time"],
-                request.data[i]["arrival_time"]
+                request.data["results"][i]["arrival_time"]
             ),
 
+    def test_flight_list_cursor_pagination(self):
+        third = Flight.objects.create(
+            route=self.route,
+            airplane=self.airplane,
+            departure_time="2023-09-07 18:00+03:00",
+            arrival_time="2023-09-08 20:00+03:00",
+        )
+        ids = [third.id] + list(
+            Flight.objects.filter(
+                departure_time__lt=third.departure_time
+            ).order_by("-id").values_list("id", flat=True)
+        )
+
+        first_page = self.client.get(FLIGHT_URL, {"page_size": 2})
+        second_page = self.client.get(first_page.data["next"])
+
+        self.assertNotIn("count", first_page.data)
+        self.assertEqual(
+            [flight["id"] for flight in first_page.data["results"]],
+            ids[:2],
+        )
+        self.assertEqual(
+            [flight["id"] for flight in second_page.data["results"]],
+            ids[2:],
+        )
+        self.assertIsNone(second_page.data["next"])
+
     def test_retrieve_flight_detail(self):
         flights = Flight.objects.all()
 
@@ -270,3 +303,134 @@ class AdminFlightApiTests(TestCase):
             request.status_code,
             status.HTTP_204_NO_CONTENT
         )
+
+
+class FlightCountersTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "admin@admin.com",
+            "admin123456",
+        )
+        self.client.force_authenticate(self.user)
+
+        airports = [
+            Airport.objects.create(name=name, country="Country", city=name)
+            for name in ("Kiev", "Lviv")
+        ]
+        route = Route.objects.create(
+            source=airports[0], destination=airports[1], distance=500
+        )
+        airplane = Airplane.objects.create(
+            name="Small airplane",
+            rows=1,
+            seats_in_row=2,
+            airplane_type=AirplaneType.objects.create(name="Cessna"),
+        )
+        self.flight = Flight.objects.create(
+            route=route,
+            airplane=airplane,
+            departure_time="2023-09-05 18:00+03:00",
+            arrival_time="2023-09-05 20:00+03:00",
+        )
+        self.crew = [
+            Crew.objects.create(first_name=f"Name {letter}", last_name="Last")
+            for letter in "abc"
+        ]
+        self.order = Order.objects.create(user=self.user)
+
+    def test_ticket_changes_update_tickets_sold(self):
+        ticket = Ticket.objects.create(
+            flight=self.flight, order=self.order, row=1, seat=1
+        )
+        self.flight.refresh_from_db()
+        self.assertEqual(self.flight.tickets_sold, 1)
+        self.assertEqual(self.flight.tickets_available, 1)
+
+        ticket.delete()
+        self.flight.refresh_from_db()
+        self.assertEqual(self.flight.tickets_sold, 0)
+
+    def test_moving_a_ticket_updates_both_flights(self):
+        other = Flight.objects.create(
+            route=self.flight.route,
+            airplane=self.flight.airplane,
+            departure_time="2023-09-06 18:00+03:00",
+            arrival_time="2023-09-06 20:00+03:00",
+        )
+        ticket = Ticket.objects.create(
+            flight=self.flight, order=self.order, row=1, seat=1
+        )
+        for flight in (self.flight, other):
+            load_seat_map(flight)
+            load_fares(flight)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            ticket.flight = other
+            ticket.save()
+
+        self.flight.refresh_from_db()
+        other.refresh_from_db()
+        self.assertEqual(self.flight.tickets_sold, 0)
+        self.assertEqual(other.tickets_sold, 1)
+        for flight in (self.flight, other):
+            self.assertIsNone(get_cached_seat_map(flight.id))
+            self.assertIsNone(get_cached_fares(flight.id))
+
+    def test_order_updates_tickets_sold(self):
+        payload = {
+            "tickets": [
+                {"flight": self.flight.id, "row": 1, "seat": seat}
+                for seat in (1, 2)
+            ]
+        }
+
+        self.client.post(reverse("airport:order-list"), payload, format="json")
+
+        self.flight.refresh_from_db()
+        self.assertEqual(self.flight.tickets_sold, 2)
+
+    def test_crew_changes_update_crew_count(self):
+        self.flight.crew.add(*self.crew)
+        self.flight.refresh_from_db()
+        self.assertEqual(self.flight.crew_count, 3)
+
+        self.flight.crew.remove(self.crew[0])
+        self.crew[1].flights.clear()
+        self.flight.refresh_from_db()
+        self.assertEqual(self.flight.crew_count, 1)
+
+        self.crew[2].delete()
+        self.flight.refresh_from_db()
+        self.assertEqual(self.flight.crew_count, 0)
+
+    def test_filter_available_flights(self):
+        Ticket.objects.create(
+            flight=self.flight, order=self.order, row=1, seat=1
+        )
+        res = self.client.get(FLIGHT_URL, {"available": "true"})
+        self.assertEqual(len(res.data["results"]), 1)
+        self.assertEqual(res.data["results"][0]["tickets_available"], 1)
+
+        Ticket.objects.create(
+            flight=self.flight, order=self.order, row=1, seat=2
+        )
+        res = self.client.get(FLIGHT_URL, {"available": "true"})
+        self.assertEqual(len(res.data["results"]), 0)
+        res = self.client.get(FLIGHT_URL, {"available": "false"})
+        self.assertEqual(len(res.data["results"]), 1)
+
+    def test_reconcile_flight_counters(self):
+        self.flight.crew.add(*self.crew)
+        Ticket.objects.create(
+            flight=self.flight, order=self.order, row=1, seat=1
+        )
+        Flight.objects.update(tickets_sold=10, crew_count=0)
+        out = StringIO()
+
+        call_command("reconcile_flight_counters", stdout=out)
+
+        self.flight.refresh_from_db()
+        self.assertEqual(self.flight.tickets_sold, 1)
+        self.assertEqual(self.flight.crew_count, 3)
+        self.assertIn("Reconciled 1 flight(s)", out.getvalue())
@@ -0,0 +1,133 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db.models import Count, F
+from django.test import TestCase
+
+from airport.models import Airport, Route, Flight, Ticket
+from payments.models import UserPayment
+
+SIZES = {
+    "airports": 6,
+    "routes": 12,
+    "airplane_types": 2,
+    "airplanes": 4,
+    "crew": 8,
+    "users": 5,
+    "flights": 30,
+}
+
+
+def generate(**options):
+    call_command(
+        "generate_data",
+        batch_size=7,
+        stdout=StringIO(),
+        **{**SIZES, **options},
+    )
+
+
+def snapshot():
+    return (
+        list(
+            Airport.objects.order_by("pk").values_list(
+                "name", "latitude", "longitude"
+            )
+        ),
+        list(
+            Route.objects.order_by("pk").values_list(
+                "source__name", "destination__name", "distance"
+            )
+        ),
+        list(
+            Flight.objects.order_by("pk").values_list(
+                "route__source__name",
+                "airplane__name",
+                "departure_time",
+                "arrival_time",
+                "tickets_sold",
+            )
+        ),
+        list(
+            Ticket.objects.order_by("pk").values_list(
+                "flight__departure_time", "row", "seat", "order__user__email"
+            )
+        ),
+    )
+
+
+class GenerateDataTests(TestCase):
+    def test_sizes(self):
+        generate()
+
+        self.assertEqual(Airport.objects.count(), 6)
+        self.assertEqual(Route.objects.count(), 12)
+        self.assertEqual(Flight.objects.count(), 30)
+        self.assertEqual(UserPayment.objects.count(), 5)
+        self.assertTrue(Ticket.objects.exists())
+        self.assertFalse(
+            Route.objects.filter(source=F("destination")).exists()
+        )
+
+    def test_same_seed_generates_same_data(self):
+        generate(seed=1)
+        first = snapshot()
+        get_user_model().objects.all().delete()
+        Airport.objects.all().delete()
+
+        generate(seed=1)
+        self.assertEqual(first, snapshot())
+
+        get_user_model().objects.all().delete()
+        Airport.objects.all().delete()
+        generate(seed=3)
+        self.assertNotEqual(first, snapshot())
+
+    def test_seats_are_unique_and_within_the_airplane(self):
+        generate(load_factor=1)
+
+        self.assertFalse(
+            Ticket.objects.filter(
+                row__gt=F("flight__airplane__rows")
+            ).exists()
+        )
+        self.assertFalse(
+            Ticket.objects.filter(
+                seat__gt=F("flight__airplane__seats_in_row")
+            ).exists()
+        )
+        self.assertFalse(
+            Ticket.objects.filter(row__lt=1).exists()
+            or Ticket.objects.filter(seat__lt=1).exists()
+        )
+        self.assertFalse(
+            Ticket.objects.values("flight", "row", "seat")
+            .annotate(count=Count("pk"))
+            .filter(count__gt=1)
+            .exists()
+        )
+
+    def test_counters_match_tickets_and_crew(self):
+        generate(crew_per_flight=3)
+
+        flights = Flight.objects.annotate(
+            actual_tickets=Flight.tickets_sold_subquery(),
+            actual_crew=Flight.crew_count_subquery(),
+        )
+        for flight in flights:
+            self.assertEqual(flight.tickets_sold, flight.actual_tickets)
+            self.assertEqual(flight.crew_count, flight.actual_crew)
+            self.assertEqual(flight.crew_count, 3)
+            self.assertGreater(flight.arrival_time, flight.departure_time)
+
+    def test_seed_can_not_be_generated_twice(self):
+        generate(seed=2)
+
+        with self.assertRaisesMessage(CommandError, "already generated"):
+            generate(seed=2)
+
+    def test_flights_need_routes(self):
+        with self.assertRaises(CommandError):
+            generate(airports=1)
@@ -0,0 +1,150 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from airport.itinerary import GRAPH_VERSION_KEY, flight_graph
+from airport.models import (
+    Airport,
+    Route,
+    AirplaneType,
+    Airplane,
+    Flight,
+)
+
+ITINERARY_URL = reverse("airport:itinerary-list")
+
+
+class ItineraryApiTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        flight_graph.reset()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "admin@admin.com",
+            "admin123456",
+        )
+        self.client.force_authenticate(self.user)
+
+        self.airports = {
+            city: Airport.objects.create(
+                name=f"Airport {city}", country="Country", city=city
+            )
+            for city in ("Kiev", "Warsaw", "Paris", "London")
+        }
+        self.airplane = Airplane.objects.create(
+            name="Airbus A320",
+            rows=30,
+            seats_in_row=6,
+            airplane_type=AirplaneType.objects.create(name="Airbus"),
+        )
+        self.direct = self.sample_flight("Kiev", "London", "10:00", "13:00")
+        self.first_leg = self.sample_flight("Kiev", "Warsaw", "08:00", "09:30")
+        self.second_leg = self.sample_flight(
+            "Warsaw", "London", "10:30", "12:30"
+        )
+        self.sample_flight("Warsaw", "London", "09:45", "11:45")
+        self.sample_flight("Warsaw", "Paris", "11:00", "13:00")
+        self.sample_flight("Paris", "London", "14:00", "15:00")
+
+    def sample_flight(self, source, destination, departure, arrival):
+        route, _ = Route.objects.get_or_create(
+            source=self.airports[source],
+            destination=self.airports[destination],
+        )
+        return Flight.objects.create(
+            route=route,
+            airplane=self.airplane,
+            departure_time=f"2023-09-05 {departure}+03:00",
+            arrival_time=f"2023-09-05 {arrival}+03:00",
+        )
+
+    def search(self, **params):
+        query = {"source": "Kiev", "destination": "London", "date": "2023-09-05"}
+        query.update(params)
+        return self.client.get(ITINERARY_URL, query)
+
+    def test_auth_required(self):
+        res = APIClient().get(ITINERARY_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_search_requires_date(self):
+        res = self.client.get(
+            ITINERARY_URL, {"source": "Kiev", "destination": "London"}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_itineraries_ranked_by_duration(self):
+        res = self.search()
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [
+                [flight["id"] for flight in itinerary["flights"]]
+                for itinerary in res.data
+            ],
+            [
+                [self.direct.id],
+                [self.first_leg.id, self.second_leg.id],
+                [
+                    self.first_leg.id,
+                    Flight.objects.get(route__destination__city="Paris").id,
+                    Flight.objects.get(route__source__city="Paris").id,
+                ],
+            ],
+        )
+        self.assertEqual(res.data[0]["stops"], 0)
+        self.assertEqual(res.data[1]["duration"], "04:30:00")
+
+    def test_search_by_airport_id(self):
+        res = self.search(
+            source=self.airports["Kiev"].id,
+            destination=self.airports["London"].id,
+            max_stops=0,
+        )
+
+        self.assertEqual(len(res.data), 1)
+
+    def test_layover_bounds(self):
+        res = self.search(max_stops=1, min_layover=0, max_layover=30)
+
+        self.assertEqual(
+            [len(itinerary["flights"]) for itinerary in res.data], [1, 2]
+        )
+        self.assertEqual(res.data[1]["arrival_time"], "2023-09-05T11:45:00+03:00")
+
+    def test_other_dates_are_ignored(self):
+        res = self.search(date="2023-09-06")
+
+        self.assertEqual(res.data, [])
+
+    def test_graph_follows_flight_changes(self):
+        self.search()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            faster = self.sample_flight("Kiev", "London", "07:00", "09:00")
+            self.direct.delete()
+
+        res = self.search(max_stops=0)
+        self.assertEqual(
+            [itinerary["flights"][0]["id"] for itinerary in res.data],
+            [faster.id],
+        )
+
+    def test_graph_follows_changes_after_version_eviction(self):
+        self.search()
+
+        # the version key is evicted right after cache.add
+        with mock.patch.object(cache, "add"):
+            cache.delete(GRAPH_VERSION_KEY)
+            with self.captureOnCommitCallbacks(execute=True):
+                self.direct.delete()
+
+        res = self.search(max_stops=0)
+        self.assertEqual(res.data, [])
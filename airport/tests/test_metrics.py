@@ -0,0 +1,175 @@
+import re
+import threading
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from airport.models import Airport
+from main.metrics import registry
+
+AIRPORT_URL = reverse("airport:airport-list")
+METRICS_URL = reverse("metrics")
+
+
+def sample(text, name, **labels):
+    """Value of the sample with exactly these labels"""
+    series = ",".join(f'{key}="{value}"' for key, value in labels.items())
+    match = re.search(
+        rf"^{re.escape(name)}\{{{re.escape(series)}\}} (\S+)$",
+        text,
+        re.MULTILINE,
+    )
+    return float(match.group(1)) if match else None
+
+
+class MetricsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        registry.reset()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "admin@admin.com",
+            "admin12345",
+        )
+        self.client.force_authenticate(self.user)
+        Airport.objects.create(name="Boryspil", country="Ukraine", city="Kiev")
+
+    def metrics(self):
+        res = self.client.get(METRICS_URL)
+        self.assertEqual(res["Content-Type"], "text/plain; version=0.0.4")
+        return res.content.decode()
+
+    def test_requests_are_counted_per_view_and_action(self):
+        self.client.get(AIRPORT_URL)
+        self.client.get(AIRPORT_URL)
+        APIClient().get(AIRPORT_URL)
+
+        text = self.metrics()
+
+        view = "AirportViewSet.list"
+        self.assertEqual(
+            sample(
+                text,
+                "http_requests_total",
+                view=view,
+                method="GET",
+                status=200,
+            ),
+            2,
+        )
+        self.assertEqual(
+            sample(
+                text,
+                "http_requests_total",
+                view=view,
+                method="GET",
+                status=401,
+            ),
+            1,
+        )
+        self.assertEqual(
+            sample(
+                text,
+                "http_request_duration_seconds_count",
+                view=view,
+                method="GET",
+            ),
+            3,
+        )
+
+    def test_queries_are_recorded(self):
+        self.client.get(AIRPORT_URL)
+
+        text = self.metrics()
+
+        view = "AirportViewSet.list"
+        self.assertEqual(
+            sample(text, "db_queries_per_request_sum", view=view), 2
+        )
+        self.assertEqual(
+            sample(text, "db_queries_per_request_bucket", view=view, le=1), 0
+        )
+        self.assertEqual(
+            sample(text, "db_queries_per_request_bucket", view=view, le=2), 1
+        )
+        self.assertGreater(
+            sample(text, "db_query_duration_seconds_total", view=view), 0
+        )
+
+    def test_metrics_endpoint_is_not_recorded(self):
+        self.metrics()
+
+        self.assertNotIn('view="metrics"', self.metrics())
+
+    def test_shards_of_threads_are_merged(self):
+        def record():
+            for _ in range(100):
+                registry.record("View.list", "GET", 200, 0.01, 1, 0.001)
+
+        threads = [threading.Thread(target=record) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        text = registry.render()
+        self.assertEqual(
+            sample(
+                text,
+                "http_requests_total",
+                view="View.list",
+                method="GET",
+                status=200,
+            ),
+            400,
+        )
+        self.assertEqual(
+            sample(
+                text,
+                "http_request_duration_seconds_bucket",
+                view="View.list",
+                method="GET",
+                le="+Inf",
+            ),
+            400,
+        )
+
+    def test_shards_of_finished_threads_are_retired(self):
+        def record():
+            registry.record("View.list", "GET", 200, 0.01, 1, 0.001)
+
+        for _ in range(10):
+            thread = threading.Thread(target=record)
+            thread.start()
+            thread.join()
+        registry.record("View.list", "GET", 200, 0.01, 1, 0.001)
+
+        self.assertEqual(
+            sample(
+                registry.render(),
+                "http_requests_total",
+                view="View.list",
+                method="GET",
+                status=200,
+            ),
+            11,
+        )
+        self.assertEqual(registry.shard_count, 1)
+
+    def test_metrics_access(self):
+        self.client.force_authenticate(None)
+        res = self.client.get(METRICS_URL, REMOTE_ADDR="10.1.2.3")
+        self.assertEqual(res.status_code, 403)
+
+        with self.settings(METRICS_ALLOWED_IPS=["10.0.0.0/8"]):
+            res = self.client.get(METRICS_URL, REMOTE_ADDR="10.1.2.3")
+        self.assertEqual(res.status_code, 200)
+
+        self.user.is_staff = True
+        self.user.save()
+        self.client.force_login(self.user)
+        res = self.client.get(METRICS_URL, REMOTE_ADDR="10.1.2.3")
+        self.assertEqual(res.status_code, 200)
@@ -0,0 +1,137 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from airport.models import (
+    Airport,
+    Route,
+    AirplaneType,
+    Airplane,
+    Flight,
+    Order,
+    Ticket,
+)
+
+ORDER_URL = reverse("airport:order-list")
+
+
+def sample_flight(**params):
+    source = Airport.objects.create(
+        name="Boryspil", country="Ukraine", city="Kiev"
+    )
+    destination = Airport.objects.create(
+        name="JFK", country="USA", city="New York"
+    )
+    airplane_type = AirplaneType.objects.create(name="Boeing")
+
+    defaults = {
+        "route": Route.objects.create(
+            source=source, destination=destination, distance=7500
+        ),
+        "airplane": Airplane.objects.create(
+            name="Boeing 777",
+            rows=50,
+            seats_in_row=10,
+            airplane_type=airplane_type,
+        ),
+        "departure_time": "2023-09-05 18:00+03:00",
+        "arrival_time": "2023-09-06 20:00+03:00",
+    }
+    defaults.update(params)
+    return Flight.objects.create(**defaults)
+
+
+def order_payload(flight, places):
+    return {
+        "tickets": [
+            {"flight": flight.id, "row": row, "seat": seat}
+            for row, seat in places
+        ]
+    }
+
+
+class UnauthenticatedOrderApiTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_auth_required(self):
+        res = self.client.get(ORDER_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class AuthenticatedOrderApiTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "admin@admin.com",
+            "admin123456",
+        )
+        self.client.force_authenticate(self.user)
+        self.flight = sample_flight()
+
+    def test_create_order(self):
+        payload = order_payload(self.flight, [(1, 1), (1, 2)])
+
+        res = self.client.post(ORDER_URL, payload, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        order = Order.objects.get(id=res.data["id"])
+        self.assertEqual(order.user, self.user)
+        self.assertEqual(
+            list(order.tickets.values_list("row", "seat")),
+            [(1, 1), (1, 2)],
+        )
+
+    def test_create_order_with_taken_seat(self):
+        order = Order.objects.create(user=self.user)
+        Ticket.objects.create(flight=self.flight, order=order, row=3, seat=4)
+        payload = order_payload(self.flight, [(3, 3), (3, 4)])
+
+        res = self.client.post(ORDER_URL, payload, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(
+            res.data["seats"],
+            [{"flight": self.flight.id, "row": 3, "seat": 4}],
+        )
+        self.assertEqual(Ticket.objects.count(), 1)
+
+    def test_create_order_with_repeated_seat(self):
+        payload = order_payload(self.flight, [(2, 2), (2, 2)])
+
+        res = self.client.post(ORDER_URL, payload, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Order.objects.exists())
+
+    def test_create_order_with_seat_out_of_range(self):
+        payload = order_payload(self.flight, [(51, 1)])
+
+        res = self.client.post(ORDER_URL, payload, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_order_queries_do_not_grow_with_tickets(self):
+        small_payload = order_payload(
+            self.flight, [(1, seat) for seat in range(1, 3)]
+        )
+        large_payload = order_payload(
+            self.flight,
+            [(row, seat) for row in range(2, 22) for seat in range(1, 11)],
+        )
+
+        with CaptureQueriesContext(connection) as small_order:
+            res = self.client.post(ORDER_URL, small_payload, format="json")
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+        with CaptureQueriesContext(connection) as large_order:
+            res = self.client.post(ORDER_URL, large_payload, format="json")
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+        self.assertEqual(len(large_order), len(small_order))
+        self.assertEqual(Ticket.objects.count(), 202)
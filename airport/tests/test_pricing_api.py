@@ -0,0 +1,165 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from airport.models import (
+    Airport,
+    Route,
+    AirplaneType,
+    Airplane,
+    Flight,
+    Order,
+    Ticket,
+)
+from airport.pricing import compute_fares, invalidate_fares, load_fares
+
+ORDER_URL = reverse("airport:order-list")
+
+
+def fares_url(flight_id):
+    return reverse("airport:flight-fares", args=[flight_id])
+
+
+@override_settings(
+    FARE_BASE=5000,
+    FARE_PER_KM=10,
+    FARE_ROW_BANDS=[(2, 2.0), (4, 1.5)],
+    FARE_LOAD_SURCHARGE=1,
+    FARE_CURRENCY="usd",
+)
+class PricingApiTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "admin@admin.com",
+            "admin123456",
+        )
+        self.client.force_authenticate(self.user)
+
+        source = Airport.objects.create(
+            name="Boryspil", country="Ukraine", city="Kiev"
+        )
+        destination = Airport.objects.create(
+            name="JFK", country="USA", city="New York"
+        )
+        self.route = Route.objects.create(
+            source=source, destination=destination, distance=500
+        )
+        airplane_type = AirplaneType.objects.create(name="Boeing")
+        airplane = Airplane.objects.create(
+            name="Boeing 777",
+            rows=10,
+            seats_in_row=4,
+            airplane_type=airplane_type,
+        )
+        self.flight = Flight.objects.create(
+            route=self.route,
+            airplane=airplane,
+            departure_time="2023-09-05 18:00+03:00",
+            arrival_time="2023-09-06 20:00+03:00",
+        )
+
+    def order(self, places):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(
+                ORDER_URL,
+                {
+                    "tickets": [
+                        {"flight": self.flight.id, "row": row, "seat": seat}
+                        for row, seat in places
+                    ]
+                },
+                format="json",
+            )
+
+    def test_compute_fares(self):
+        fares = compute_fares(500, 10, 4, 0)
+
+        self.assertEqual(fares.shape, (10, 4))
+        # route fare 5000 + 10 * 500
+        self.assertEqual(
+            fares[:, 0].tolist(), [20000] * 2 + [15000] * 2 + [10000] * 6
+        )
+        self.assertTrue((fares == fares[:, :1]).all())
+        # a half full flight costs 1.5 times as much
+        self.assertEqual(compute_fares(500, 10, 4, 20)[9, 3], 15000)
+
+    def test_fares(self):
+        res = self.client.get(fares_url(self.flight.id))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["currency"], "usd")
+        self.assertEqual(res.data["tickets_sold"], 0)
+        self.assertEqual(len(res.data["fares"]), 10)
+        self.assertEqual(res.data["fares"][0], [20000] * 4)
+        self.assertEqual(res.data["fares"][9], [10000] * 4)
+
+    def test_fares_not_found(self):
+        res = self.client.get(fares_url(self.flight.id + 1))
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_cached_fares_are_served_without_queries(self):
+        self.client.get(fares_url(self.flight.id))
+
+        with self.assertNumQueries(0):
+            res = self.client.get(fares_url(self.flight.id))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_order_price_is_the_sum_of_fares(self):
+        res = self.order([(1, 1), (3, 2), (10, 4)])
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.data["price"], 20000 + 15000 + 10000)
+        order = Order.objects.get(id=res.data["id"])
+        self.assertEqual(order.price, 45000)
+
+    def test_fares_grow_when_seats_sell(self):
+        self.client.get(fares_url(self.flight.id))
+
+        self.order([(row, 1) for row in range(1, 11)])
+
+        res = self.client.get(fares_url(self.flight.id))
+        self.assertEqual(res.data["tickets_sold"], 10)
+        self.assertEqual(res.data["fares"][9], [12500] * 4)
+        res = self.order([(10, 2)])
+        self.assertEqual(res.data["price"], 12500)
+
+    def test_fares_follow_ticket_and_route_changes(self):
+        self.client.get(fares_url(self.flight.id))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Ticket.objects.create(
+                flight=self.flight,
+                order=Order.objects.create(user=self.user),
+                row=1,
+                seat=1,
+            )
+        res = self.client.get(fares_url(self.flight.id))
+        self.assertEqual(res.data["tickets_sold"], 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.route.distance = 1000
+            self.route.save()
+        res = self.client.get(fares_url(self.flight.id))
+        self.assertEqual(res.data["fares"][9][0], 15375)
+
+    def test_fares_built_before_a_change_are_not_served(self):
+        def racing_compute(distance, rows, seats_in_row, tickets_sold):
+            """The route change commits while the fares are computed"""
+            Route.objects.filter(id=self.route.id).update(distance=1000)
+            invalidate_fares(self.flight.id)
+            return compute_fares(distance, rows, seats_in_row, tickets_sold)
+
+        with mock.patch("airport.pricing.compute_fares", racing_compute):
+            load_fares(self.flight)
+
+        res = self.client.get(fares_url(self.flight.id))
+        self.assertEqual(res.data["fares"][9][0], 15000)
@@ -0,0 +1,93 @@
+import tempfile
+from io import StringIO
+from pathlib import Path
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from main.profiling import has_valid_token, make_profile_token
+
+FLIGHT_URL = reverse("airport:flight-list")
+ORDER_URL = reverse("airport:order-list")
+
+
+class ProfilingMiddlewareTests(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.profile_dir = Path(directory.name)
+        settings_override = override_settings(
+            PROFILE_DIR=self.profile_dir, PROFILE_VIEWS=[]
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.user = get_user_model().objects.create_user(
+            "user@user.com",
+            "user123456",
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_request_without_header_is_not_profiled(self):
+        res = self.client.get(FLIGHT_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotIn("X-Profile-Id", res)
+        self.assertEqual(list(self.profile_dir.iterdir()), [])
+
+    def test_signed_header_profiles_request(self):
+        res = self.client.get(
+            FLIGHT_URL, HTTP_X_PROFILE=make_profile_token()
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["results"], [])
+        profile_id = res["X-Profile-Id"]
+        self.assertIn("FlightViewSet", profile_id)
+        self.assertTrue((self.profile_dir / f"{profile_id}.prof").exists())
+        summary = (self.profile_dir / f"{profile_id}.txt").read_text()
+        self.assertIn("function calls", summary)
+        self.assertIn("airport/views.py", summary)
+
+    def test_invalid_token_is_ignored(self):
+        res = self.client.get(FLIGHT_URL, HTTP_X_PROFILE="1")
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotIn("X-Profile-Id", res)
+
+    def test_staff_user_may_profile(self):
+        staff = get_user_model().objects.create_superuser(
+            "admin@admin.com", "admin123456"
+        )
+        client = APIClient()
+        client.credentials(
+            HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(staff)}"
+        )
+
+        res = client.get(ORDER_URL, HTTP_X_PROFILE="1")
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIn("OrderViewSet", res["X-Profile-Id"])
+
+    def test_profile_views_limit_targets(self):
+        token = make_profile_token()
+
+        with override_settings(PROFILE_VIEWS=["OrderViewSet"]):
+            flights = self.client.get(FLIGHT_URL, HTTP_X_PROFILE=token)
+            orders = self.client.get(ORDER_URL, HTTP_X_PROFILE=token)
+
+        self.assertNotIn("X-Profile-Id", flights)
+        self.assertIn("X-Profile-Id", orders)
+
+    def test_profile_token_command(self):
+        out = StringIO()
+
+        call_command("profile_token", stdout=out)
+
+        self.assertTrue(has_valid_token(out.getvalue().strip()))
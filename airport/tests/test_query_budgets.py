@@ -0,0 +1,109 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from airport.models import (
+    Airport,
+    Route,
+    AirplaneType,
+    Airplane,
+    Crew,
+    Flight,
+    Order,
+    Ticket,
+    Rating,
+    RatingStarAirplane,
+)
+from airport.tests.query_budget import QueryBudgetMixin
+
+
+class QueryBudgetTests(QueryBudgetMixin, TestCase):
+    """Three rows of everything, so N+1 lookups exceed the budgets"""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "admin@admin.com",
+            "admin123456",
+        )
+        self.client.force_authenticate(self.user)
+
+        airports = [
+            Airport.objects.create(
+                name=f"Airport {index}", country="Country", city=f"{index}"
+            )
+            for index in range(3)
+        ]
+        routes = [
+            Route.objects.create(
+                source=airports[index],
+                destination=airports[(index + 1) % 3],
+                distance=100,
+            )
+            for index in range(3)
+        ]
+        star = RatingStarAirplane.objects.create(value=5)
+        airplanes = []
+        for index in range(3):
+            airplane = Airplane.objects.create(
+                name=f"Airplane {index}",
+                rows=10,
+                seats_in_row=4,
+                airplane_type=AirplaneType.objects.create(name=f"{index}"),
+            )
+            Rating.objects.create(
+                ip=f"127.0.0.{index}", star=star, airplane=airplane
+            )
+            airplanes.append(airplane)
+        crew = [
+            Crew.objects.create(first_name=f"{index}", last_name="Crew")
+            for index in range(3)
+        ]
+        self.flights = []
+        for index in range(3):
+            flight = Flight.objects.create(
+                route=routes[index],
+                airplane=airplanes[index],
+                departure_time=f"2023-09-0{index + 1} 10:00+03:00",
+                arrival_time=f"2023-09-0{index + 1} 13:00+03:00",
+            )
+            flight.crew.set(crew)
+            self.flights.append(flight)
+        self.orders = []
+        for index in range(3):
+            order = Order.objects.create(user=self.user)
+            for flight in self.flights:
+                Ticket.objects.create(
+                    flight=flight, order=order, row=index + 1, seat=1
+                )
+            self.orders.append(order)
+
+    def budgets(self):
+        flight = self.flights[0]
+        return [
+            ("airport-list", [], 2),
+            ("route-list", [], 2),
+            ("airplanetype-list", [], 2),
+            ("airplane-list", [], 2),
+            ("airplane-rated", [], 1),
+            ("crew-list", [], 2),
+            ("flight-list", [], 2),
+            ("flight-detail", [flight.id], 4),
+            ("flight-seatmap", [flight.id], 2),
+            ("order-list", [], 3),
+            ("order-detail", [self.orders[0].id], 2),
+            ("rating-list", [], 1),
+        ]
+
+    def test_endpoint_query_budgets(self):
+        for name, args, budget in self.budgets():
+            with self.subTest(endpoint=name):
+                cache.clear()
+                res = self.assertQueryBudget(
+                    budget, reverse(f"airport:{name}", args=args)
+                )
+                self.assertEqual(res.status_code, status.HTTP_200_OK)
@@ -0,0 +1,300 @@
+import re
+from contextlib import contextmanager
+from unittest import mock, skipUnless
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from airport.conditional import ConditionalGetMixin
+from airport.models import (
+    Airport,
+    Route,
+    AirplaneType,
+    Airplane,
+    Crew,
+    Flight,
+    Order,
+    Ticket,
+    Rating,
+    RatingStarAirplane,
+)
+from airport.urls import router
+
+
+def explain(sql):
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN QUERY PLAN {sql}")
+        return [row[-1] for row in cursor.fetchall()]
+
+
+def outer_sql(sql):
+    """The query without its parenthesized parts (subqueries, lists)"""
+    previous = None
+    while previous != sql:
+        previous, sql = sql, re.sub(r"\([^()]*\)", "?", sql)
+    return sql
+
+
+# scans accepted on filtered queries: (url name, query param names (None
+# for any endpoint and params), plan step pattern, reason)
+ACCEPTED_SCANS = (
+    (
+        None,
+        None,
+        r"SCAN U0 USING COVERING INDEX airport_\w+_updated_at_\w+",
+        "max(updated_at) of an ETag probe dependency, the LIMIT 1 stops "
+        "at the first entry of the index",
+    ),
+    (
+        "flight-list",
+        {"available"},
+        r"SCAN airport_flight USING INDEX flight_departure_id_idx",
+        "seats left compare with the airplane, no index serves it; the "
+        "ordering index stops after a page of available flights",
+    ),
+    (
+        "flight-list",
+        {"arrival_time_before"},
+        r"SCAN airport_flight USING INDEX flight_departure_id_idx",
+        "flight_arrival_idx can not give the departure order of the page, "
+        "sorting every match would cost more than walking the ordering "
+        "index",
+    ),
+)
+
+
+def accepted_scans(name, params):
+    return [
+        pattern
+        for url_name, param_names, pattern, _ in ACCEPTED_SCANS
+        if url_name in (None, name)
+        and param_names in (None, set(params))
+    ]
+
+
+def plan_problems(sql, accepted=()):
+    """Plan steps that read a whole table or sort it for a page.
+
+    An unfiltered query has to read every row anyway, so a scan (even of
+    an index) is only reported for queries with a WHERE clause, unless
+    it matches one of the ``accepted`` patterns.
+    """
+    problems = []
+    for step in explain(sql):
+        scan = step.startswith("SCAN ") and not any(
+            re.fullmatch(pattern, step) for pattern in accepted
+        )
+        if scan and " WHERE " in outer_sql(sql):
+            problems.append(step)
+        if "TEMP B-TREE FOR ORDER BY" in step and " LIMIT " in sql:
+            problems.append(step)
+    return problems
+
+
+@contextmanager
+def capture_probes(probes):
+    """Collect the SQL of the ETag probes run during the block"""
+    get_conditional_state = ConditionalGetMixin.get_conditional_state
+
+    def capture(view, request):
+        with CaptureQueriesContext(connection) as queries:
+            state = get_conditional_state(view, request)
+        probes.extend(query["sql"] for query in queries)
+        return state
+
+    with mock.patch.object(
+        ConditionalGetMixin, "get_conditional_state", capture
+    ):
+        yield
+
+
+@skipUnless(connection.vendor == "sqlite", "EXPLAIN QUERY PLAN is SQLite")
+class QueryPlanTests(TestCase):
+    """EXPLAIN the main query of every router endpoint.
+
+    Each case is (url name, url args, query params, main table); the
+    main query is the first SELECT from the main table that is not an
+    ETag probe. The probes are checked on their own.
+    """
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "admin@admin.com",
+            "admin123456",
+        )
+        self.client.force_authenticate(self.user)
+
+        self.source = Airport.objects.create(
+            name="Boryspil", country="Ukraine", city="Kiev"
+        )
+        self.destination = Airport.objects.create(
+            name="Heathrow", country="United Kingdom", city="London"
+        )
+        self.route = Route.objects.create(
+            source=self.source, destination=self.destination, distance=2185
+        )
+        self.airplane_type = AirplaneType.objects.create(name="Airbus")
+        self.airplane = Airplane.objects.create(
+            name="Airbus A320",
+            rows=30,
+            seats_in_row=6,
+            airplane_type=self.airplane_type,
+        )
+        self.crew = Crew.objects.create(first_name="John", last_name="Doe")
+        self.flight = Flight.objects.create(
+            route=self.route,
+            airplane=self.airplane,
+            departure_time="2023-09-05 10:00+03:00",
+            arrival_time="2023-09-05 13:00+03:00",
+        )
+        self.flight.crew.add(self.crew)
+        self.order = Order.objects.create(user=self.user)
+        Ticket.objects.create(
+            flight=self.flight, order=self.order, row=1, seat=1
+        )
+        self.rating = Rating.objects.create(
+            ip="127.0.0.1",
+            star=RatingStarAirplane.objects.create(value=5),
+            airplane=self.airplane,
+        )
+
+    def cases(self):
+        return [
+            ("airport-list", [], {}, "airport_airport"),
+            ("airport-detail", [self.source.id], {}, "airport_airport"),
+            ("route-list", [], {}, "airport_route"),
+            (
+                "route-list",
+                [],
+                {"source": self.source.id},
+                "airport_route",
+            ),
+            (
+                "route-list",
+                [],
+                {"destination": self.destination.id},
+                "airport_route",
+            ),
+            ("route-detail", [self.route.id], {}, "airport_route"),
+            ("airplanetype-list", [], {}, "airport_airplanetype"),
+            (
+                "airplanetype-detail",
+                [self.airplane_type.id],
+                {},
+                "airport_airplanetype",
+            ),
+            ("airplane-list", [], {}, "airport_airplane"),
+            ("airplane-detail", [self.airplane.id], {}, "airport_airplane"),
+            ("airplane-rated", [], {}, "airport_rating"),
+            ("crew-list", [], {}, "airport_crew"),
+            ("crew-detail", [self.crew.id], {}, "airport_crew"),
+            ("flight-list", [], {}, "airport_flight"),
+            (
+                "flight-list",
+                [],
+                {"departure_time_after": "2023-09-01"},
+                "airport_flight",
+            ),
+            (
+                "flight-list",
+                [],
+                {"arrival_time_before": "2023-09-10"},
+                "airport_flight",
+            ),
+            ("flight-list", [], {"route": self.route.id}, "airport_flight"),
+            ("flight-list", [], {"available": "true"}, "airport_flight"),
+            ("flight-detail", [self.flight.id], {}, "airport_flight"),
+            ("flight-seatmap", [self.flight.id], {}, "airport_ticket"),
+            (
+                "itinerary-list",
+                [],
+                {
+                    "source": self.source.id,
+                    "destination": self.destination.id,
+                    "date": "2023-09-05",
+                },
+                "airport_flight",
+            ),
+            ("order-list", [], {}, "airport_order"),
+            (
+                "order-list",
+                [],
+                {"created_at_after": "2023-09-01"},
+                "airport_order",
+            ),
+            ("order-detail", [self.order.id], {}, "airport_order"),
+            ("rating-list", [], {}, "airport_rating"),
+            ("rating-detail", [self.rating.id], {}, "airport_rating"),
+        ]
+
+    def test_cases_cover_every_router_endpoint(self):
+        covered = {name.rsplit("-", 1)[0] for name, *_ in self.cases()}
+
+        for _, _, basename in router.registry:
+            self.assertIn(basename, covered)
+
+    def get(self, name, args, params):
+        """(queries, ETag probe queries) of a request"""
+        probes = []
+        with capture_probes(probes):
+            with CaptureQueriesContext(connection) as queries:
+                res = self.client.get(
+                    reverse(f"airport:{name}", args=args), params
+                )
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return [query["sql"] for query in queries], probes
+
+    def test_main_queries_use_indexes(self):
+        for name, args, params, table in self.cases():
+            with self.subTest(endpoint=name, params=params):
+                queries, probes = self.get(name, args, params)
+
+                main_query = next(
+                    sql
+                    for sql in queries
+                    if sql.startswith("SELECT")
+                    and f'FROM "{table}"' in sql
+                    and sql not in probes
+                )
+                self.assertEqual(
+                    plan_problems(main_query, accepted_scans(name, params)),
+                    [],
+                    f"{name} {params}: {main_query}",
+                )
+
+    def test_probe_queries_use_indexes(self):
+        probed = 0
+        for name, args, params, table in self.cases():
+            with self.subTest(endpoint=name, params=params):
+                _, probes = self.get(name, args, params)
+
+                probed += bool(probes)
+                for sql in probes:
+                    self.assertIn(f'FROM "{table}"', sql)
+                    self.assertEqual(
+                        plan_problems(sql, accepted_scans(name, params)),
+                        [],
+                        f"{name} {params}: {sql}",
+                    )
+        self.assertGreater(probed, 0)
+
+    def test_index_scans_are_reported(self):
+        sql = (
+            'SELECT "id" FROM "airport_flight" WHERE "tickets_sold" < 10 '
+            'ORDER BY "departure_time" DESC, "id" DESC LIMIT 21'
+        )
+
+        self.assertEqual(
+            plan_problems(sql),
+            ["SCAN airport_flight USING INDEX flight_departure_id_idx"],
+        )
+        self.assertEqual(
+            plan_problems(sql, accepted_scans("flight-list", {"available"})),
+            [],
+        )
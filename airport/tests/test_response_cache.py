@@ -0,0 +1,100 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from airport.models import Airport, Route, Crew
+
+AIRPORT_URL = reverse("airport:airport-list")
+ROUTE_URL = reverse("airport:route-list")
+CREW_URL = reverse("airport:crew-list")
+
+
+class ResponseCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "admin@admin.com",
+            "admin12345",
+        )
+        self.client.force_authenticate(self.user)
+        self.source = Airport.objects.create(
+            name="Boryspil", country="Ukraine", city="Kiev"
+        )
+        self.destination = Airport.objects.create(
+            name="Heathrow", country="United Kingdom", city="London"
+        )
+        self.route = Route.objects.create(
+            source=self.source, destination=self.destination, distance=2185
+        )
+
+    def get(self, url, params=None):
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(url, params)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return res, len(queries)
+
+    def test_repeated_list_is_served_from_cache(self):
+        first, _ = self.get(AIRPORT_URL)
+        second, queries = self.get(AIRPORT_URL)
+
+        self.assertEqual(queries, 0)
+        self.assertEqual(second.data, first.data)
+
+    def test_repeated_detail_is_served_from_cache(self):
+        url = reverse("airport:route-detail", args=[self.route.id])
+        first, _ = self.get(url)
+        second, queries = self.get(url)
+
+        self.assertEqual(queries, 0)
+        self.assertEqual(second.data["source"]["name"], "Boryspil")
+
+    def test_query_params_are_part_of_the_key(self):
+        self.get(ROUTE_URL)
+        res, queries = self.get(ROUTE_URL, {"source": self.destination.id})
+
+        self.assertGreater(queries, 0)
+        self.assertEqual(res.data, [])
+
+    def test_query_param_order_does_not_matter(self):
+        source, destination = self.source.id, self.destination.id
+        self.get(ROUTE_URL, {"source": source, "destination": destination})
+        res, queries = self.get(
+            f"{ROUTE_URL}?destination={destination}&source={source}"
+        )
+
+        self.assertEqual(queries, 0)
+        self.assertEqual(len(res.data), 1)
+
+    def test_change_invalidates_cached_list(self):
+        self.get(AIRPORT_URL)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Airport.objects.create(name="Orly", country="France", city="Paris")
+        res, queries = self.get(AIRPORT_URL)
+
+        self.assertGreater(queries, 0)
+        self.assertEqual(len(res.data), 3)
+
+    def test_airport_change_invalidates_routes(self):
+        self.get(ROUTE_URL)
+
+        self.destination.name = "Gatwick"
+        self.destination.save()
+        res, _ = self.get(ROUTE_URL)
+
+        self.assertEqual(res.data[0]["destination"], "Gatwick")
+
+    def test_delete_invalidates_cached_list(self):
+        Crew.objects.create(first_name="John", last_name="Doe")
+        self.get(CREW_URL)
+
+        Crew.objects.all().delete()
+        res, _ = self.get(CREW_URL)
+
+        self.assertEqual(res.data, [])
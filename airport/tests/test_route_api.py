@@ -1,11 +1,21 @@
+from io import StringIO
+
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
 from django.test import TestCase
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APIClient
 
 
-from airport.models import Route, Airport
+from airport.models import (
+    Route,
+    Airport,
+    AirplaneType,
+    Airplane,
+    Flight,
+)
 from airport.serializers import (RouteListSerializer,
                                  RouteDetailSerializer)
 
@@ -141,6 +151,20 @@ class AdminRouteApiTest(TestCase):
         res = self.client.post(ROUTE_URL, payload)
         self.assertEqual(res.status_code, status.HTTP_201_CREATED)
 
+    def test_create_duplicate_route_is_rejected(self):
+        route = sample_route()
+        payload = {
+            "source": route.source_id,
+            "destination": route.destination_id,
+            "distance": 5000,
+        }
+
+        res = self.client.post(ROUTE_URL, payload)
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("non_field_errors", res.data)
+        self.assertEqual(Route.objects.count(), 1)
+
     def test_update_route_success(self):
         route = sample_route()
         payload = {
@@ -155,3 +179,103 @@ class AdminRouteApiTest(TestCase):
         url = detail_url(route.id)
         res = self.client.delete(url)
         self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+
+
+class RouteDistanceTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "admin@admin.com", "admin12345", is_staff=True
+        )
+        self.client.force_authenticate(self.user)
+        self.kiev = Airport.objects.create(
+            name="Boryspil",
+            country="Ukraine",
+            city="Kiev",
+            latitude=50.345,
+            longitude=30.8947,
+        )
+        self.london = Airport.objects.create(
+            name="Heathrow",
+            country="United Kingdom",
+            city="London",
+            latitude=51.47,
+            longitude=-0.4543,
+        )
+
+    def test_create_route_fills_distance(self):
+        payload = {
+            "source": self.kiev.id,
+            "destination": self.london.id,
+        }
+
+        res = self.client.post(ROUTE_URL, payload)
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.data["distance"], 2185)
+
+    def test_create_route_keeps_given_distance(self):
+        route = Route.objects.create(
+            source=self.kiev, destination=self.london, distance=2000
+        )
+
+        self.assertEqual(route.distance, 2000)
+
+    def test_create_route_without_coordinates(self):
+        route = sample_route()
+        route.distance = 0
+        route.save()
+
+        self.assertEqual(route.distance, 0)
+
+    def test_backfill_route_distances(self):
+        route = Route.objects.create(
+            source=self.london, destination=self.kiev, distance=1
+        )
+        Route.objects.update(distance=0)
+        out = StringIO()
+
+        call_command("backfill_route_distances", stdout=out)
+
+        route.refresh_from_db()
+        self.assertEqual(route.distance, 2185)
+        self.assertIn("Updated distance of 1 route(s)", out.getvalue())
+
+    def test_backfill_invalidates_cached_routes(self):
+        Route.objects.create(
+            source=self.london, destination=self.kiev, distance=1
+        )
+        Route.objects.update(distance=0)
+        self.assertEqual(self.client.get(ROUTE_URL).data[0]["distance"], 0)
+
+        call_command("backfill_route_distances", stdout=StringIO())
+
+        self.assertEqual(
+            self.client.get(ROUTE_URL).data[0]["distance"], 2185
+        )
+
+    def test_backfill_invalidates_cached_fares(self):
+        route = Route.objects.create(
+            source=self.london, destination=self.kiev, distance=1
+        )
+        Route.objects.update(distance=0)
+        airplane = Airplane.objects.create(
+            name="Boeing 777",
+            rows=10,
+            seats_in_row=4,
+            airplane_type=AirplaneType.objects.create(name="Boeing"),
+        )
+        flight = Flight.objects.create(
+            route=route,
+            airplane=airplane,
+            departure_time="2023-09-01T10:00:00Z",
+            arrival_time="2023-09-01T13:00:00Z",
+        )
+        url = reverse("airport:flight-fares", args=[flight.id])
+        fare = self.client.get(url).data["fares"][9][0]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command("backfill_route_distances", stdout=StringIO())
+
+        self.assertGreater(self.client.get(url).data["fares"][9][0], fare)
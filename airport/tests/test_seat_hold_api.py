@@ -0,0 +1,256 @@
+import sys
+import threading
+import time
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db import OperationalError, connection
+from django.test import TestCase, TransactionTestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from airport.models import (
+    Airport,
+    Route,
+    AirplaneType,
+    Airplane,
+    Flight,
+    Order,
+    Ticket,
+    SeatHold,
+)
+from airport.seat_holds import SeatConflict, hold_seats
+
+ORDER_URL = reverse("airport:order-list")
+
+
+def hold_url(flight_id):
+    return reverse("airport:flight-hold", args=[flight_id])
+
+
+def sample_flight():
+    source = Airport.objects.create(
+        name="Boryspil", country="Ukraine", city="Kiev"
+    )
+    destination = Airport.objects.create(
+        name="JFK", country="USA", city="New York"
+    )
+    return Flight.objects.create(
+        route=Route.objects.create(
+            source=source, destination=destination, distance=7500
+        ),
+        airplane=Airplane.objects.create(
+            name="Boeing 777",
+            rows=20,
+            seats_in_row=6,
+            airplane_type=AirplaneType.objects.create(name="Boeing"),
+        ),
+        departure_time="2023-09-05 18:00+03:00",
+        arrival_time="2023-09-06 20:00+03:00",
+    )
+
+
+def seats_payload(places):
+    return {"seats": [{"row": row, "seat": seat} for row, seat in places]}
+
+
+class SeatHoldApiTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "user@user.com",
+            "user123456",
+        )
+        self.other_user = get_user_model().objects.create_user(
+            "other@user.com",
+            "other123456",
+        )
+        self.client.force_authenticate(self.user)
+        self.flight = sample_flight()
+
+    def test_hold_seats(self):
+        res = self.client.post(
+            hold_url(self.flight.id),
+            seats_payload([(1, 1), (1, 2)]),
+            format="json",
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            list(
+                SeatHold.objects.filter(user=self.user).values_list(
+                    "row", "seat"
+                )
+            ),
+            [(1, 1), (1, 2)],
+        )
+        self.assertGreater(res.data["expires_at"], timezone.now())
+
+    def test_hold_seat_out_of_range(self):
+        res = self.client.post(
+            hold_url(self.flight.id), seats_payload([(21, 1)]), format="json"
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_hold_seat_held_by_other_user(self):
+        hold_seats(self.other_user, self.flight, [(1, 2)])
+
+        res = self.client.post(
+            hold_url(self.flight.id),
+            seats_payload([(1, 1), (1, 2)]),
+            format="json",
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(
+            res.data["seats"],
+            [{"flight": self.flight.id, "row": 1, "seat": 2}],
+        )
+        self.assertFalse(SeatHold.objects.filter(user=self.user).exists())
+
+    def test_expired_hold_is_replaced(self):
+        hold_seats(
+            self.other_user, self.flight, [(1, 1)], ttl=timedelta(seconds=-1)
+        )
+
+        res = self.client.post(
+            hold_url(self.flight.id), seats_payload([(1, 1)]), format="json"
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(SeatHold.objects.get().user, self.user)
+
+    def test_hold_sold_seat(self):
+        order = Order.objects.create(user=self.other_user)
+        Ticket.objects.create(flight=self.flight, order=order, row=3, seat=3)
+
+        res = self.client.post(
+            hold_url(self.flight.id), seats_payload([(3, 3)]), format="json"
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_409_CONFLICT)
+
+    def test_release_seats(self):
+        hold_seats(self.user, self.flight, [(1, 1), (1, 2)])
+
+        res = self.client.delete(
+            hold_url(self.flight.id), seats_payload([(1, 1)]), format="json"
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(
+            list(SeatHold.objects.values_list("row", "seat")), [(1, 2)]
+        )
+
+    def test_order_of_seat_held_by_other_user(self):
+        hold_seats(self.other_user, self.flight, [(2, 2)])
+        payload = {
+            "tickets": [{"flight": self.flight.id, "row": 2, "seat": 2}]
+        }
+
+        res = self.client.post(ORDER_URL, payload, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_409_CONFLICT)
+        self.assertFalse(Ticket.objects.exists())
+
+    def test_order_consumes_own_holds(self):
+        hold_seats(self.user, self.flight, [(2, 2), (2, 3)])
+        payload = {
+            "tickets": [{"flight": self.flight.id, "row": 2, "seat": 2}]
+        }
+
+        res = self.client.post(ORDER_URL, payload, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            list(SeatHold.objects.values_list("row", "seat")), [(2, 3)]
+        )
+
+    @mock.patch("airport.serializers.find_conflicts")
+    def test_order_race_returns_conflict(self, mock_find_conflicts):
+        order = Order.objects.create(user=self.other_user)
+        Ticket.objects.create(flight=self.flight, order=order, row=4, seat=4)
+        mock_find_conflicts.side_effect = [set(), {(self.flight.id, 4, 4)}]
+        payload = {
+            "tickets": [{"flight": self.flight.id, "row": 4, "seat": 4}]
+        }
+
+        res = self.client.post(ORDER_URL, payload, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(Order.objects.filter(user=self.user).count(), 0)
+
+
+class SeatHoldContentionTests(TransactionTestCase):
+    buyers = 8
+    attempts = 15
+
+    def setUp(self):
+        self.flight = sample_flight()
+        self.users = [
+            get_user_model().objects.create_user(
+                f"buyer{number}@user.com", "buyer123456"
+            )
+            for number in range(self.buyers)
+        ]
+
+    def test_concurrent_holds_never_double_book(self):
+        barrier = threading.Barrier(self.buyers)
+        results = {"held": [], "conflicts": 0, "retries": 0}
+        lock = threading.Lock()
+
+        def buy(user):
+            barrier.wait()
+            try:
+                for attempt in range(self.attempts):
+                    # every buyer fights for the same small set of seats
+                    place = (attempt % 5 + 1, attempt % 3 + 1)
+                    while True:
+                        try:
+                            hold_seats(user, self.flight, [place])
+                        except SeatConflict:
+                            with lock:
+                                results["conflicts"] += 1
+                        except OperationalError:
+                            # SQLite rejects concurrent writers outright
+                            with lock:
+                                results["retries"] += 1
+                            time.sleep(0.001)
+                            continue
+                        else:
+                            with lock:
+                                results["held"].append((user.id, place))
+                        break
+            finally:
+                connection.close()
+
+        threads = [
+            threading.Thread(target=buy, args=(user,)) for user in self.users
+        ]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        holds = list(SeatHold.objects.values_list("user_id", "row", "seat"))
+        self.assertEqual(
+            len(holds), len({(row, seat) for _, row, seat in holds})
+        )
+        self.assertEqual(len(holds), 15)
+        self.assertEqual(
+            len(results["held"]) + results["conflicts"],
+            self.buyers * self.attempts,
+        )
+        sys.stderr.write(
+            f"\nseat holds: {self.buyers * self.attempts} attempts "
+            f"in {elapsed:.3f}s "
+            f"({self.buyers * self.attempts / elapsed:.0f} attempts/s, "
+            f"{results['conflicts']} conflicts, "
+            f"{results['retries']} retries)\n"
+        )
@@ -0,0 +1,169 @@
+import base64
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from airport.models import (
+    Airport,
+    Route,
+    AirplaneType,
+    Airplane,
+    Flight,
+    Order,
+    Ticket,
+)
+from airport.seat_map import (
+    build_seat_map,
+    invalidate_seat_map,
+    load_seat_map,
+)
+
+
+def seatmap_url(flight_id):
+    return reverse("airport:flight-seatmap", args=[flight_id])
+
+
+def taken_places(data):
+    bitmap = base64.b64decode(data["bitmap"])
+    places = []
+    for index in range(data["rows"] * data["seats_in_row"]):
+        if bitmap[index // 8] & (0x80 >> (index % 8)):
+            places.append(
+                (
+                    index // data["seats_in_row"] + 1,
+                    index % data["seats_in_row"] + 1,
+                )
+            )
+    return places
+
+
+class SeatMapApiTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "admin@admin.com",
+            "admin123456",
+        )
+        self.client.force_authenticate(self.user)
+
+        source = Airport.objects.create(
+            name="Boryspil", country="Ukraine", city="Kiev"
+        )
+        destination = Airport.objects.create(
+            name="JFK", country="USA", city="New York"
+        )
+        route = Route.objects.create(
+            source=source, destination=destination, distance=7500
+        )
+        airplane_type = AirplaneType.objects.create(name="Boeing")
+        self.airplane = Airplane.objects.create(
+            name="Boeing 777",
+            rows=10,
+            seats_in_row=3,
+            airplane_type=airplane_type,
+        )
+        self.flight = Flight.objects.create(
+            route=route,
+            airplane=self.airplane,
+            departure_time="2023-09-05 18:00+03:00",
+            arrival_time="2023-09-06 20:00+03:00",
+        )
+        self.order = Order.objects.create(user=self.user)
+
+    def test_auth_required(self):
+        res = APIClient().get(seatmap_url(self.flight.id))
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_seatmap_not_found(self):
+        res = self.client.get(seatmap_url(self.flight.id + 1))
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_empty_seatmap(self):
+        res = self.client.get(seatmap_url(self.flight.id))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["rows"], 10)
+        self.assertEqual(res.data["seats_in_row"], 3)
+        self.assertEqual(res.data["taken"], 0)
+        self.assertEqual(len(base64.b64decode(res.data["bitmap"])), 4)
+
+    def test_seatmap_marks_taken_places(self):
+        Ticket.objects.create(
+            flight=self.flight, order=self.order, row=1, seat=1
+        )
+        Ticket.objects.create(
+            flight=self.flight, order=self.order, row=10, seat=3
+        )
+
+        res = self.client.get(seatmap_url(self.flight.id))
+
+        self.assertEqual(res.data["taken"], 2)
+        self.assertEqual(taken_places(res.data), [(1, 1), (10, 3)])
+
+    def test_cached_seatmap_is_served_without_queries(self):
+        self.client.get(seatmap_url(self.flight.id))
+
+        with self.assertNumQueries(0):
+            res = self.client.get(seatmap_url(self.flight.id))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_cached_seatmap_follows_ticket_changes(self):
+        self.client.get(seatmap_url(self.flight.id))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            ticket = Ticket.objects.create(
+                flight=self.flight, order=self.order, row=2, seat=2
+            )
+        res = self.client.get(seatmap_url(self.flight.id))
+        self.assertEqual(taken_places(res.data), [(2, 2)])
+        with self.assertNumQueries(0):
+            self.client.get(seatmap_url(self.flight.id))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            ticket.delete()
+        res = self.client.get(seatmap_url(self.flight.id))
+        self.assertEqual(taken_places(res.data), [])
+
+    def test_airplane_change_resizes_seatmap(self):
+        self.client.get(seatmap_url(self.flight.id))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.airplane.rows = 20
+            self.airplane.save()
+
+        res = self.client.get(seatmap_url(self.flight.id))
+        self.assertEqual(res.data["rows"], 20)
+
+    def test_seatmap_built_before_a_change_is_not_served(self):
+        def racing_build(rows, seats_in_row, taken_places):
+            """The ticket sale commits while the seat map is built"""
+            taken_places = list(taken_places)
+            Ticket.objects.create(
+                flight=self.flight, order=self.order, row=3, seat=1
+            )
+            invalidate_seat_map(self.flight.id)
+            return build_seat_map(rows, seats_in_row, taken_places)
+
+        with mock.patch("airport.seat_map.build_seat_map", racing_build):
+            load_seat_map(self.flight)
+
+        res = self.client.get(seatmap_url(self.flight.id))
+        self.assertEqual(taken_places(res.data), [(3, 1)])
+
+    def test_deleted_flight_has_no_seatmap(self):
+        self.client.get(seatmap_url(self.flight.id))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.flight.delete()
+
+        res = self.client.get(seatmap_url(self.flight.id))
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
@@ -1,12 +1,19 @@
 from django.urls import path
 from rest_framework import routers
 
+from airport.async_views import (
+    AsyncAirportListView,
+    AsyncRouteListView,
+    AsyncFlightListView,
+    AsyncFlightDetailView,
+)
 from airport.views import (
     AirportViewSet,
     RouteViewSet,
     AirplaneViewSet,
     AirplaneTypeViewSet,
     FlightViewSet,
+    ItineraryViewSet,
     CrewViewSet,
     OrderViewSet,
     AddStarRatingView,
@@ -19,10 +26,32 @@ router.register("airplane-type", AirplaneTypeViewSet)
 router.register("airplane", AirplaneViewSet)
 router.register("crew", CrewViewSet)
 router.register("flight", FlightViewSet)
+router.register("itinerary", ItineraryViewSet, basename="itinerary")
 router.register("order", OrderViewSet)
 router.register("rating", AddStarRatingView)
 
 
-urlpatterns = router.urls
+urlpatterns = [
+    path(
+        "async/airport/",
+        AsyncAirportListView.as_view(),
+        name="async-airport-list",
+    ),
+    path(
+        "async/route/",
+        AsyncRouteListView.as_view(),
+        name="async-route-list",
+    ),
+    path(
+        "async/flight/",
+        AsyncFlightListView.as_view(),
+        name="async-flight-list",
+    ),
+    path(
+        "async/flight/<int:pk>/",
+        AsyncFlightDetailView.as_view(),
+        name="async-flight-detail",
+    ),
+] + router.urls
 
 app_name = "airport"
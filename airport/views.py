@@ -1,11 +1,14 @@
-from django.db.models import F, Count
+from datetime import timedelta
+
 from drf_spectacular.types import OpenApiTypes
 from drf_spectacular.utils import extend_schema, OpenApiParameter
-from rest_framework import viewsets
+from rest_framework import status, viewsets
+from rest_framework.decorators import action
+from rest_framework.response import Response
 from django.db import models
 
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.pagination import CursorPagination, PageNumberPagination
 from rest_framework.permissions import IsAuthenticated
 
 from .permissions import IsAdminOrIfAuthenticatedReadOnly
@@ -18,7 +21,24 @@ from .service import (
     OrderFilter,
     get_client_ip,
 )
+from .export import (
+    EXPORT_RENDERERS,
+    FLIGHT_EXPORT_COLUMNS,
+    ORDER_TICKET_EXPORT_COLUMNS,
+    export_response,
+)
+from .conditional import ConditionalGetMixin
+from .itinerary import flight_graph
+from .pricing import get_cached_fares, load_fares, serialize_fares
+from .response_cache import CachedResponseMixin
+from .seat_holds import hold_seats, release_seats
+from .seat_map import (
+    get_cached_seat_map,
+    load_seat_map,
+    serialize_seat_map,
+)
 
+from user.authentication import ReadOnlyClaimsJWTAuthentication
 from airport.models import (
     Airport,
     Route,
@@ -27,6 +47,7 @@ from airport.models import (
     Airplane,
     Flight,
     Order,
+    Ticket,
     Rating,
 )
 
@@ -43,14 +64,20 @@ from airport.serializers import (
     FlightSerializer,
     FlightListSerializer,
     FlightDetailSerializer,
+    SeatHoldSerializer,
+    ItinerarySearchSerializer,
+    ItinerarySerializer,
     OrderSerializer,
     OrderListSerializer,
     CreateRatingSerializer,
 )
 
 
-class AirportViewSet(viewsets.ModelViewSet):
+class AirportViewSet(
+    CachedResponseMixin, ConditionalGetMixin, viewsets.ModelViewSet
+):
     queryset = Airport.objects.all()
+    authentication_classes = (ReadOnlyClaimsJWTAuthentication,)
     serializer_class = AirportSerializer
     filter_backends = (DjangoFilterBackend,)
     filterset_class = AirportFilter
@@ -79,8 +106,13 @@ class AirportViewSet(viewsets.ModelViewSet):
         return super().list(request, *args, **kwargs)
 
 
-class RouteViewSet(viewsets.ModelViewSet):
+class RouteViewSet(
+    CachedResponseMixin, ConditionalGetMixin, viewsets.ModelViewSet
+):
     queryset = Route.objects.all().select_related("destination", "source")
+    authentication_classes = (ReadOnlyClaimsJWTAuthentication,)
+    cache_models = (Route, Airport)
+    conditional_dependencies = (Airport,)
     filter_backends = (DjangoFilterBackend,)
     filterset_class = RouteFilter
     permission_classes = (IsAdminOrIfAuthenticatedReadOnly,)
@@ -118,34 +150,26 @@ class RouteViewSet(viewsets.ModelViewSet):
         return super().list(request, *args, **kwargs)
 
 
-class AirplaneTypeViewSet(viewsets.ModelViewSet):
+class AirplaneTypeViewSet(
+    CachedResponseMixin, ConditionalGetMixin, viewsets.ModelViewSet
+):
     queryset = AirplaneType.objects.all()
+    authentication_classes = (ReadOnlyClaimsJWTAuthentication,)
     serializer_class = AirplaneTypeSerializer
     permission_classes = (IsAdminOrIfAuthenticatedReadOnly,)
 
 
-class AirplaneViewSet(viewsets.ModelViewSet):
+class AirplaneViewSet(
+    CachedResponseMixin, ConditionalGetMixin, viewsets.ModelViewSet
+):
     queryset = Airplane.objects.all().select_related("airplane_type")
+    authentication_classes = (ReadOnlyClaimsJWTAuthentication,)
+    cache_models = (Airplane, AirplaneType)
+    conditional_dependencies = (AirplaneType,)
     filter_backends = (DjangoFilterBackend,)
     filterset_class = AirplaneFilter
     permission_classes = (IsAdminOrIfAuthenticatedReadOnly,)
 
-    def get_queryset(self):
-        airplane = (
-            Airplane.objects.all()
-            .annotate(
-                rating_user=models.Count(
-                    "ratings", filter=models.Q(
-                        ratings__ip=get_client_ip(self.request))
-                )
-            )
-            .annotate(
-                middle_star=models.Sum(models.F("ratings__star"))
-                / models.Count(models.F("ratings"))
-            )
-        )
-        return airplane
-
     def get_serializer_class(self):
         if self.action == "list":
             return AirplaneListSerializer
@@ -153,6 +177,37 @@ class AirplaneViewSet(viewsets.ModelViewSet):
             return AirplaneDetailSerializer
         return AirplaneSerializer
 
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                "ids",
+                type=OpenApiTypes.STR,
+                description="Only these airplanes (ex. ?ids=1,2,3)",
+            ),
+        ]
+    )
+    @action(detail=False, methods=["GET"], url_path="rated")
+    def rated(self, request):
+        """Ids of the airplanes already rated from the client's IP,
+        kept out of the shared (cacheable) airplane list"""
+        ratings = Rating.objects.filter(ip=get_client_ip(request))
+        ids = request.query_params.get("ids")
+        if ids:
+            ratings = ratings.filter(
+                airplane_id__in=[
+                    int(airplane_id)
+                    for airplane_id in ids.split(",")
+                    if airplane_id.strip().isdigit()
+                ]
+            )
+        # nothing keeps an ip from having two ratings of an airplane
+        airplane_ids = (
+            ratings.order_by("airplane_id")
+            .values_list("airplane_id", flat=True)
+            .distinct()
+        )
+        return Response({"airplanes": list(airplane_ids)})
+
     @extend_schema(
         parameters=[
             OpenApiParameter(
@@ -184,8 +239,11 @@ class AirplaneViewSet(viewsets.ModelViewSet):
         return super().list(request, *args, **kwargs)
 
 
-class CrewViewSet(viewsets.ModelViewSet):
+class CrewViewSet(
+    CachedResponseMixin, ConditionalGetMixin, viewsets.ModelViewSet
+):
     queryset = Crew.objects.all()
+    authentication_classes = (ReadOnlyClaimsJWTAuthentication,)
     serializer_class = CrewSerializer
     filter_backends = (DjangoFilterBackend,)
     filterset_class = CrewFilter
@@ -205,24 +263,116 @@ class CrewViewSet(viewsets.ModelViewSet):
         return super().list(request, *args, **kwargs)
 
 
-class FlightViewSet(viewsets.ModelViewSet):
+class FlightPagination(CursorPagination):
+    page_size = 20
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    ordering = ("-departure_time", "-id")
+
+
+class FlightViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = Flight.objects.all().select_related(
-        "route", "airplane").prefetch_related("crew").annotate(
-            tickets_available=(
-                F("airplane__rows") * F("airplane__seats_in_row")
-                - Count("tickets")
-            ))
+        "route__source", "route__destination", "airplane")
+    authentication_classes = (ReadOnlyClaimsJWTAuthentication,)
+    conditional_dependencies = (Route, Airport, Airplane, Crew)
     filter_backends = (DjangoFilterBackend,)
     filterset_class = FlightFilter
+    pagination_class = FlightPagination
     permission_classes = (IsAdminOrIfAuthenticatedReadOnly,)
 
+    def get_queryset(self):
+        if self.action in ("seatmap", "hold"):
+            return Flight.objects.select_related("airplane")
+        if self.action == "fares":
+            return Flight.objects.select_related("airplane", "route")
+        if self.action == "retrieve":
+            return self.queryset.prefetch_related("crew")
+        return self.queryset
+
     def get_serializer_class(self):
         if self.action == "list":
             return FlightListSerializer
         if self.action == "retrieve":
             return FlightDetailSerializer
+        if self.action == "hold":
+            return SeatHoldSerializer
         return FlightSerializer
 
+    @action(
+        detail=True,
+        methods=["POST", "DELETE"],
+        url_path="hold",
+        permission_classes=(IsAuthenticated,),
+    )
+    def hold(self, request, pk=None):
+        """Hold seats of a flight for the user for a limited time
+        (ex. during checkout) or release them"""
+        flight = self.get_object()
+        serializer = SeatHoldSerializer(
+            data=request.data, context={"flight": flight}
+        )
+        serializer.is_valid(raise_exception=True)
+        seats = [
+            (seat["row"], seat["seat"])
+            for seat in serializer.validated_data["seats"]
+        ]
+        if request.method == "DELETE":
+            release_seats(
+                request.user, [(flight.id, row, seat) for row, seat in seats]
+            )
+            return Response(status=status.HTTP_204_NO_CONTENT)
+
+        holds = hold_seats(request.user, flight, seats)
+        return Response(
+            {
+                "flight": flight.id,
+                "seats": serializer.data["seats"],
+                "expires_at": holds[0].expires_at,
+            },
+            status=status.HTTP_201_CREATED,
+        )
+
+    @action(
+        detail=False,
+        methods=["GET"],
+        url_path="export",
+        renderer_classes=EXPORT_RENDERERS,
+    )
+    def export(self, request):
+        """Stream filtered flights as CSV or NDJSON (Accept: text/csv,
+        application/x-ndjson or ?format=csv|ndjson)"""
+        queryset = self.filter_queryset(self.get_queryset()).order_by(
+            *FlightPagination.ordering
+        )
+        return export_response(
+            request.accepted_renderer,
+            "flights",
+            FLIGHT_EXPORT_COLUMNS,
+            queryset,
+        )
+
+    @action(detail=True, methods=["GET"], url_path="seatmap")
+    def seatmap(self, request, pk=None):
+        """Seat occupancy packed as a base64 bitmap, row-major,
+        one bit per seat (1 - taken)"""
+        seat_map = get_cached_seat_map(pk)
+        if seat_map is None:
+            flight = self.get_object()
+            pk = flight.id
+            seat_map = load_seat_map(flight)
+        return Response(serialize_seat_map(pk, seat_map))
+
+    @action(detail=True, methods=["GET"], url_path="fares")
+    def fares(self, request, pk=None):
+        """Fare of every seat at the current load, rows of seats in
+        the smallest currency unit"""
+        fares = get_cached_fares(pk)
+        if fares is None:
+            flight = self.get_object()
+            pk = flight.id
+            fares = load_fares(flight)
+        return Response(serialize_fares(pk, fares))
+
     @extend_schema(
         parameters=[
             OpenApiParameter(
@@ -248,12 +398,125 @@ class FlightViewSet(viewsets.ModelViewSet):
                 description="Filter by arrival_time "
                             "(ex. ?arrival_time=DD-MM-YYYY)",
             ),
+            OpenApiParameter(
+                "available",
+                type=OpenApiTypes.BOOL,
+                description="Filter by free seats "
+                            "(ex. ?available=true)",
+            ),
         ]
     )
     def list(self, request, *args, **kwargs):
         return super().list(request, *args, **kwargs)
 
 
+class ItineraryViewSet(viewsets.GenericViewSet):
+    queryset = Flight.objects.all().select_related(
+        "route__source", "route__destination", "airplane")
+    authentication_classes = (ReadOnlyClaimsJWTAuthentication,)
+    serializer_class = ItinerarySerializer
+    filter_backends = ()
+    permission_classes = (IsAdminOrIfAuthenticatedReadOnly,)
+
+    @staticmethod
+    def _airport_ids(value):
+        if value.isdigit():
+            return [int(value)]
+        return Airport.objects.filter(
+            models.Q(city__iexact=value) | models.Q(name__iexact=value)
+        ).values_list("id", flat=True)
+
+    @staticmethod
+    def _is_current(leg, flight):
+        return flight is not None and (
+            leg.departure_time,
+            leg.arrival_time,
+            leg.source_id,
+            leg.destination_id,
+        ) == (
+            flight.departure_time,
+            flight.arrival_time,
+            flight.route.source_id,
+            flight.route.destination_id,
+        )
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                "source",
+                type=OpenApiTypes.STR,
+                required=True,
+                description="Source airport id, name or city "
+                            "(ex. ?source=Kiev)",
+            ),
+            OpenApiParameter(
+                "destination",
+                type=OpenApiTypes.STR,
+                required=True,
+                description="Destination airport id, name or city "
+                            "(ex. ?destination=London)",
+            ),
+            OpenApiParameter(
+                "date",
+                type=OpenApiTypes.DATE,
+                required=True,
+                description="Departure date (ex. ?date=YYYY-MM-DD)",
+            ),
+            OpenApiParameter(
+                "max_stops",
+                type=OpenApiTypes.INT,
+                description="Stops from 0 to 2 (ex. ?max_stops=1)",
+            ),
+            OpenApiParameter(
+                "min_layover",
+                type=OpenApiTypes.INT,
+                description="Minimal layover in minutes "
+                            "(ex. ?min_layover=45)",
+            ),
+            OpenApiParameter(
+                "max_layover",
+                type=OpenApiTypes.INT,
+                description="Maximal layover in minutes "
+                            "(ex. ?max_layover=360)",
+            ),
+        ]
+    )
+    def list(self, request, *args, **kwargs):
+        search = ItinerarySearchSerializer(data=request.query_params)
+        search.is_valid(raise_exception=True)
+        params = search.validated_data
+
+        itineraries = flight_graph.search(
+            self._airport_ids(params["source"]),
+            self._airport_ids(params["destination"]),
+            params["date"],
+            max_stops=params["max_stops"],
+            min_layover=timedelta(minutes=params["min_layover"]),
+            max_layover=timedelta(minutes=params["max_layover"]),
+        )
+        flights = self.get_queryset().in_bulk(
+            {leg.flight_id for legs in itineraries for leg in legs}
+        )
+
+        results = []
+        for legs in itineraries:
+            itinerary_flights = [flights.get(leg.flight_id) for leg in legs]
+            if not all(map(self._is_current, legs, itinerary_flights)):
+                continue
+            results.append(
+                {
+                    "departure_time": legs[0].departure_time,
+                    "arrival_time": legs[-1].arrival_time,
+                    "duration": (
+                        legs[-1].arrival_time - legs[0].departure_time
+                    ),
+                    "stops": len(legs) - 1,
+                    "flights": itinerary_flights,
+                }
+            )
+        return Response(self.get_serializer(results, many=True).data)
+
+
 class OrderPagination(PageNumberPagination):
     page_size = 5
     page_size_query_param = "page_size"
@@ -271,7 +534,16 @@ class OrderViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         queryset = self.queryset.filter(user=self.request.user)
         if self.action == "list":
-            queryset = queryset.prefetch_related("tickets__flight__airplane")
+            queryset = queryset.prefetch_related(
+                models.Prefetch(
+                    "tickets",
+                    queryset=Ticket.objects.select_related(
+                        "flight__route__source",
+                        "flight__route__destination",
+                        "flight__airplane",
+                    ),
+                )
+            )
         return queryset
 
     def perform_create(self, serializer):
@@ -282,6 +554,25 @@ class OrderViewSet(viewsets.ModelViewSet):
             return OrderListSerializer
         return OrderSerializer
 
+    @action(
+        detail=False,
+        methods=["GET"],
+        url_path="export",
+        renderer_classes=EXPORT_RENDERERS,
+    )
+    def export(self, request):
+        """Stream tickets of the filtered orders as CSV or NDJSON"""
+        orders = self.filter_queryset(self.get_queryset())
+        tickets = Ticket.objects.filter(order__in=orders).order_by(
+            "-order__created_at", "order_id", "row", "seat"
+        )
+        return export_response(
+            request.accepted_renderer,
+            "orders",
+            ORDER_TICKET_EXPORT_COLUMNS,
+            tickets,
+        )
+
     @extend_schema(
         parameters=[
             OpenApiParameter(
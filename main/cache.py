@@ -0,0 +1,14 @@
+"""Version counters kept in the shared cache."""
+from django.core.cache import cache
+
+
+def bump_version(key):
+    """Increment the counter at ``key`` (created at 0, never expires)
+    and return its new value"""
+    cache.add(key, 0, None)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        # evicted between add and incr
+        cache.set(key, 1, None)
+        return 1
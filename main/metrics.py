@@ -0,0 +1,329 @@
+"""Process-local request metrics exposed in Prometheus text format.
+
+Every thread records into its own shard, so recording needs no lock;
+/metrics merges the shards when it is scraped. The shards of finished
+threads are folded into one retired shard, so their counts stay while
+the number of shards follows the live threads. With several worker
+processes each one reports its own numbers.
+
+/metrics answers clients of METRICS_ALLOWED_IPS and staff users only.
+"""
+import bisect
+import ipaddress
+import threading
+import time
+from collections import defaultdict
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.signals import request_started
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import HttpResponse, HttpResponseForbidden
+
+from main.profiling import is_staff_request
+
+LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+
+class Shard:
+    """Counters written by one thread only"""
+
+    def __init__(self):
+        self.requests = defaultdict(int)
+        self.latency = defaultdict(
+            lambda: [0] * (len(LATENCY_BUCKETS) + 1)
+        )
+        self.latency_sum = defaultdict(float)
+        self.queries = defaultdict(
+            lambda: [0] * (len(QUERY_BUCKETS) + 1)
+        )
+        self.queries_total = defaultdict(int)
+        self.query_time = defaultdict(float)
+
+    def add(self, other):
+        for attribute, values in vars(other).items():
+            totals = getattr(self, attribute)
+            for key, value in list(values.items()):
+                if isinstance(value, list):
+                    total = totals[key]
+                    for index, count in enumerate(value):
+                        total[index] += count
+                else:
+                    totals[key] += value
+
+
+class Registry:
+    def __init__(self):
+        self._local = threading.local()
+        # live thread: its shard
+        self._shards = {}
+        self._retired = Shard()
+        self._lock = threading.Lock()
+
+    @property
+    def shard(self):
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = self._local.shard = Shard()
+            with self._lock:
+                self._retire_finished_threads()
+                self._shards[threading.current_thread()] = shard
+        return shard
+
+    def _retire_finished_threads(self):
+        """Fold the shards of finished threads, no one writes them
+        anymore; called with the lock held"""
+        for thread in [
+            thread for thread in self._shards if not thread.is_alive()
+        ]:
+            self._retired.add(self._shards.pop(thread))
+
+    def record(self, view, method, status, duration, queries, query_time):
+        shard = self.shard
+        shard.requests[(view, method, status)] += 1
+        shard.latency[(view, method)][
+            bisect.bisect_left(LATENCY_BUCKETS, duration)
+        ] += 1
+        shard.latency_sum[(view, method)] += duration
+        shard.queries[view][bisect.bisect_left(QUERY_BUCKETS, queries)] += 1
+        shard.queries_total[view] += queries
+        shard.query_time[view] += query_time
+
+    @property
+    def shard_count(self):
+        with self._lock:
+            return len(self._shards)
+
+    def reset(self):
+        with self._lock:
+            self._shards = {}
+            self._retired = Shard()
+            self._local = threading.local()
+
+    def merged(self):
+        """One shard with the counts of all of them"""
+        merged = Shard()
+        with self._lock:
+            self._retire_finished_threads()
+            # the retired shard only changes under the lock
+            for shard in (self._retired, *self._shards.values()):
+                merged.add(shard)
+        return merged
+
+    def render(self):
+        merged = self.merged()
+        lines = []
+        self._counter(
+            lines,
+            "http_requests_total",
+            "Requests by view, method and status.",
+            (
+                ({"view": view, "method": method, "status": status}, count)
+                for (view, method, status), count in sorted(
+                    merged.requests.items()
+                )
+            ),
+        )
+        self._histogram(
+            lines,
+            "http_request_duration_seconds",
+            "Request latency by view and method.",
+            LATENCY_BUCKETS,
+            (
+                (
+                    {"view": view, "method": method},
+                    buckets,
+                    merged.latency_sum[(view, method)],
+                )
+                for (view, method), buckets in sorted(merged.latency.items())
+            ),
+        )
+        self._histogram(
+            lines,
+            "db_queries_per_request",
+            "SQL queries per request by view.",
+            QUERY_BUCKETS,
+            (
+                ({"view": view}, buckets, merged.queries_total[view])
+                for view, buckets in sorted(merged.queries.items())
+            ),
+        )
+        self._counter(
+            lines,
+            "db_query_duration_seconds_total",
+            "Time spent in SQL queries by view.",
+            (
+                ({"view": view}, seconds)
+                for view, seconds in sorted(merged.query_time.items())
+            ),
+        )
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def _labels(labels):
+        return ",".join(
+            '{}="{}"'.format(
+                name,
+                str(value)
+                .replace("\\", "\\\\")
+                .replace('"', '\\"')
+                .replace("\n", "\\n"),
+            )
+            for name, value in labels.items()
+        )
+
+    def _counter(self, lines, name, description, samples):
+        lines.append(f"# HELP {name} {description}")
+        lines.append(f"# TYPE {name} counter")
+        for labels, value in samples:
+            lines.append(f"{name}{{{self._labels(labels)}}} {value}")
+
+    def _histogram(self, lines, name, description, bounds, samples):
+        lines.append(f"# HELP {name} {description}")
+        lines.append(f"# TYPE {name} histogram")
+        for labels, buckets, total in samples:
+            cumulative = 0
+            for bound, count in zip((*bounds, "+Inf"), buckets):
+                cumulative += count
+                bucket_labels = self._labels({**labels, "le": bound})
+                lines.append(f"{name}_bucket{{{bucket_labels}}} {cumulative}")
+            series = self._labels(labels)
+            lines.append(f"{name}_sum{{{series}}} {total}")
+            lines.append(f"{name}_count{{{series}}} {cumulative}")
+
+
+registry = Registry()
+
+
+def view_label(request):
+    """Resolved view name, DRF views as ``FlightViewSet.list``"""
+    match = getattr(request, "resolver_match", None)
+    if match is None:
+        return "unmatched"
+    view_class = getattr(match.func, "cls", None)
+    if view_class is None:
+        return match.view_name
+    actions = getattr(match.func, "actions", None) or {}
+    action = actions.get(request.method.lower(), request.method.lower())
+    return f"{view_class.__name__}.{action}"
+
+
+class QueryTimer:
+    """Counts the queries of a request and their time"""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+
+
+# the timer of the current request; a context variable rather than a
+# wrapper installed per request, because the queries of async views run
+# in another thread (with its own connections) than the middleware
+current_timer = ContextVar("query_timer", default=None)
+
+
+def time_query(execute, sql, params, many, context):
+    timer = current_timer.get()
+    if timer is None:
+        return execute(sql, params, many, context)
+    return timer(execute, sql, params, many, context)
+
+
+def install_query_timer(connection, **kwargs):
+    if time_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(time_query)
+
+
+connection_created.connect(install_query_timer)
+
+
+def install_on_open_connections(**kwargs):
+    """Connections opened before this module was imported"""
+    for connection in connections.all(initialized_only=True):
+        install_query_timer(connection)
+
+
+request_started.connect(install_on_open_connections)
+
+
+class MetricsMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if request.path == "/metrics":
+            return self.get_response(request)
+        timer = QueryTimer()
+        token = current_timer.set(timer)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            current_timer.reset(token)
+        self.record(request, response, time.perf_counter() - start, timer)
+        return response
+
+    async def __acall__(self, request):
+        if request.path == "/metrics":
+            return await self.get_response(request)
+        timer = QueryTimer()
+        token = current_timer.set(timer)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_timer.reset(token)
+        self.record(request, response, time.perf_counter() - start, timer)
+        return response
+
+    @staticmethod
+    def record(request, response, duration, timer):
+        registry.record(
+            view_label(request),
+            request.method,
+            response.status_code,
+            duration,
+            timer.count,
+            timer.duration,
+        )
+
+
+def metrics_allowed(request):
+    try:
+        address = ipaddress.ip_address(request.META.get("REMOTE_ADDR", ""))
+    except ValueError:
+        address = None
+    if address is not None and any(
+        address in ipaddress.ip_network(network, strict=False)
+        for network in settings.METRICS_ALLOWED_IPS
+    ):
+        return True
+    return is_staff_request(request)
+
+
+def metrics_view(request):
+    if not metrics_allowed(request):
+        return HttpResponseForbidden()
+    return HttpResponse(
+        registry.render(), content_type="text/plain; version=0.0.4"
+    )
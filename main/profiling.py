@@ -0,0 +1,108 @@
+"""On-demand cProfile of single requests.
+
+A request is profiled when it carries the ``X-Profile`` header with
+either a token from ``manage.py profile_token`` or any value for a
+staff user. The stats file and a top-N summary are written to
+PROFILE_DIR and the response names them in ``X-Profile-Id``. Requests
+without the header only pay for one header lookup.
+"""
+import cProfile
+import io
+import pstats
+import uuid
+from pathlib import Path
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core import signing
+from django.utils import timezone
+
+PROFILE_HEADER = "HTTP_X_PROFILE"
+PROFILE_SALT = "main.profiling"
+
+
+def make_profile_token():
+    return signing.dumps("profile", salt=PROFILE_SALT)
+
+
+def has_valid_token(value):
+    try:
+        signing.loads(
+            value,
+            salt=PROFILE_SALT,
+            max_age=settings.PROFILE_TOKEN_MAX_AGE,
+        )
+    except signing.BadSignature:
+        return False
+    return True
+
+
+def is_staff_request(request):
+    user = getattr(request, "user", None)
+    if user is not None and user.is_staff:
+        return True
+    # API clients are authenticated by DRF only later, inside the view
+    from user.authentication import CachedJWTAuthentication
+
+    try:
+        authenticated = CachedJWTAuthentication().authenticate(request)
+    except Exception:
+        return False
+    return authenticated is not None and authenticated[0].is_staff
+
+
+def save_profile(profiler, label):
+    """Write the stats and a top-N summary, return the profile id"""
+    directory = Path(settings.PROFILE_DIR)
+    directory.mkdir(parents=True, exist_ok=True)
+    profile_id = (
+        f"{timezone.now():%Y%m%d%H%M%S}-{label}-{uuid.uuid4().hex[:8]}"
+    )
+    profiler.dump_stats(directory / f"{profile_id}.prof")
+    summary = io.StringIO()
+    pstats.Stats(profiler, stream=summary).sort_stats(
+        pstats.SortKey.CUMULATIVE
+    ).print_stats(settings.PROFILE_TOP)
+    (directory / f"{profile_id}.txt").write_text(summary.getvalue())
+    return profile_id
+
+
+class ProfilingMiddleware:
+    """Keep it last in MIDDLEWARE, it runs the view itself.
+
+    Async views are not profiled, cProfile follows one thread and not
+    the coroutines of an event loop.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        # under ASGI this returns the coroutine of the next handler
+        return self.get_response(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        value = request.META.get(PROFILE_HEADER)
+        if not value or iscoroutinefunction(view_func):
+            return None
+        view_class = getattr(view_func, "cls", None)
+        label = view_class.__name__ if view_class else view_func.__name__
+        if settings.PROFILE_VIEWS and label not in settings.PROFILE_VIEWS:
+            return None
+        if not (has_valid_token(value) or is_staff_request(request)):
+            return None
+
+        profiler = cProfile.Profile()
+        response = profiler.runcall(
+            view_func, request, *view_args, **view_kwargs
+        )
+        if hasattr(response, "render") and callable(response.render):
+            # DRF responses are rendered to JSON lazily, after the view
+            response = profiler.runcall(response.render)
+        response["X-Profile-Id"] = save_profile(profiler, label)
+        return response
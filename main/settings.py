@@ -55,6 +55,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "main.metrics.MetricsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -63,8 +64,15 @@ MIDDLEWARE = [
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
     "debug_toolbar.middleware.DebugToolbarMiddleware",
+    "main.profiling.ProfilingMiddleware",
 ]
 
+# the toolbar middleware is sync only: under ASGI it makes every async
+# view run in a thread, so turn it off there with DEBUG_TOOLBAR=0
+DEBUG_TOOLBAR = os.getenv("DEBUG_TOOLBAR", "1") == "1"
+if not DEBUG_TOOLBAR:
+    MIDDLEWARE.remove("debug_toolbar.middleware.DebugToolbarMiddleware")
+
 ROOT_URLCONF = "main.urls"
 
 TEMPLATES = [
@@ -97,6 +105,30 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/4.2/ref/settings/#caches
+# The default LocMemCache lives in one process: model version bumps
+# (response cache, seat maps, fares) and JWT user versions made by
+# another worker or a management command never reach it. Deployments
+# with more than one process must set CACHE_BACKEND to a shared backend,
+# ex. django.core.cache.backends.redis.RedisCache with CACHE_LOCATION
+# redis://host:6379 or django.core.cache.backends.filebased.FileBasedCache
+# with a directory.
+
+CACHES = {
+    "default": {
+        "BACKEND": os.getenv(
+            "CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"
+        ),
+        "LOCATION": os.getenv("CACHE_LOCATION", "airport-service"),
+    }
+}
+
+# seconds a cached reference data response (airports, routes,
+# airplane types, crew) is kept, changes invalidate it earlier
+RESPONSE_CACHE_TIMEOUT = int(os.getenv("RESPONSE_CACHE_TIMEOUT", 60 * 60))
+
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
@@ -151,7 +183,7 @@ AUTH_USER_MODEL = "user.User"
 REST_FRAMEWORK = {
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "user.authentication.CachedJWTAuthentication",
     ),
     "DEFAULT_FILTER_BACKENDS": ("django_filters.rest_framework.DjangoFilterBackend",),
 }
@@ -175,11 +207,101 @@ SIMPLE_JWT = {
     "ROTATE_REFRESH_TOKENS": True,
 }
 
+# async token endpoint (user/token/async/): threads checking passwords
+# and logins waiting for one, more are answered with 429
+LOGIN_WORKERS = int(os.getenv("LOGIN_WORKERS", 2))
+LOGIN_QUEUE_SIZE = int(os.getenv("LOGIN_QUEUE_SIZE", 32))
+
+# resolved JWT users are kept in process for a short time, changes of
+# the user invalidate them earlier
+JWT_USER_CACHE_TTL = int(os.getenv("JWT_USER_CACHE_TTL", 60))
+JWT_USER_CACHE_SIZE = int(os.getenv("JWT_USER_CACHE_SIZE", 1024))
+
+# addresses or networks that may read /metrics (staff users always can),
+# ex. 127.0.0.1,10.0.0.0/8
+METRICS_ALLOWED_IPS = [
+    network
+    for network in os.getenv("METRICS_ALLOWED_IPS", "127.0.0.1,::1").split(",")
+    if network
+]
+
+# requests with the X-Profile header (staff or a profile_token) are run
+# under cProfile, stats and summaries go to PROFILE_DIR
+PROFILE_DIR = os.getenv("PROFILE_DIR", BASE_DIR / "profiles")
+PROFILE_TOP = int(os.getenv("PROFILE_TOP", 30))
+PROFILE_TOKEN_MAX_AGE = int(os.getenv("PROFILE_TOKEN_MAX_AGE", 60 * 60))
+# view classes that may be profiled (ex. FlightViewSet,OrderViewSet),
+# empty for all
+PROFILE_VIEWS = [
+    view for view in os.getenv("PROFILE_VIEWS", "").split(",") if view
+]
+
+# async read endpoints (airport/async/...): requests of a process that
+# load rows at the same time, and how long the others wait for a slot
+# before they are answered with 503
+ASYNC_DB_CONCURRENCY = int(os.getenv("ASYNC_DB_CONCURRENCY", 10))
+ASYNC_DB_QUEUE_TIMEOUT = float(os.getenv("ASYNC_DB_QUEUE_TIMEOUT", 10))
+
 
 STRIPE_PUBLIC_KEY = os.getenv("STRIPE_PUBLIC_KEY")
 STRIPE_SECRET_KEY = os.getenv("STRIPE_SECRET_KEY")
 STRIPE_WEBHOOK_SECRET = os.getenv("STRIPE_WEBHOOK_SECRET")
+STRIPE_API_BASE = os.getenv("STRIPE_API_BASE", "https://api.stripe.com")
+# shared Stripe client (payments.client): pooled connections, timeouts
+# in seconds, retries of idempotent calls and a circuit breaker that
+# refuses calls for a while when STRIPE_BREAKER_ERROR_RATE of at least
+# STRIPE_BREAKER_MIN_CALLS calls in STRIPE_BREAKER_WINDOW seconds failed
+STRIPE_POOL_SIZE = int(os.getenv("STRIPE_POOL_SIZE", 10))
+STRIPE_CONNECT_TIMEOUT = float(os.getenv("STRIPE_CONNECT_TIMEOUT", 3.05))
+STRIPE_READ_TIMEOUT = float(os.getenv("STRIPE_READ_TIMEOUT", 10))
+STRIPE_MAX_RETRIES = int(os.getenv("STRIPE_MAX_RETRIES", 2))
+STRIPE_RETRY_BASE = float(os.getenv("STRIPE_RETRY_BASE", 0.25))
+STRIPE_RETRY_MAX = float(os.getenv("STRIPE_RETRY_MAX", 2))
+STRIPE_BREAKER_ERROR_RATE = float(
+    os.getenv("STRIPE_BREAKER_ERROR_RATE", 0.5)
+)
+STRIPE_BREAKER_MIN_CALLS = int(os.getenv("STRIPE_BREAKER_MIN_CALLS", 10))
+STRIPE_BREAKER_WINDOW = float(os.getenv("STRIPE_BREAKER_WINDOW", 30))
+STRIPE_BREAKER_RESET_TIMEOUT = float(
+    os.getenv("STRIPE_BREAKER_RESET_TIMEOUT", 30)
+)
+# stored webhook events that can not be applied yet are retried after
+# STRIPE_EVENT_RETRY_BASE * 2^n seconds (jittered, capped)
+STRIPE_EVENT_MAX_ATTEMPTS = int(os.getenv("STRIPE_EVENT_MAX_ATTEMPTS", 10))
+STRIPE_EVENT_RETRY_BASE = float(os.getenv("STRIPE_EVENT_RETRY_BASE", 5))
+STRIPE_EVENT_RETRY_MAX = float(os.getenv("STRIPE_EVENT_RETRY_MAX", 60 * 60))
 PRODUCT_PRICE = os.getenv("PRODUCT_PRICE")
 
+# ticket fares (airport.pricing) in the smallest currency unit: route
+# fare FARE_BASE + FARE_PER_KM * distance, times the multiplier of the
+# seat's row band ("last row:multiplier,..."), times 1 + FARE_LOAD_SURCHARGE
+# * share of the flight's seats already sold
+FARE_CURRENCY = os.getenv("FARE_CURRENCY", "usd")
+FARE_BASE = int(os.getenv("FARE_BASE", 5000))
+FARE_PER_KM = float(os.getenv("FARE_PER_KM", 10))
+FARE_ROW_BANDS = [
+    (int(last_row), float(multiplier))
+    for last_row, multiplier in (
+        band.split(":")
+        for band in os.getenv("FARE_ROW_BANDS", "3:2.5,10:1.25").split(",")
+        if band
+    )
+]
+FARE_LOAD_SURCHARGE = float(os.getenv("FARE_LOAD_SURCHARGE", 1))
+
+# bulk user import (user.bulk_import): users saved per transaction and
+# password hashing processes (default: CPU count)
+USER_IMPORT_BATCH_SIZE = int(os.getenv("USER_IMPORT_BATCH_SIZE", 1000))
+USER_IMPORT_WORKERS = int(os.getenv("USER_IMPORT_WORKERS", 0)) or None
+# uploads to /user/import/ (at most USER_IMPORT_MAX_SIZE bytes) are kept
+# here until the background import_users run is done, with its report
+USER_IMPORT_DIR = os.getenv("USER_IMPORT_DIR", BASE_DIR / "imports")
+USER_IMPORT_MAX_SIZE = int(
+    os.getenv("USER_IMPORT_MAX_SIZE", 50 * 1024 * 1024)
+)
+
+# seconds a seat stays held for the buyer during checkout
+SEAT_HOLD_TTL = int(os.getenv("SEAT_HOLD_TTL", 15 * 60))
+
 
 REDIRECT_DOMAIN = "http://127.0.0.1:8000"
@@ -8,12 +8,15 @@ from drf_spectacular.views import (
     SpectacularRedocView,
 )
 
+from main.metrics import metrics_view
+
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("user/", include("user.urls")),
     path("airport/", include("airport.urls")),
     path("payments/", include("payments.urls")),
     path("__debug__/", include("debug_toolbar.urls")),
+    path("metrics", metrics_view, name="metrics"),
     path("schema/", SpectacularAPIView.as_view(), name="schema"),
     path(
         "doc/swagger/",
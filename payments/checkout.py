@@ -0,0 +1,86 @@
+"""Local records of Stripe checkout sessions and customers.
+
+Sessions are saved when product_page creates them and updated from
+webhook events, so payment_successful renders without calling Stripe;
+it only loads a session from Stripe when the local record is missing
+or does not know its customer yet.
+"""
+import stripe
+from django.conf import settings
+
+from payments.models import CheckoutSession, StripeCustomer
+
+
+def save_customer(customer_id, email=None, name=None):
+    if not customer_id:
+        return None
+    defaults = {
+        key: value
+        for key, value in (("email", email), ("name", name))
+        if value
+    }
+    customer, _ = StripeCustomer.objects.update_or_create(
+        customer_id=customer_id, defaults=defaults
+    )
+    return customer
+
+
+def save_checkout_session(session, user=None, order=None):
+    """Create or update the local copy of a Stripe session (object or
+    event payload), its customer may be an id or expanded"""
+    customer = session.get("customer")
+    if customer is None or isinstance(customer, str):
+        details = session.get("customer_details") or {}
+        customer = save_customer(
+            customer, details.get("email"), details.get("name")
+        )
+    else:
+        customer = save_customer(
+            customer["id"], customer.get("email"), customer.get("name")
+        )
+    defaults = {
+        "status": session.get("status") or "",
+        "payment_status": session.get("payment_status") or "",
+        "amount_total": session.get("amount_total"),
+        "currency": session.get("currency") or "",
+        "url": session.get("url") or "",
+    }
+    if customer is not None:
+        defaults["customer"] = customer
+    if user is not None:
+        defaults["user"] = user
+    if order is not None:
+        defaults["order"] = order
+    checkout, _ = CheckoutSession.objects.update_or_create(
+        session_id=session["id"], defaults=defaults
+    )
+    return checkout
+
+
+def get_checkout_session(session_id):
+    """Local session with its customer, loaded from Stripe on a miss;
+    a partial local record is returned while Stripe is unavailable"""
+    checkout = (
+        CheckoutSession.objects.select_related("customer")
+        .filter(session_id=session_id)
+        .first()
+    )
+    if checkout is not None and checkout.customer is not None:
+        return checkout
+    try:
+        session = stripe.checkout.Session.retrieve(
+            session_id,
+            api_key=settings.STRIPE_SECRET_KEY,
+            expand=["customer"],
+        )
+    except stripe.error.APIConnectionError:
+        if checkout is None:
+            raise
+        return checkout
+    return save_checkout_session(session)
+
+
+def order_is_paid(order):
+    return CheckoutSession.objects.filter(
+        order=order, payment_status="paid"
+    ).exists()
@@ -0,0 +1,212 @@
+"""Shared HTTP client of the stripe library.
+
+One pooled requests session is shared by every thread and requests have
+bounded connect and read timeouts. GET and DELETE calls and calls with
+an Idempotency-Key (the stripe library adds one to every POST) are
+retried with jittered exponential backoff. A circuit breaker fails calls
+fast while Stripe errors out, instead of letting them pile up on worker
+threads.
+"""
+import random
+import threading
+import time
+from collections import deque
+
+import requests
+import stripe
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from stripe.http_client import RequestsClient
+
+IDEMPOTENT_METHODS = ("get", "delete")
+
+
+class CircuitOpenError(stripe.error.APIConnectionError):
+    def __init__(self):
+        super().__init__(
+            "Stripe calls are failing, not calling it for now.",
+            should_retry=False,
+        )
+
+
+class CircuitBreaker:
+    """Opens when at least ``min_calls`` calls of the last ``window``
+    seconds were made and ``error_rate`` of them failed. While open,
+    calls are refused; after ``reset_timeout`` seconds one trial call is
+    let through and its outcome closes or opens the circuit again.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half-open"
+
+    def __init__(
+        self,
+        error_rate=0.5,
+        min_calls=10,
+        window=30.0,
+        reset_timeout=30.0,
+        clock=time.monotonic,
+    ):
+        self.error_rate = error_rate
+        self.min_calls = min_calls
+        self.window = window
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.state = self.CLOSED
+        self._calls = deque()
+        self._failures = 0
+        self._opened_at = None
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.state == self.OPEN:
+                if self.clock() - self._opened_at < self.reset_timeout:
+                    return False
+                self.state = self.HALF_OPEN
+                self._trial_running = False
+            if self.state == self.HALF_OPEN:
+                if self._trial_running:
+                    return False
+                self._trial_running = True
+            return True
+
+    def record(self, success):
+        with self._lock:
+            now = self.clock()
+            if self.state == self.HALF_OPEN:
+                self._trial_running = False
+                if success:
+                    self.state = self.CLOSED
+                else:
+                    self._open(now)
+                return
+            if self.state == self.OPEN:
+                # a call started before the circuit opened
+                return
+            self._calls.append((now, not success))
+            self._failures += not success
+            while self._calls and self._calls[0][0] <= now - self.window:
+                _, failed = self._calls.popleft()
+                self._failures -= failed
+            if (
+                len(self._calls) >= self.min_calls
+                and self._failures >= self.error_rate * len(self._calls)
+            ):
+                self._open(now)
+
+    def _open(self, now):
+        self.state = self.OPEN
+        self._opened_at = now
+        self._calls.clear()
+        self._failures = 0
+
+
+class StripeHttpClient(RequestsClient):
+    def __init__(
+        self,
+        connect_timeout=3.05,
+        read_timeout=10.0,
+        max_retries=2,
+        retry_base=0.25,
+        retry_max=2.0,
+        pool_size=10,
+        breaker=None,
+    ):
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        super().__init__(
+            timeout=(connect_timeout, read_timeout), session=session
+        )
+        self.max_retries = max_retries
+        self.retry_base = retry_base
+        self.retry_max = retry_max
+        self.breaker = breaker or CircuitBreaker()
+
+    def request(self, method, url, headers, post_data=None):
+        """One attempt, refused while the circuit is open"""
+        if not self.breaker.allow():
+            raise CircuitOpenError()
+        try:
+            response = super().request(method, url, headers, post_data)
+        except stripe.error.APIConnectionError:
+            self.breaker.record(False)
+            raise
+        status = response[1]
+        self.breaker.record(status < 500 and status != 429)
+        return response
+
+    def request_with_retries(self, method, url, headers, post_data=None):
+        attempt = 0
+        while True:
+            try:
+                response = self.request(method, url, headers, post_data)
+            except stripe.error.APIConnectionError as error:
+                if not (
+                    error.should_retry
+                    and self.can_retry(attempt, method, headers)
+                ):
+                    raise
+                response = None
+            else:
+                if not (
+                    self.should_retry(response)
+                    and self.can_retry(attempt, method, headers)
+                ):
+                    return response
+            attempt += 1
+            time.sleep(self.retry_delay(attempt, response))
+
+    def can_retry(self, attempt, method, headers):
+        return attempt < self.max_retries and (
+            method.lower() in IDEMPOTENT_METHODS
+            or "Idempotency-Key" in headers
+        )
+
+    @staticmethod
+    def should_retry(response):
+        _, status, response_headers = response
+        should_retry = response_headers.get("Stripe-Should-Retry")
+        if should_retry is not None:
+            return should_retry == "true"
+        return status in (409, 429) or status >= 500
+
+    def retry_delay(self, attempt, response=None):
+        """Full jitter over the capped exponential backoff, at least the
+        Retry-After of a response"""
+        backoff = min(self.retry_base * 2 ** (attempt - 1), self.retry_max)
+        delay = random.uniform(0, backoff)
+        if response is not None:
+            try:
+                retry_after = float(response[2].get("Retry-After"))
+            except (TypeError, ValueError):
+                retry_after = 0
+            delay = max(delay, min(retry_after, self.retry_max))
+        return delay
+
+
+def build_client():
+    return StripeHttpClient(
+        connect_timeout=settings.STRIPE_CONNECT_TIMEOUT,
+        read_timeout=settings.STRIPE_READ_TIMEOUT,
+        max_retries=settings.STRIPE_MAX_RETRIES,
+        retry_base=settings.STRIPE_RETRY_BASE,
+        retry_max=settings.STRIPE_RETRY_MAX,
+        pool_size=settings.STRIPE_POOL_SIZE,
+        breaker=CircuitBreaker(
+            error_rate=settings.STRIPE_BREAKER_ERROR_RATE,
+            min_calls=settings.STRIPE_BREAKER_MIN_CALLS,
+            window=settings.STRIPE_BREAKER_WINDOW,
+            reset_timeout=settings.STRIPE_BREAKER_RESET_TIMEOUT,
+        ),
+    )
+
+
+def install():
+    """Make the stripe library use the shared client"""
+    stripe.default_http_client = build_client()
+    stripe.api_base = settings.STRIPE_API_BASE
@@ -0,0 +1,116 @@
+"""Applying stored Stripe webhook events.
+
+The webhook only verifies and stores events; ``process_due_events``
+applies them. An event that can not be applied yet (ex. the checkout
+session is unknown here and no payment has stored its id) is
+retried with exponential backoff and jitter, at most
+STRIPE_EVENT_MAX_ATTEMPTS times.
+"""
+import random
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from payments.checkout import save_checkout_session, save_customer
+from payments.models import StripeEvent, UserPayment
+
+
+class RetryLater(Exception):
+    """The event can not be applied yet"""
+
+
+def checkout_session_completed(event):
+    session = event["data"]["object"]
+    checkout = save_checkout_session(session)
+    updated = UserPayment.objects.filter(
+        stripe_checkout_id=checkout.session_id
+    ).update(payment_bool=True)
+    if not updated and checkout.user_id is not None:
+        # the buyer has not reached payment_successful yet
+        updated = UserPayment.objects.filter(app_user=checkout.user_id).update(
+            stripe_checkout_id=checkout.session_id, payment_bool=True
+        )
+    if not updated:
+        raise RetryLater(
+            f"No payment with checkout session {checkout.session_id}"
+        )
+
+
+def customer_changed(event):
+    customer = event["data"]["object"]
+    save_customer(customer["id"], customer.get("email"), customer.get("name"))
+
+
+HANDLERS = {
+    "checkout.session.completed": checkout_session_completed,
+    "customer.created": customer_changed,
+    "customer.updated": customer_changed,
+}
+
+
+def retry_delay(attempts):
+    """Seconds before the next attempt, full jitter over the backoff"""
+    backoff = min(
+        settings.STRIPE_EVENT_RETRY_BASE * 2 ** (attempts - 1),
+        settings.STRIPE_EVENT_RETRY_MAX,
+    )
+    return random.uniform(backoff / 2, backoff)
+
+
+def process_event(event):
+    """Apply one locked pending event and record the outcome"""
+    handler = HANDLERS.get(event.event_type)
+    event.attempts += 1
+    try:
+        with transaction.atomic():
+            if handler is not None:
+                handler(event.payload)
+    except Exception as error:
+        event.last_error = f"{type(error).__name__}: {error}"
+        if event.attempts >= settings.STRIPE_EVENT_MAX_ATTEMPTS:
+            event.status = StripeEvent.Status.FAILED
+        else:
+            event.next_attempt_at = timezone.now() + timedelta(
+                seconds=retry_delay(event.attempts)
+            )
+    else:
+        event.status = StripeEvent.Status.PROCESSED
+        event.processed_at = timezone.now()
+        event.last_error = ""
+    event.save(
+        update_fields=[
+            "status",
+            "attempts",
+            "next_attempt_at",
+            "last_error",
+            "processed_at",
+        ]
+    )
+    return event.status == StripeEvent.Status.PROCESSED
+
+
+def process_due_events(limit=100):
+    """Process pending events whose attempt is due, return
+    (processed, not processed) counts"""
+    processed = failed = 0
+    for _ in range(limit):
+        with transaction.atomic():
+            # skip_locked lets several processors share the inbox
+            event = (
+                StripeEvent.objects.select_for_update(skip_locked=True)
+                .filter(
+                    status=StripeEvent.Status.PENDING,
+                    next_attempt_at__lte=timezone.now(),
+                )
+                .order_by("next_attempt_at", "pk")
+                .first()
+            )
+            if event is None:
+                break
+            if process_event(event):
+                processed += 1
+            else:
+                failed += 1
+    return processed, failed
@@ -0,0 +1,38 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from payments.inbox import process_due_events
+
+
+class Command(BaseCommand):
+    help = (  # noqa: VNE003
+        "Apply the stored Stripe webhook events, retrying the ones that "
+        "can not be applied yet"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Process the due events and exit",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=2.0,
+            help="Seconds between polls of the inbox",
+        )
+        parser.add_argument("--batch-size", type=int, default=100)
+
+    def handle(self, *args, **options):
+        while True:
+            processed, failed = process_due_events(options["batch_size"])
+            if processed or failed:
+                self.stdout.write(
+                    f"{processed} event(s) processed, {failed} failed"
+                )
+            if options["once"]:
+                return
+            if processed + failed < options["batch_size"]:
+                time.sleep(options["interval"])
@@ -0,0 +1,25 @@
+# Generated by Django 4.2.4 on 2026-10-18 05:39
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("airport", "0014_updated_at"),
+        ("payments", "0003_checkout_session"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="checkoutsession",
+            name="order",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="checkout_sessions",
+                to="airport.order",
+            ),
+        ),
+    ]
@@ -1,4 +1,6 @@
 from django.db import models
+from django.utils import timezone
+from airport.models import Order
 from user.models import User
 from django.dispatch import receiver
 from django.db.models.signals import post_save
@@ -10,6 +12,89 @@ class UserPayment(models.Model):
     stripe_checkout_id = models.CharField(max_length=500)
 
 
+class StripeCustomer(models.Model):
+    """Local copy of a Stripe customer"""
+
+    customer_id = models.CharField(max_length=255, unique=True)
+    email = models.EmailField(blank=True)
+    name = models.CharField(max_length=255, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return self.name or self.email or self.customer_id
+
+
+class CheckoutSession(models.Model):
+    """Local copy of a Stripe checkout session, saved when it is created
+    and updated from webhook events"""
+
+    session_id = models.CharField(max_length=255, unique=True)
+    user = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="checkout_sessions",
+    )
+    customer = models.ForeignKey(
+        StripeCustomer,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="checkout_sessions",
+    )
+    order = models.ForeignKey(
+        Order,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="checkout_sessions",
+    )
+    status = models.CharField(max_length=32, blank=True)
+    payment_status = models.CharField(max_length=32, blank=True)
+    amount_total = models.PositiveBigIntegerField(null=True, blank=True)
+    currency = models.CharField(max_length=3, blank=True)
+    url = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return self.session_id
+
+
+class StripeEvent(models.Model):
+    """Verified webhook event, stored once per Stripe event id and
+    applied later by the process_stripe_events command"""
+
+    class Status(models.TextChoices):
+        PENDING = "pending"
+        PROCESSED = "processed"
+        FAILED = "failed"
+
+    event_id = models.CharField(max_length=255, unique=True)
+    event_type = models.CharField(max_length=255)
+    payload = models.JSONField()
+    status = models.CharField(
+        max_length=16, choices=Status.choices, default=Status.PENDING
+    )
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["status", "next_attempt_at"],
+                name="stripe_event_due_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.event_type} {self.event_id}"
+
+
 @receiver(post_save, sender=User)
 def create_user_payment(sender, instance, created, **kwargs):
     if created:
@@ -0,0 +1,171 @@
+"""Local HTTP server standing in for the Stripe API in tests.
+
+Point the stripe library at it with ``stripe.api_base = stub.url``; it
+answers the checkout session and customer calls of the payments app
+from memory and records every request. ``fail`` queues error responses
+and ``delay`` slows every answer down, to exercise the client's retries,
+timeouts and circuit breaker.
+"""
+import json
+import re
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from itertools import count
+from urllib.parse import parse_qs, urlsplit
+
+
+class Server(ThreadingHTTPServer):
+    def handle_error(self, request, client_address):
+        # clients that timed out hang up before the answer
+        pass
+
+
+class StripeStub:
+    def __init__(self):
+        self.sessions = {}
+        self.customers = {}
+        self.requests = []
+        # headers and client address of every request, in order
+        self.received = []
+        self.failures = deque()
+        self.delay = 0
+        self._ids = count(1)
+        self._server = None
+
+    def __enter__(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            # keep-alive, as the Stripe API
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                stub.handle(self)
+
+            def do_POST(self):
+                stub.handle(self)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = Server(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self._server.server_port}"
+        threading.Thread(
+            target=self._server.serve_forever,
+            kwargs={"poll_interval": 0.05},
+            daemon=True,
+        ).start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def create_session(self, params):
+        session_id = f"cs_test_{next(self._ids)}"
+        amount = params.get("line_items[0][price_data][unit_amount]", 1000)
+        self.sessions[session_id] = {
+            "id": session_id,
+            "object": "checkout.session",
+            "status": "open",
+            "payment_status": "unpaid",
+            "amount_total": int(amount),
+            "currency": "usd",
+            "customer": None,
+            "customer_details": None,
+            "url": f"https://checkout.stripe.test/pay/{session_id}",
+            "success_url": params.get("success_url"),
+        }
+        return self.sessions[session_id]
+
+    def complete_session(self, session_id, email, name):
+        """Pay the session as Stripe does, return the webhook event"""
+        customer_id = f"cus_test_{next(self._ids)}"
+        self.customers[customer_id] = {
+            "id": customer_id,
+            "object": "customer",
+            "email": email,
+            "name": name,
+        }
+        session = self.sessions[session_id]
+        session.update(
+            status="complete",
+            payment_status="paid",
+            customer=customer_id,
+            customer_details={"email": email, "name": name},
+            url=None,
+        )
+        return {
+            "id": f"evt_test_{next(self._ids)}",
+            "object": "event",
+            "type": "checkout.session.completed",
+            "data": {"object": dict(session)},
+        }
+
+    def fail(self, status, times=1, headers=None):
+        """Answer the next ``times`` requests with an error"""
+        for _ in range(times):
+            self.failures.append((status, headers or {}))
+
+    def handle(self, request):
+        url = urlsplit(request.path)
+        self.requests.append((request.command, url.path))
+        self.received.append(
+            {
+                "headers": dict(request.headers),
+                "client_address": request.client_address,
+            }
+        )
+        if self.delay:
+            time.sleep(self.delay)
+        if request.command == "POST":
+            length = int(request.headers.get("Content-Length") or 0)
+            params = parse_qs(request.rfile.read(length).decode())
+        else:
+            params = parse_qs(url.query)
+        params = {
+            key: values[0] if len(values) == 1 else values
+            for key, values in params.items()
+        }
+        extra_headers = {}
+        try:
+            status, extra_headers = self.failures.popleft()
+            body = {
+                "error": {
+                    "type": "api_error",
+                    "message": f"Stub failure {status}",
+                }
+            }
+        except IndexError:
+            status, body = self.route(request.command, url.path, params)
+        content = json.dumps(body).encode()
+        request.send_response(status)
+        for header, value in extra_headers.items():
+            request.send_header(header, value)
+        request.send_header("Content-Type", "application/json")
+        request.send_header("Content-Length", str(len(content)))
+        request.send_header("Request-Id", f"req_test_{next(self._ids)}")
+        request.end_headers()
+        request.wfile.write(content)
+
+    def route(self, method, path, params):
+        if method == "POST" and path == "/v1/checkout/sessions":
+            return 200, self.create_session(params)
+        match = re.fullmatch(r"/v1/checkout/sessions/([\w-]+)", path)
+        if method == "GET" and match and match.group(1) in self.sessions:
+            session = dict(self.sessions[match.group(1)])
+            expand = params.get("expand[0]")
+            if expand == "customer" and session["customer"]:
+                session["customer"] = self.customers[session["customer"]]
+            return 200, session
+        match = re.fullmatch(r"/v1/customers/([\w-]+)", path)
+        if method == "GET" and match and match.group(1) in self.customers:
+            return 200, self.customers[match.group(1)]
+        return 404, {
+            "error": {
+                "type": "invalid_request_error",
+                "message": f"No such resource: {path}",
+            }
+        }
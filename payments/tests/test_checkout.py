@@ -0,0 +1,200 @@
+import json
+
+import stripe
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from airport.models import Order
+from payments.inbox import process_due_events
+from payments.models import CheckoutSession, StripeEvent, UserPayment
+from payments.tests.stripe_stub import StripeStub
+from payments.tests.test_webhook import WEBHOOK_SECRET, sign
+
+PRODUCT_URL = reverse("product_page")
+SUCCESS_URL = reverse("payment_successful")
+
+
+@override_settings(
+    STRIPE_SECRET_KEY="sk_test_stub",
+    STRIPE_WEBHOOK_SECRET=WEBHOOK_SECRET,
+    PRODUCT_PRICE="price_test",
+    FARE_CURRENCY="usd",
+)
+class CheckoutSessionTests(TestCase):
+    def setUp(self):
+        self.stub = StripeStub().__enter__()
+        self.addCleanup(self.stub.__exit__, None, None, None)
+        api_base = stripe.api_base
+        stripe.api_base = self.stub.url
+        self.addCleanup(setattr, stripe, "api_base", api_base)
+
+        self.user = get_user_model().objects.create_user(
+            "buyer@buyer.com",
+            "buyer12345",
+        )
+        self.client.force_login(self.user)
+
+    def checkout(self):
+        res = self.client.post(PRODUCT_URL)
+        checkout = CheckoutSession.objects.get()
+        self.assertRedirects(
+            res, checkout.url, status_code=302, fetch_redirect_response=False
+        )
+        return checkout
+
+    def deliver(self, event):
+        payload = json.dumps(event)
+        self.client.post(
+            reverse("stripe_webhook"),
+            payload,
+            content_type="application/json",
+            HTTP_STRIPE_SIGNATURE=sign(payload),
+        )
+        process_due_events()
+
+    def test_created_session_is_saved(self):
+        checkout = self.checkout()
+
+        self.assertEqual(checkout.user, self.user)
+        self.assertEqual(checkout.status, "open")
+        self.assertTrue(checkout.url.endswith(checkout.session_id))
+        self.assertIsNone(checkout.customer)
+
+    def test_success_page_renders_from_local_records(self):
+        checkout = self.checkout()
+        self.deliver(
+            self.stub.complete_session(
+                checkout.session_id, "buyer@buyer.com", "Anna Melnyk"
+            )
+        )
+        self.stub.requests.clear()
+
+        res = self.client.get(SUCCESS_URL, {"session_id": checkout.session_id})
+
+        self.assertContains(res, "Thanks for your order Anna Melnyk!")
+        self.assertEqual(self.stub.requests, [])
+        checkout.refresh_from_db()
+        self.assertEqual(checkout.status, "complete")
+        self.assertEqual(checkout.customer.email, "buyer@buyer.com")
+
+    def test_success_page_loads_unknown_customer_from_stripe_once(self):
+        checkout = self.checkout()
+        # paid, but the webhook event has not been processed yet
+        self.stub.complete_session(
+            checkout.session_id, "buyer@buyer.com", "Anna Melnyk"
+        )
+        self.stub.requests.clear()
+
+        for _ in range(2):
+            res = self.client.get(
+                SUCCESS_URL, {"session_id": checkout.session_id}
+            )
+            self.assertContains(res, "Anna Melnyk")
+
+        self.assertEqual(
+            self.stub.requests,
+            [("GET", f"/v1/checkout/sessions/{checkout.session_id}")],
+        )
+        payment = UserPayment.objects.get(app_user=self.user)
+        self.assertEqual(payment.stripe_checkout_id, checkout.session_id)
+
+    def test_order_is_charged_its_price(self):
+        order = Order.objects.create(user=self.user, price=45000)
+
+        res = self.client.get(PRODUCT_URL, {"order": order.id})
+        self.assertContains(res, "450.00 USD")
+
+        res = self.client.post(PRODUCT_URL, {"order": order.id})
+        checkout = CheckoutSession.objects.get()
+        self.assertEqual(checkout.amount_total, 45000)
+        self.assertEqual(checkout.currency, "usd")
+
+    def test_invalid_order_id_is_not_found(self):
+        for order_id in ("abc", "1.5", "１x"):
+            with self.subTest(order_id=order_id):
+                res = self.client.get(PRODUCT_URL, {"order": order_id})
+                self.assertEqual(res.status_code, 404)
+
+    def test_paid_order_is_not_charged_again(self):
+        order = Order.objects.create(user=self.user, price=45000)
+        self.client.post(PRODUCT_URL, {"order": order.id})
+        checkout = CheckoutSession.objects.get()
+        self.assertEqual(checkout.order, order)
+        self.deliver(
+            self.stub.complete_session(
+                checkout.session_id, "buyer@buyer.com", "Anna Melnyk"
+            )
+        )
+        self.stub.requests.clear()
+
+        res = self.client.get(PRODUCT_URL, {"order": order.id})
+        self.assertContains(res, "This order is already paid.")
+        self.assertNotContains(res, "Payment</button>")
+
+        res = self.client.post(PRODUCT_URL, {"order": order.id})
+        self.assertEqual(res.status_code, 409)
+        self.assertEqual(self.stub.requests, [])
+        self.assertEqual(CheckoutSession.objects.count(), 1)
+
+    def test_other_users_order_is_not_found(self):
+        other = get_user_model().objects.create_user(
+            "other@other.com", "other12345"
+        )
+        order = Order.objects.create(user=other, price=45000)
+
+        res = self.client.post(PRODUCT_URL, {"order": order.id})
+
+        self.assertEqual(res.status_code, 404)
+        self.assertEqual(self.stub.requests, [])
+
+    def test_unknown_session(self):
+        res = self.client.get(SUCCESS_URL, {"session_id": "cs_missing"})
+        self.assertEqual(res.status_code, 404)
+
+        res = self.client.get(SUCCESS_URL)
+        self.assertEqual(res.status_code, 404)
+
+    def test_payment_is_marked_before_the_success_page(self):
+        checkout = self.checkout()
+
+        self.deliver(
+            self.stub.complete_session(
+                checkout.session_id, "buyer@buyer.com", "Anna Melnyk"
+            )
+        )
+
+        payment = UserPayment.objects.get(app_user=self.user)
+        self.assertTrue(payment.payment_bool)
+        self.assertEqual(payment.stripe_checkout_id, checkout.session_id)
+        self.assertEqual(
+            StripeEvent.objects.get().status, StripeEvent.Status.PROCESSED
+        )
+
+    def test_customer_events_update_the_customer(self):
+        checkout = self.checkout()
+        self.deliver(
+            self.stub.complete_session(
+                checkout.session_id, "buyer@buyer.com", "Anna Melnyk"
+            )
+        )
+        checkout.refresh_from_db()
+
+        self.deliver(
+            {
+                "id": "evt_customer",
+                "object": "event",
+                "type": "customer.updated",
+                "data": {
+                    "object": {
+                        "id": checkout.customer.customer_id,
+                        "object": "customer",
+                        "email": "buyer@buyer.com",
+                        "name": "Anna Kovalenko",
+                    }
+                },
+            }
+        )
+
+        checkout.customer.refresh_from_db()
+        self.assertEqual(checkout.customer.name, "Anna Kovalenko")
@@ -0,0 +1,212 @@
+import stripe
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from payments.client import CircuitBreaker, CircuitOpenError, StripeHttpClient
+from payments.models import CheckoutSession
+from payments.tests.stripe_stub import StripeStub
+
+API_KEY = "sk_test_stub"
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class StubMixin:
+    def setUp(self):
+        self.stub = StripeStub().__enter__()
+        self.addCleanup(self.stub.__exit__, None, None, None)
+        api_base = stripe.api_base
+        stripe.api_base = self.stub.url
+        self.addCleanup(setattr, stripe, "api_base", api_base)
+        self.clock = Clock()
+        self.http_client = self.install()
+
+    def install(self, **kwargs):
+        kwargs.setdefault("retry_base", 0.01)
+        kwargs.setdefault("retry_max", 0.02)
+        kwargs.setdefault(
+            "breaker",
+            CircuitBreaker(
+                min_calls=4, window=60, reset_timeout=30, clock=self.clock
+            ),
+        )
+        http_client = StripeHttpClient(**kwargs)
+        default = stripe.default_http_client
+        stripe.default_http_client = http_client
+        self.addCleanup(setattr, stripe, "default_http_client", default)
+        return http_client
+
+    def create(self):
+        return stripe.checkout.Session.create(
+            api_key=API_KEY, mode="payment", success_url="https://x.test"
+        )
+
+    def retrieve(self, session_id):
+        return stripe.checkout.Session.retrieve(session_id, api_key=API_KEY)
+
+
+class StripeHttpClientTests(StubMixin, SimpleTestCase):
+    def test_connections_are_reused(self):
+        session = self.create()
+        for _ in range(3):
+            self.retrieve(session.id)
+
+        ports = {request["client_address"] for request in self.stub.received}
+        self.assertEqual(len(self.stub.received), 4)
+        self.assertEqual(len(ports), 1)
+
+    def test_server_errors_are_retried(self):
+        session = self.create()
+        self.stub.fail(503, times=2)
+
+        self.assertEqual(self.retrieve(session.id).id, session.id)
+        self.assertEqual(len(self.stub.requests), 4)
+
+    def test_retries_are_limited(self):
+        session = self.create()
+        self.stub.fail(500, times=5)
+
+        with self.assertRaises(stripe.error.APIError):
+            self.retrieve(session.id)
+        # one call and two retries
+        self.assertEqual(len(self.stub.requests), 4)
+
+    def test_client_errors_are_not_retried(self):
+        self.stub.fail(400)
+
+        with self.assertRaises(stripe.error.InvalidRequestError):
+            self.create()
+        self.assertEqual(len(self.stub.requests), 1)
+
+    def test_post_retries_reuse_the_idempotency_key(self):
+        self.stub.fail(429, headers={"Retry-After": "0"})
+
+        self.create()
+
+        keys = [
+            request["headers"]["Idempotency-Key"]
+            for request in self.stub.received
+        ]
+        self.assertEqual(len(keys), 2)
+        self.assertEqual(keys[0], keys[1])
+        self.assertEqual(len(self.stub.sessions), 1)
+
+    def test_read_timeout(self):
+        session = self.create()
+        self.install(read_timeout=0.1, max_retries=1)
+        self.stub.delay = 0.3
+
+        with self.assertRaises(stripe.error.APIConnectionError):
+            self.retrieve(session.id)
+        self.assertEqual(len(self.stub.requests), 3)
+
+    def test_open_circuit_fails_fast(self):
+        self.install(max_retries=0)
+        self.stub.fail(500, times=4)
+        for _ in range(4):
+            with self.assertRaises(stripe.error.APIError):
+                self.create()
+
+        with self.assertRaises(CircuitOpenError):
+            self.create()
+        self.assertEqual(len(self.stub.requests), 4)
+
+    def test_circuit_closes_after_a_successful_trial(self):
+        http_client = self.install(max_retries=0)
+        self.stub.fail(500, times=5)
+        for _ in range(4):
+            with self.assertRaises(stripe.error.APIError):
+                self.create()
+
+        self.clock.now += 30
+        # the trial call fails, the circuit opens again
+        with self.assertRaises(stripe.error.APIError):
+            self.create()
+        with self.assertRaises(CircuitOpenError):
+            self.create()
+
+        self.clock.now += 60
+        self.create()
+        self.assertEqual(http_client.breaker.state, CircuitBreaker.CLOSED)
+        self.assertEqual(len(self.stub.requests), 6)
+
+
+class CircuitBreakerTests(SimpleTestCase):
+    def setUp(self):
+        self.clock = Clock()
+        self.breaker = CircuitBreaker(
+            error_rate=0.5, min_calls=4, window=10, clock=self.clock
+        )
+
+    def test_needs_enough_calls(self):
+        for _ in range(3):
+            self.breaker.record(False)
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+
+        self.breaker.record(True)
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+        self.assertFalse(self.breaker.allow())
+
+    def test_old_failures_are_forgotten(self):
+        for _ in range(3):
+            self.breaker.record(False)
+        self.clock.now += 11
+        for _ in range(3):
+            self.breaker.record(True)
+        self.breaker.record(False)
+
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+
+    def test_half_open_lets_one_call_through(self):
+        for _ in range(4):
+            self.breaker.record(False)
+        self.clock.now += 30
+
+        self.assertTrue(self.breaker.allow())
+        self.assertEqual(self.breaker.state, CircuitBreaker.HALF_OPEN)
+        self.assertFalse(self.breaker.allow())
+
+
+@override_settings(STRIPE_SECRET_KEY=API_KEY, PRODUCT_PRICE="price_test")
+class UnavailableStripeTests(StubMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = get_user_model().objects.create_user(
+            "buyer@buyer.com",
+            "buyer12345",
+        )
+        self.client.force_login(self.user)
+
+    def open_circuit(self):
+        self.http_client.breaker.state = CircuitBreaker.OPEN
+        self.http_client.breaker._opened_at = self.clock.now
+
+    def test_product_page_while_the_circuit_is_open(self):
+        self.open_circuit()
+
+        res = self.client.post(reverse("product_page"))
+
+        self.assertContains(res, "Payments are unavailable", status_code=503)
+        self.assertEqual(self.stub.requests, [])
+
+    def test_success_page_falls_back_to_the_local_session(self):
+        self.client.post(reverse("product_page"))
+        session_id = CheckoutSession.objects.get().session_id
+        self.open_circuit()
+
+        res = self.client.get(
+            reverse("payment_successful"), {"session_id": session_id}
+        )
+        self.assertEqual(res.status_code, 200)
+
+        res = self.client.get(
+            reverse("payment_successful"), {"session_id": "cs_unknown"}
+        )
+        self.assertEqual(res.status_code, 503)
@@ -0,0 +1,167 @@
+import hashlib
+import hmac
+import json
+import time
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from payments.inbox import process_due_events
+from payments.models import StripeEvent, UserPayment
+
+WEBHOOK_SECRET = "whsec_test"
+WEBHOOK_URL = reverse("stripe_webhook")
+
+
+def sign(payload, secret=WEBHOOK_SECRET):
+    """Stripe-Signature header of the payload"""
+    timestamp = int(time.time())
+    signature = hmac.new(
+        secret.encode(),
+        f"{timestamp}.{payload}".encode(),
+        hashlib.sha256,
+    ).hexdigest()
+    return f"t={timestamp},v1={signature}"
+
+
+def checkout_completed(event_id="evt_1", session_id="cs_1"):
+    return json.dumps(
+        {
+            "id": event_id,
+            "object": "event",
+            "type": "checkout.session.completed",
+            "data": {"object": {"id": session_id, "object": "checkout"}},
+        }
+    )
+
+
+@override_settings(
+    STRIPE_WEBHOOK_SECRET=WEBHOOK_SECRET,
+    STRIPE_EVENT_MAX_ATTEMPTS=3,
+    STRIPE_EVENT_RETRY_BASE=10,
+)
+class StripeWebhookTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            "buyer@buyer.com",
+            "buyer12345",
+        )
+        self.payment = UserPayment.objects.get(app_user=self.user)
+        self.payment.stripe_checkout_id = "cs_1"
+        self.payment.save()
+
+    def post(self, payload, signature=None):
+        return self.client.post(
+            WEBHOOK_URL,
+            payload,
+            content_type="application/json",
+            HTTP_STRIPE_SIGNATURE=signature or sign(payload),
+        )
+
+    def make_due(self):
+        StripeEvent.objects.update(next_attempt_at=timezone.now())
+
+    def test_event_is_stored_without_processing(self):
+        res = self.post(checkout_completed())
+
+        self.assertEqual(res.status_code, 200)
+        event = StripeEvent.objects.get()
+        self.assertEqual(event.event_id, "evt_1")
+        self.assertEqual(event.event_type, "checkout.session.completed")
+        self.assertEqual(event.status, StripeEvent.Status.PENDING)
+        self.payment.refresh_from_db()
+        self.assertFalse(self.payment.payment_bool)
+
+    def test_repeated_delivery_is_stored_once(self):
+        payload = checkout_completed()
+
+        self.post(payload)
+        res = self.post(payload)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(StripeEvent.objects.count(), 1)
+
+    def test_invalid_signature(self):
+        payload = checkout_completed()
+
+        res = self.post(payload, sign(payload, secret="whsec_other"))
+        self.assertEqual(res.status_code, 400)
+
+        res = self.client.post(
+            WEBHOOK_URL, payload, content_type="application/json"
+        )
+        self.assertEqual(res.status_code, 400)
+        self.assertFalse(StripeEvent.objects.exists())
+
+    def test_completed_checkout_marks_payment(self):
+        self.post(checkout_completed())
+
+        self.assertEqual(process_due_events(), (1, 0))
+
+        self.payment.refresh_from_db()
+        self.assertTrue(self.payment.payment_bool)
+        event = StripeEvent.objects.get()
+        self.assertEqual(event.status, StripeEvent.Status.PROCESSED)
+        self.assertIsNotNone(event.processed_at)
+
+    def test_event_before_the_checkout_id_is_retried(self):
+        self.post(checkout_completed(session_id="cs_2"))
+
+        self.assertEqual(process_due_events(), (0, 1))
+        event = StripeEvent.objects.get()
+        self.assertEqual(event.status, StripeEvent.Status.PENDING)
+        self.assertEqual(event.attempts, 1)
+        self.assertGreater(event.next_attempt_at, timezone.now())
+        self.assertIn("cs_2", event.last_error)
+        # not due yet
+        self.assertEqual(process_due_events(), (0, 0))
+
+        self.payment.stripe_checkout_id = "cs_2"
+        self.payment.save()
+        self.make_due()
+        self.assertEqual(process_due_events(), (1, 0))
+        self.payment.refresh_from_db()
+        self.assertTrue(self.payment.payment_bool)
+
+    def test_backoff_grows_and_gives_up(self):
+        self.post(checkout_completed(session_id="cs_missing"))
+        delays = []
+        for _ in range(3):
+            self.make_due()
+            start = timezone.now()
+            process_due_events()
+            event = StripeEvent.objects.get()
+            delays.append((event.next_attempt_at - start).total_seconds())
+
+        self.assertEqual(event.status, StripeEvent.Status.FAILED)
+        self.assertEqual(event.attempts, 3)
+        self.assertTrue(5 <= delays[0] <= 10.5)
+        self.assertTrue(10 <= delays[1] <= 20.5)
+
+    def test_other_events_are_acknowledged(self):
+        self.post(
+            json.dumps(
+                {
+                    "id": "evt_2",
+                    "object": "event",
+                    "type": "customer.created",
+                    "data": {"object": {"id": "cus_1"}},
+                }
+            )
+        )
+
+        self.assertEqual(process_due_events(), (1, 0))
+
+    def test_command_processes_due_events(self):
+        self.post(checkout_completed())
+        output = StringIO()
+
+        call_command("process_stripe_events", once=True, stdout=output)
+
+        self.assertIn("1 event(s) processed", output.getvalue())
+        self.payment.refresh_from_db()
+        self.assertTrue(self.payment.payment_bool)
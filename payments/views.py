@@ -1,65 +1,121 @@
-from django.shortcuts import render, redirect
+from django.shortcuts import get_object_or_404, render, redirect
 from django.conf import settings
 from django.contrib.auth.decorators import login_required
 from django.views.decorators.csrf import csrf_exempt
-from django.http import HttpResponse
+from django.http import Http404, HttpResponse
 
 from airport.models import Order
-from payments.models import UserPayment
+from payments.checkout import (
+    get_checkout_session,
+    order_is_paid,
+    save_checkout_session,
+)
+from payments.models import StripeEvent, UserPayment
+import json
 import stripe
-import time
+
+
+def get_order(request):
+    """Priced order of the user given by ?order=<id>, None without it"""
+    order_id = request.POST.get("order") or request.GET.get("order")
+    if not order_id:
+        return None
+    try:
+        order_id = int(order_id)
+    except ValueError:
+        raise Http404("No such order")
+    return get_object_or_404(
+        Order, pk=order_id, user=request.user, price__isnull=False
+    )
 
 
 @login_required(login_url="login")
 def product_page(request):
-
-    stripe.api_key = settings.STRIPE_SECRET_KEY
+    """Pay the order given by ?order=<id> (its fare), or the product"""
+    order = get_order(request)
+    context = {"order": order}
+    if order is not None:
+        context["amount"] = order.price / 100
+        context["currency"] = settings.FARE_CURRENCY
+        if order_is_paid(order):
+            context["paid"] = True
+            context["error"] = "This order is already paid."
     if request.method == "POST":
-        checkout_session = stripe.checkout.Session.create(
-            payment_method_types=["card"],
-            line_items=[
-                {
-                    "price": settings.PRODUCT_PRICE,
-                    "quantity": 1,
-                },
-            ],
-            mode="payment",
-            customer_creation="always",
-            success_url=settings.REDIRECT_DOMAIN
-            + "/payment_successful?session_id={CHECKOUT_SESSION_ID}",
-            cancel_url=settings.REDIRECT_DOMAIN + "/payment_cancelled",
+        if context.get("paid"):
+            return render(
+                request, "payments/product_page.html", context, status=409
+            )
+        try:
+            checkout_session = create_checkout_session(order)
+        except stripe.error.APIConnectionError:
+            context["error"] = "Payments are unavailable, try again later."
+            return render(
+                request, "payments/product_page.html", context, status=503
+            )
+        save_checkout_session(
+            checkout_session, user=request.user, order=order
         )
         return redirect(checkout_session.url, code=303)
-    return render(request, "payments/product_page.html")
+    return render(request, "payments/product_page.html", context)
+
+
+def line_item(order=None):
+    if order is None:
+        return {"price": settings.PRODUCT_PRICE, "quantity": 1}
+    return {
+        "price_data": {
+            "currency": settings.FARE_CURRENCY,
+            "unit_amount": order.price,
+            "product_data": {"name": f"Order #{order.id}"},
+        },
+        "quantity": 1,
+    }
+
+
+def create_checkout_session(order=None):
+    return stripe.checkout.Session.create(
+        api_key=settings.STRIPE_SECRET_KEY,
+        payment_method_types=["card"],
+        line_items=[line_item(order)],
+        mode="payment",
+        customer_creation="always",
+        success_url=settings.REDIRECT_DOMAIN
+        + "/payment_successful?session_id={CHECKOUT_SESSION_ID}",
+        cancel_url=settings.REDIRECT_DOMAIN + "/payment_cancelled",
+    )
 
 
 ## use Stripe dummy card: 4242 4242 4242 4242
 def payment_successful(request):
-    stripe.api_key = settings.STRIPE_SECRET_KEY
     checkout_session_id = request.GET.get("session_id", None)
-    session = stripe.checkout.Session.retrieve(checkout_session_id)
-    customer = stripe.Customer.retrieve(session.customer)
-    user_id = request.user.user_id
-    user_payment = UserPayment.objects.get(app_user=user_id)
-    user_payment.stripe_checkout_id = checkout_session_id
-    user_payment.save()
+    if not checkout_session_id:
+        raise Http404("No checkout session")
+    try:
+        checkout = get_checkout_session(checkout_session_id)
+    except stripe.error.InvalidRequestError:
+        raise Http404("No such checkout session")
+    except stripe.error.APIConnectionError:
+        return HttpResponse(
+            "Payments are unavailable, try again later.", status=503
+        )
+    if request.user.is_authenticated:
+        UserPayment.objects.filter(app_user=request.user).update(
+            stripe_checkout_id=checkout_session_id
+        )
     return render(request, "payments/"
                            "payment_successful.html",
-                  {"customer": customer})
+                  {"customer": checkout.customer})
 
 
 def payment_cancelled(request):
-    stripe.api_key = settings.STRIPE_SECRET_KEY
     return render(request, "payments/payment_cancelled.html")
 
 
 @csrf_exempt
 def stripe_webhook(request):
-    stripe.api_key = settings.STRIPE_SECRET_KEY
-    time.sleep(10)
+    """Verify and store the event, process_stripe_events applies it"""
     payload = request.body
-    signature_header = request.META["HTTP_STRIPE_SIGNATURE"]
-    event = None
+    signature_header = request.META.get("HTTP_STRIPE_SIGNATURE", "")
     try:
         event = stripe.Webhook.construct_event(
             payload, signature_header, settings.STRIPE_WEBHOOK_SECRET
@@ -68,11 +124,15 @@ def stripe_webhook(request):
         return HttpResponse(status=400)
     except stripe.error.SignatureVerificationError:
         return HttpResponse(status=400)
-    if event["type"] == "checkout.session.completed":
-        session = event["data"]["object"]
-        session_id = session.get("id", None)
-        time.sleep(15)
-        user_payment = UserPayment.objects.get(stripe_checkout_id=session_id)
-        user_payment.payment_bool = True
-        user_payment.save()
+    # Stripe retries deliveries, the unique event id drops repeats
+    StripeEvent.objects.bulk_create(
+        [
+            StripeEvent(
+                event_id=event["id"],
+                event_type=event["type"],
+                payload=json.loads(payload),
+            )
+        ],
+        ignore_conflicts=True,
+    )
     return HttpResponse(status=200)
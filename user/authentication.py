@@ -0,0 +1,111 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework_simplejwt.authentication import (
+    JWTAuthentication,
+    JWTStatelessUserAuthentication,
+)
+from rest_framework_simplejwt.settings import api_settings
+
+from main.cache import bump_version
+
+USER_VERSION_KEY = "user:auth_version:{}"
+
+
+class UserCache:
+    """Thread-safe LRU of authenticated users with a time to live"""
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._users = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._users.get(key)
+            if entry is None:
+                return None
+            expires_at, user = entry
+            if expires_at < time.monotonic():
+                del self._users[key]
+                return None
+            self._users.move_to_end(key)
+            return user
+
+    def set(self, key, user):
+        with self._lock:
+            self._users[key] = (time.monotonic() + self.ttl, user)
+            self._users.move_to_end(key)
+            while len(self._users) > self.maxsize:
+                self._users.popitem(last=False)
+
+    def evict(self, user_id):
+        user_id = str(user_id)
+        with self._lock:
+            for key in [key for key in self._users if key[0] == user_id]:
+                del self._users[key]
+
+    def clear(self):
+        with self._lock:
+            self._users.clear()
+
+
+user_cache = UserCache(
+    settings.JWT_USER_CACHE_SIZE, settings.JWT_USER_CACHE_TTL
+)
+
+
+def get_user_version(user_id):
+    return cache.get(USER_VERSION_KEY.format(user_id), 0)
+
+
+def invalidate_user(user_id):
+    """Drop the cached user here and, through the shared cache, in the
+    other processes"""
+    user_cache.evict(user_id)
+    bump_version(USER_VERSION_KEY.format(user_id))
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication that keeps resolved users for a short time.
+
+    Entries are keyed by user id, the token's password hash claim (when
+    CHECK_REVOKE_TOKEN is on) and the user version, which is bumped on
+    every save of the user. A lookup that fails is never cached.
+    """
+
+    def get_user(self, validated_token):
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        if user_id is None:
+            return super().get_user(validated_token)
+        key = (
+            str(user_id),
+            validated_token.get(api_settings.REVOKE_TOKEN_CLAIM),
+            get_user_version(user_id),
+        )
+        user = user_cache.get(key)
+        if user is None:
+            user = super().get_user(validated_token)
+            user_cache.set(key, user)
+        # views may change request.user, the cached one stays intact
+        return copy.copy(user)
+
+
+class ReadOnlyClaimsJWTAuthentication(CachedJWTAuthentication):
+    """Builds the user from the token claims on safe methods.
+
+    Only for endpoints that do not need the user row (GET of reference
+    data): request.user is a TokenUser and a deactivated user keeps
+    access until the token expires.
+    """
+
+    def authenticate(self, request):
+        if request.method in SAFE_METHODS:
+            return JWTStatelessUserAuthentication().authenticate(request)
+        return super().authenticate(request)
@@ -0,0 +1,284 @@
+"""Bulk import of users from CSV or JSON lines.
+
+Rows are read lazily and handled in batches: the passwords of a batch
+are hashed in a process pool while the previous batch is inserted, then
+the users and their UserPayment rows are bulk created in one
+transaction. The checks of UserManager.create_user still apply: emails
+are required, normalized and unique, staff and superuser flags are never
+imported and users without a password get an unusable one.
+
+Uploads of the API are not imported in the request: they are saved to
+USER_IMPORT_DIR and imported by the import_users command in a separate
+process, which writes a JSON report the API serves as the job status.
+"""
+import csv
+import io
+import json
+import os
+import subprocess
+import sys
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, field
+from itertools import islice
+from pathlib import Path
+
+import django
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import IntegrityError, transaction
+from django.utils.dateparse import parse_date
+
+from payments.models import UserPayment
+
+
+@dataclass
+class ImportResult:
+    created: int = 0
+    skipped: int = 0
+    # (line, message) of the rows that were not imported
+    errors: list = field(default_factory=list)
+
+
+FORMATS = ("csv", "jsonl")
+# hashing cost grows with the length of the password
+MAX_PASSWORD_LENGTH = 4096
+
+
+def read_rows(stream, file_format):
+    """Yield (line, row dict) from a text stream"""
+    if file_format == "csv":
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, row
+    elif file_format == "jsonl":
+        for line, text in enumerate(stream, start=1):
+            if not text.strip():
+                continue
+            try:
+                row = json.loads(text)
+            except ValueError:
+                row = None
+            yield line, row if isinstance(row, dict) else None
+    else:
+        raise ValueError(f"Unknown format {file_format!r}, use csv or jsonl")
+
+
+def detect_format(name):
+    return "jsonl" if name.endswith((".jsonl", ".ndjson")) else "csv"
+
+
+def text_stream(binary):
+    return io.TextIOWrapper(binary, encoding="utf-8-sig", newline="")
+
+
+def setup_worker(settings_module):
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", settings_module)
+    django.setup()
+
+
+def hash_password(password):
+    return make_password(password or None)
+
+
+class UserImporter:
+    def __init__(self, batch_size=1000, workers=None):
+        if batch_size < 1:
+            raise ValueError("batch_size must be positive")
+        self.batch_size = batch_size
+        self.workers = workers or os.cpu_count() or 1
+        self.model = get_user_model()
+
+    def clean(self, line, row, seen, result):
+        """User (password not hashed yet) of a row, None if it is
+        skipped"""
+        if row is None:
+            result.errors.append((line, "Not a JSON object"))
+            return None
+        email = self.model.objects.normalize_email(
+            str(row.get("email") or "").strip()
+        )
+        try:
+            validate_email(email)
+        except ValidationError:
+            result.errors.append((line, f"Invalid email {email!r}"))
+            return None
+        date_of_birth = row.get("date_of_birth") or None
+        if date_of_birth is not None:
+            try:
+                date_of_birth = parse_date(str(date_of_birth))
+            except ValueError:
+                date_of_birth = None
+            if date_of_birth is None:
+                result.errors.append((line, "Invalid date_of_birth"))
+                return None
+        texts = {}
+        for name in ("password", "first_name", "last_name"):
+            max_length = (
+                MAX_PASSWORD_LENGTH
+                if name == "password"
+                else self.model._meta.get_field(name).max_length
+            )
+            value = row.get(name)
+            if value is None:
+                value = ""
+            if not isinstance(value, str) or len(value) > max_length:
+                result.errors.append((line, f"Invalid {name}"))
+                return None
+            texts[name] = value
+        if email in seen:
+            result.skipped += 1
+            return None
+        seen.add(email)
+        return self.model(
+            email=email, date_of_birth=date_of_birth, **texts
+        )
+
+    def batches(self, rows, result):
+        seen = set()
+        rows = iter(rows)
+        while True:
+            chunk = list(islice(rows, self.batch_size))
+            if not chunk:
+                return
+            users = [
+                user
+                for user in (
+                    self.clean(line, row, seen, result)
+                    for line, row in chunk
+                )
+                if user is not None
+            ]
+            if users:
+                yield users
+
+    def insert(self, users, result):
+        """Bulk create users not registered yet and their payments"""
+        for attempt in range(2):
+            existing = set(
+                self.model.objects.filter(
+                    email__in=[user.email for user in users]
+                ).values_list("email", flat=True)
+            )
+            new_users = [user for user in users if user.email not in existing]
+            try:
+                with transaction.atomic():
+                    created = self.model.objects.bulk_create(new_users)
+                    # create_user_payment runs on post_save only
+                    UserPayment.objects.bulk_create(
+                        UserPayment(app_user=user) for user in created
+                    )
+            except IntegrityError:
+                # registered concurrently, check again
+                if attempt:
+                    raise
+                for user in new_users:
+                    user.pk = None
+                continue
+            result.created += len(created)
+            result.skipped += len(users) - len(created)
+            return
+
+    def run(self, rows):
+        result = ImportResult()
+        with ProcessPoolExecutor(
+            max_workers=self.workers,
+            initializer=setup_worker,
+            initargs=(settings.SETTINGS_MODULE,),
+        ) as executor:
+            chunksize = max(1, self.batch_size // (4 * self.workers))
+            pending = None
+            for users in self.batches(rows, result):
+                # hashing of this batch runs while the last one is saved
+                hashes = executor.map(
+                    hash_password,
+                    [user.password for user in users],
+                    chunksize=chunksize,
+                )
+                if pending is not None:
+                    self.save(*pending, result)
+                pending = users, hashes
+            if pending is not None:
+                self.save(*pending, result)
+        return result
+
+    def save(self, users, hashes, result):
+        for user, password in zip(users, hashes):
+            user.password = password
+        self.insert(users, result)
+
+
+def import_users(stream, file_format="csv", batch_size=1000, workers=None):
+    return UserImporter(batch_size, workers).run(
+        read_rows(stream, file_format)
+    )
+
+
+def import_job_paths(job_id):
+    """(upload, report, log) files of an import job"""
+    directory = Path(settings.USER_IMPORT_DIR)
+    return (
+        directory / f"{job_id}.upload",
+        directory / f"{job_id}.json",
+        directory / f"{job_id}.log",
+    )
+
+
+def start_import_job(upload, file_format):
+    """Save an uploaded file (readable by the owner only, it holds
+    passwords) and run the import_users command on it in the
+    background; returns the job id"""
+    job_id = str(uuid.uuid4())
+    path, report, log = import_job_paths(job_id)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    descriptor = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    with os.fdopen(descriptor, "wb") as file:
+        for chunk in upload.chunks():
+            file.write(chunk)
+    with open(log, "wb") as output:
+        subprocess.Popen(
+            [
+                sys.executable,
+                str(Path(settings.BASE_DIR) / "manage.py"),
+                "import_users",
+                str(path),
+                "--format",
+                file_format,
+                "--report",
+                str(report),
+                "--remove",
+            ],
+            stdin=subprocess.DEVNULL,
+            stdout=output,
+            stderr=subprocess.STDOUT,
+            start_new_session=True,
+        )
+    return job_id
+
+
+def write_report(path, report):
+    """Replace the report at once, readers never see a partial file"""
+    temporary = Path(f"{path}.tmp")
+    temporary.write_text(json.dumps(report))
+    os.replace(temporary, path)
+
+
+def result_report(result):
+    report = asdict(result)
+    report["errors"] = [
+        {"line": line, "message": message} for line, message in result.errors
+    ]
+    return {"status": "done", **report}
+
+
+def get_import_job(job_id):
+    """Status of an import job, None if there is no such job"""
+    path, report, _ = import_job_paths(job_id)
+    if report.exists():
+        return json.loads(report.read_text())
+    if path.exists():
+        return {"status": "running"}
+    return None
@@ -0,0 +1,152 @@
+"""Async token-obtain endpoint for ASGI deployments.
+
+Checking a password runs the deliberately slow PBKDF2 hasher. The async
+endpoint runs it on a small dedicated thread pool (LOGIN_WORKERS; the
+hashing releases the GIL), so a burst of logins uses at most that many
+cores and never takes a request thread or blocks the event loop. Up to
+LOGIN_QUEUE_SIZE more logins wait for a thread, the rest are answered
+with 429 right away.
+"""
+import asyncio
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import check_password, make_password
+from django.contrib.auth.models import update_last_login
+from django.utils.decorators import method_decorator
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework.exceptions import (
+    APIException,
+    AuthenticationFailed,
+    ParseError,
+    Throttled,
+)
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from rest_framework_simplejwt.settings import api_settings
+
+from airport.async_views import AsyncAPIView
+
+_executors = {}
+_executors_lock = threading.Lock()
+
+
+class LoginBusy(Throttled):
+    default_detail = "Too many logins at the moment."
+    default_code = "login_busy"
+
+
+class LoginExecutor:
+    """Thread pool refusing work when ``workers`` tasks run and
+    ``queue_size`` more wait"""
+
+    def __init__(self, workers, queue_size):
+        self.capacity = workers + queue_size
+        self.pending = 0
+        self._executor = ThreadPoolExecutor(
+            workers, thread_name_prefix="login"
+        )
+        self._lock = threading.Lock()
+
+    def _call(self, function, args):
+        try:
+            return function(*args)
+        finally:
+            with self._lock:
+                self.pending -= 1
+
+    def submit(self, function, *args):
+        with self._lock:
+            if self.pending >= self.capacity:
+                raise LoginBusy(wait=1)
+            self.pending += 1
+        return self._executor.submit(self._call, function, args)
+
+    async def run(self, function, *args):
+        return await asyncio.wrap_future(self.submit(function, *args))
+
+
+def get_login_executor():
+    key = (settings.LOGIN_WORKERS, settings.LOGIN_QUEUE_SIZE)
+    with _executors_lock:
+        if key not in _executors:
+            _executors[key] = LoginExecutor(*key)
+        return _executors[key]
+
+
+def verify_password(password, encoded):
+    """(valid, new hash when the stored one needs an upgrade); without
+    a stored hash the password is hashed once anyway, as ModelBackend
+    does, so unknown emails take as long as wrong passwords"""
+    if encoded is None:
+        make_password(password)
+        return False, None
+    upgraded = []
+    valid = check_password(
+        password, encoded, setter=lambda raw: upgraded.append(
+            make_password(raw)
+        )
+    )
+    return valid, upgraded[0] if upgraded else None
+
+
+class CredentialsSerializer(TokenObtainPairSerializer):
+    """Field checks of the token-obtain payload, without authenticating"""
+
+    def validate(self, attrs):
+        return attrs
+
+
+@method_decorator(csrf_exempt, name="dispatch")
+class AsyncTokenObtainPairView(AsyncAPIView):
+    """Same payload and answers as TokenObtainPairView"""
+
+    http_method_names = ["post", "options"]
+    authentication_classes = (JWTAuthentication,)
+
+    async def post(self, request):
+        try:
+            data = await self.obtain(request)
+        except APIException as error:
+            return self.error_response(request, error)
+        return self.render(data)
+
+    async def obtain(self, request):
+        serializer = CredentialsSerializer(data=self.parse(request))
+        serializer.is_valid(raise_exception=True)
+        username_field = serializer.username_field
+        user_model = get_user_model()
+        user = await user_model._default_manager.filter(
+            **{username_field: serializer.validated_data[username_field]}
+        ).afirst()
+        valid, upgraded = await get_login_executor().run(
+            verify_password,
+            serializer.validated_data["password"],
+            None if user is None else user.password,
+        )
+        if not valid or not api_settings.USER_AUTHENTICATION_RULE(user):
+            raise AuthenticationFailed(
+                serializer.error_messages["no_active_account"],
+                "no_active_account",
+            )
+        if upgraded is not None:
+            await user_model._default_manager.filter(pk=user.pk).aupdate(
+                password=upgraded
+            )
+        if api_settings.UPDATE_LAST_LOGIN:
+            await sync_to_async(update_last_login)(None, user)
+        refresh = serializer.get_token(user)
+        return {"refresh": str(refresh), "access": str(refresh.access_token)}
+
+    @staticmethod
+    def parse(request):
+        if request.content_type == "application/json":
+            try:
+                return json.loads(request.body or b"{}")
+            except ValueError as error:
+                raise ParseError(f"JSON parse error - {error}")
+        return request.POST
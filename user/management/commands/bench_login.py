@@ -0,0 +1,244 @@
+import asyncio
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.asgi import get_asgi_application
+from django.core.management.base import BaseCommand
+from django.core.wsgi import get_wsgi_application
+from django.test.utils import override_settings
+from django.urls import reverse
+from rest_framework_simplejwt.tokens import AccessToken
+
+from airport.management.commands.bench_api import percentile
+from airport.management.commands.bench_asgi import (
+    BENCH_CACHES,
+    Command as BenchAsgiCommand,
+)
+
+BENCH_EMAIL = "bench-login@example.com"
+BENCH_PASSWORD = "bench-login-password"
+# (server, read endpoint, token endpoint)
+SERVERS = (
+    ("wsgi", "airport:airport-list", "user:token-obtain-pair"),
+    ("asgi", "airport:async-airport-list", "user:token-obtain-pair-async"),
+)
+
+
+class Command(BaseCommand):
+    help = (  # noqa: VNE003
+        "Measure read latency during a login storm: the sync token "
+        "endpoint on the WSGI worker threads against the async one, "
+        "which checks passwords on LOGIN_WORKERS threads, under ASGI"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--logins", type=int, default=200, help="Logins of the storm"
+        )
+        parser.add_argument(
+            "--login-clients",
+            type=int,
+            default=50,
+            help="Concurrent clients logging in",
+        )
+        parser.add_argument(
+            "--reads", type=int, default=400, help="Reads per run"
+        )
+        parser.add_argument(
+            "--read-clients",
+            type=int,
+            default=10,
+            help="Concurrent clients reading",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=8,
+            help="Threads of the WSGI server",
+        )
+        parser.add_argument("--output", help="Write the results JSON here")
+
+    def handle(self, *args, **options):
+        user_model = get_user_model()
+        created = not user_model.objects.filter(email=BENCH_EMAIL).exists()
+        if created:
+            user = user_model.objects.create_user(BENCH_EMAIL, BENCH_PASSWORD)
+        else:
+            user = user_model.objects.get(email=BENCH_EMAIL)
+            user.set_password(BENCH_PASSWORD)
+            user.save()
+        try:
+            report = self.bench(user, options)
+        finally:
+            if created:
+                user.delete()
+
+        output = json.dumps(report, indent=2, sort_keys=True)
+        if options["output"]:
+            with open(options["output"], "w") as file:
+                file.write(output + "\n")
+        else:
+            self.stdout.write(output)
+
+    def bench(self, user, options):
+        authorization = f"Bearer {AccessToken.for_user(user)}"
+        credentials = json.dumps(
+            {"email": BENCH_EMAIL, "password": BENCH_PASSWORD}
+        ).encode()
+        middleware = [
+            name for name in settings.MIDDLEWARE if "debug_toolbar" not in name
+        ]
+        results = {}
+        self.stderr.write(
+            "{:<6} {:<6} {:>9} {:>9} {:>9} {:>9} {:>9}".format(
+                "server", "run", "read p50", "read p95", "logins/s",
+                "logged in", "rejected",
+            )
+        )
+        with override_settings(
+            CACHES=BENCH_CACHES,
+            MIDDLEWARE=middleware,
+            ALLOWED_HOSTS=["*"],
+        ):
+            applications = {
+                "wsgi": get_wsgi_application(),
+                "asgi": get_asgi_application(),
+            }
+            for server, read_name, login_name in SERVERS:
+                results[server] = {}
+                for run in ("idle", "storm"):
+                    if server == "wsgi":
+                        # reads and logins share the worker threads
+                        workers = ThreadPoolExecutor(options["workers"])
+                        read = BenchAsgiCommand.wsgi_client(
+                            applications[server],
+                            reverse(read_name),
+                            authorization,
+                            workers,
+                        )
+                        login = BenchAsgiCommand.wsgi_client(
+                            applications[server],
+                            reverse(login_name),
+                            None,
+                            workers,
+                            method="POST",
+                            body=credentials,
+                        )
+                    else:
+                        read = BenchAsgiCommand.asgi_client(
+                            applications[server],
+                            reverse(read_name),
+                            authorization,
+                        )
+                        login = BenchAsgiCommand.asgi_client(
+                            applications[server],
+                            reverse(login_name),
+                            None,
+                            method="POST",
+                            body=credentials,
+                        )
+                    result = results[server][run] = self.measure(
+                        read, login, options, storm=run == "storm"
+                    )
+                    self.stderr.write(
+                        "{:<6} {:<6} {:>9.2f} {:>9.2f} {:>9.1f} {:>9} "
+                        "{:>9}".format(
+                            server,
+                            run,
+                            result["reads"]["p50_ms"],
+                            result["reads"]["p95_ms"],
+                            result["logins"]["requests_per_second"],
+                            result["logins"]["ok"],
+                            result["logins"]["rejected"],
+                        )
+                    )
+        return {
+            "logins": options["logins"],
+            "login_clients": options["login_clients"],
+            "reads": options["reads"],
+            "read_clients": options["read_clients"],
+            "workers": options["workers"],
+            "login_workers": settings.LOGIN_WORKERS,
+            "login_queue_size": settings.LOGIN_QUEUE_SIZE,
+            "servers": results,
+        }
+
+    @staticmethod
+    async def clients(request, total, clients, timings, statuses):
+        """``total`` requests of concurrent clients, each one after the
+        other"""
+        clients = max(min(clients, total), 1)
+
+        async def client(count):
+            for _ in range(count):
+                start = time.perf_counter()
+                statuses.append(await request())
+                timings.append((time.perf_counter() - start) * 1000)
+
+        await asyncio.gather(
+            *(
+                client(total // clients + (index < total % clients))
+                for index in range(clients)
+            )
+        )
+
+    def measure(self, read, login, options, storm):
+        read_timings, read_statuses = [], []
+        login_timings, login_statuses = [], []
+        login_elapsed = []
+
+        async def logins():
+            start = time.perf_counter()
+            await self.clients(
+                login,
+                options["logins"],
+                options["login_clients"],
+                login_timings,
+                login_statuses,
+            )
+            login_elapsed.append(time.perf_counter() - start)
+
+        async def run():
+            tasks = [
+                self.clients(
+                    read,
+                    max(options["reads"], 1),
+                    options["read_clients"],
+                    read_timings,
+                    read_statuses,
+                )
+            ]
+            if storm and options["logins"] > 0:
+                tasks.append(logins())
+            await asyncio.gather(*tasks)
+
+        try:
+            asyncio.run(run())
+        finally:
+            read.close()
+            login.close()
+        return {
+            "reads": {
+                "p50_ms": round(percentile(read_timings, 50), 3),
+                "p95_ms": round(percentile(read_timings, 95), 3),
+                "errors": sum(status != 200 for status in read_statuses),
+            },
+            "logins": {
+                "requests_per_second": round(
+                    len(login_statuses) / login_elapsed[0], 1
+                )
+                if login_elapsed
+                else 0,
+                "p95_ms": round(percentile(login_timings, 95), 3)
+                if login_timings
+                else 0,
+                "ok": sum(status == 200 for status in login_statuses),
+                "rejected": sum(status == 429 for status in login_statuses),
+                "errors": sum(
+                    status not in (200, 429) for status in login_statuses
+                ),
+            },
+        }
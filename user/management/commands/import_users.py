@@ -0,0 +1,98 @@
+import os
+import sys
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from user.bulk_import import (
+    FORMATS,
+    detect_format,
+    import_users,
+    result_report,
+    text_stream,
+    write_report,
+)
+
+
+class Command(BaseCommand):
+    help = (  # noqa: VNE003
+        "Import users from a CSV (with a header row) or JSON lines file "
+        "with email, password, first_name, last_name and date_of_birth"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="File to import, - for stdin")
+        parser.add_argument(
+            "--format",
+            choices=FORMATS,
+            help="Defaults to jsonl for .jsonl/.ndjson files, else csv",
+        )
+        parser.add_argument(
+            "--batch-size", type=int, default=settings.USER_IMPORT_BATCH_SIZE
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=settings.USER_IMPORT_WORKERS,
+            help="Password hashing processes, defaults to the CPU count",
+        )
+        parser.add_argument(
+            "--report", help="Write the result (or the error) as JSON here"
+        )
+        parser.add_argument(
+            "--remove",
+            action="store_true",
+            help="Delete the file once it is imported",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            result = self.run(options)
+        except CommandError as error:
+            if options["report"]:
+                write_report(
+                    options["report"],
+                    {"status": "failed", "error": str(error)},
+                )
+            raise
+        finally:
+            if options["remove"] and options["path"] != "-":
+                try:
+                    os.remove(options["path"])
+                except FileNotFoundError:
+                    pass
+        if options["report"]:
+            write_report(options["report"], result_report(result))
+
+    def run(self, options):
+        path = options["path"]
+        file_format = options["format"] or detect_format(path)
+        start = time.perf_counter()
+        try:
+            if path == "-":
+                stream = text_stream(sys.stdin.buffer)
+            else:
+                stream = open(path, encoding="utf-8-sig", newline="")
+        except OSError as error:
+            raise CommandError(error)
+        try:
+            with stream:
+                result = import_users(
+                    stream,
+                    file_format,
+                    batch_size=options["batch_size"],
+                    workers=options["workers"],
+                )
+        except ValueError as error:
+            raise CommandError(error)
+        for line, message in result.errors:
+            self.stderr.write(f"line {line}: {message}")
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{result.created} user(s) imported, {result.skipped} "
+                f"already registered, {len(result.errors)} invalid "
+                f"in {time.perf_counter() - start:.1f}s"
+            )
+        )
+        return result
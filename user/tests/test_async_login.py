@@ -0,0 +1,110 @@
+import threading
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework_simplejwt.tokens import AccessToken
+
+from user.login import LoginBusy, LoginExecutor, get_login_executor
+
+LOGIN_URL = reverse("user:token-obtain-pair-async")
+SYNC_LOGIN_URL = reverse("user:token-obtain-pair")
+
+
+class AsyncLoginTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            "buyer@buyer.com",
+            "buyer12345",
+        )
+
+    def login(self, url=LOGIN_URL, **credentials):
+        return self.client.post(url, credentials, "application/json")
+
+    def test_login(self):
+        res = self.login(email="buyer@buyer.com", password="buyer12345")
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        access = AccessToken(res.json()["access"])
+        self.assertEqual(access["user_id"], self.user.id)
+        self.assertIn("refresh", res.json())
+
+    def test_form_payload(self):
+        res = self.client.post(
+            LOGIN_URL, {"email": "buyer@buyer.com", "password": "buyer12345"}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_answers_match_the_sync_endpoint(self):
+        self.user.is_active = False
+        self.user.save()
+        cases = (
+            {"email": "buyer@buyer.com", "password": "wrong"},
+            {"email": "nobody@buyer.com", "password": "buyer12345"},
+            {"email": "buyer@buyer.com", "password": "buyer12345"},
+            {"email": "buyer@buyer.com"},
+        )
+        for credentials in cases:
+            with self.subTest(**credentials):
+                res = self.login(**credentials)
+                sync_res = self.login(SYNC_LOGIN_URL, **credentials)
+
+                self.assertEqual(res.status_code, sync_res.status_code)
+                self.assertEqual(res.json(), sync_res.json())
+                self.assertEqual(
+                    res.get("WWW-Authenticate"),
+                    sync_res.get("WWW-Authenticate"),
+                )
+
+    @override_settings(
+        PASSWORD_HASHERS=[
+            "django.contrib.auth.hashers.PBKDF2PasswordHasher",
+            "django.contrib.auth.hashers.MD5PasswordHasher",
+        ]
+    )
+    def test_outdated_hash_is_upgraded(self):
+        get_user_model().objects.filter(pk=self.user.pk).update(
+            password=make_password("buyer12345", hasher="md5")
+        )
+
+        res = self.login(email="buyer@buyer.com", password="buyer12345")
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.password.startswith("pbkdf2_sha256$"))
+        self.assertTrue(self.user.check_password("buyer12345"))
+
+    @override_settings(LOGIN_WORKERS=1, LOGIN_QUEUE_SIZE=1)
+    def test_saturated_executor_answers_429(self):
+        release = threading.Event()
+        executor = get_login_executor()
+        blocked = [executor.submit(release.wait) for _ in range(2)]
+        self.addCleanup(release.set)
+
+        res = self.login(email="buyer@buyer.com", password="buyer12345")
+
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(res["Retry-After"], "1")
+        release.set()
+        for future in blocked:
+            future.result(timeout=5)
+        res = self.login(email="buyer@buyer.com", password="buyer12345")
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+
+class LoginExecutorTests(TestCase):
+    def test_capacity_is_released(self):
+        executor = LoginExecutor(workers=1, queue_size=0)
+        release = threading.Event()
+
+        future = executor.submit(release.wait)
+        with self.assertRaises(LoginBusy):
+            executor.submit(release.wait)
+        release.set()
+        future.result(timeout=5)
+
+        self.assertEqual(executor.pending, 0)
+        self.assertEqual(executor.submit(lambda: 1).result(timeout=5), 1)
@@ -0,0 +1,126 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.tokens import AccessToken
+
+from user.authentication import (
+    CachedJWTAuthentication,
+    ReadOnlyClaimsJWTAuthentication,
+    user_cache,
+)
+
+UPDATE_USER_URL = reverse("user:user-update")
+AIRPORT_URL = reverse("airport:airport-list")
+
+
+class CachedJWTAuthenticationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        user_cache.clear()
+        self.user = get_user_model().objects.create_user(
+            "user@user.com",
+            "user123456",
+            first_name="John",
+        )
+        self.client = APIClient()
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.user)}"
+        )
+
+    def get_user(self):
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(UPDATE_USER_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return res, len(queries)
+
+    def test_user_is_resolved_once(self):
+        _, first_queries = self.get_user()
+        res, queries = self.get_user()
+
+        self.assertEqual(first_queries, 1)
+        self.assertEqual(queries, 0)
+        self.assertEqual(res.data["email"], "user@user.com")
+
+    def test_update_invalidates_cached_user(self):
+        self.get_user()
+
+        res = self.client.patch(UPDATE_USER_URL, {"first_name": "Jane"})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        res, queries = self.get_user()
+
+        self.assertEqual(queries, 1)
+        self.assertEqual(res.data["first_name"], "Jane")
+
+    def test_deactivated_user_is_rejected(self):
+        self.get_user()
+
+        self.user.is_active = False
+        self.user.save()
+        res = self.client.get(UPDATE_USER_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_each_request_gets_its_own_instance(self):
+        token = AccessToken.for_user(self.user)
+        authentication = CachedJWTAuthentication()
+
+        first = authentication.get_user(token)
+        first.first_name = "Changed"
+        second = authentication.get_user(token)
+
+        self.assertEqual(second.first_name, "John")
+
+    def test_cache_is_bounded(self):
+        users = [
+            get_user_model().objects.create_user(f"user{index}@user.com")
+            for index in range(3)
+        ]
+        original_maxsize = user_cache.maxsize
+        user_cache.maxsize = 2
+        self.addCleanup(setattr, user_cache, "maxsize", original_maxsize)
+        authentication = CachedJWTAuthentication()
+
+        for user in users:
+            authentication.get_user(AccessToken.for_user(user))
+
+        self.assertEqual(len(user_cache._users), 2)
+
+
+class ReadOnlyClaimsJWTAuthenticationTests(TestCase):
+    def setUp(self):
+        user_cache.clear()
+        self.user = get_user_model().objects.create_user(
+            "user@user.com",
+            "user123456",
+        )
+        self.client = APIClient()
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.user)}"
+        )
+
+    def test_safe_request_uses_token_claims(self):
+        request = self.client.get(AIRPORT_URL).wsgi_request
+        user, _ = ReadOnlyClaimsJWTAuthentication().authenticate(request)
+
+        self.assertIsInstance(user, TokenUser)
+        self.assertEqual(user.id, self.user.id)
+
+    def test_read_only_endpoint_needs_no_user_query(self):
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(AIRPORT_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertFalse(
+            any("user_user" in query["sql"] for query in queries)
+        )
+
+    def test_unsafe_request_loads_the_user(self):
+        res = self.client.post(AIRPORT_URL, {"name": "Orly"})
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
@@ -0,0 +1,36 @@
+import json
+import tempfile
+from io import StringIO
+from pathlib import Path
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TransactionTestCase
+
+
+class BenchLoginCommandTests(TransactionTestCase):
+    def test_both_servers_are_measured(self):
+        with tempfile.TemporaryDirectory() as directory:
+            output = Path(directory) / "bench.json"
+            call_command(
+                "bench_login",
+                logins=4,
+                login_clients=2,
+                reads=4,
+                read_clients=2,
+                workers=2,
+                output=str(output),
+                stderr=StringIO(),
+            )
+            report = json.loads(output.read_text())
+
+        self.assertEqual(set(report["servers"]), {"wsgi", "asgi"})
+        for server, runs in report["servers"].items():
+            with self.subTest(server=server):
+                self.assertEqual(runs["idle"]["logins"]["ok"], 0)
+                self.assertEqual(runs["storm"]["logins"]["ok"], 4)
+                self.assertEqual(runs["storm"]["logins"]["errors"], 0)
+                for run in ("idle", "storm"):
+                    self.assertEqual(runs[run]["reads"]["errors"], 0)
+                    self.assertGreater(runs[run]["reads"]["p95_ms"], 0)
+        self.assertFalse(get_user_model().objects.exists())
@@ -0,0 +1,241 @@
+import io
+import json
+import os
+import tempfile
+import uuid
+from datetime import date
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import check_password
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from payments.models import UserPayment
+from user.bulk_import import import_users
+
+IMPORT_URL = reverse("user:user-import")
+
+CSV = (
+    "email,password,first_name,last_name,date_of_birth\n"
+    "anna@Corp.com,secret-1,Anna,Melnyk,1990-05-01\n"
+    "petro@corp.com,secret-2,Petro,Shevchenko,\n"
+    "not-an-email,secret-3,,,\n"
+    "olena@corp.com,,Olena,,\n"
+    "anna@corp.com,secret-4,Anna,Duplicate,\n"
+)
+
+
+class ImportUsersTests(TestCase):
+    def test_users_are_created_with_payments(self):
+        result = import_users(io.StringIO(CSV), batch_size=2, workers=2)
+
+        self.assertEqual(result.created, 3)
+        self.assertEqual(result.skipped, 1)
+        self.assertEqual(
+            result.errors, [(4, "Invalid email 'not-an-email'")]
+        )
+        users = get_user_model().objects.order_by("id")
+        self.assertEqual(
+            [user.email for user in users],
+            ["anna@corp.com", "petro@corp.com", "olena@corp.com"],
+        )
+        anna = users[0]
+        self.assertTrue(anna.check_password("secret-1"))
+        self.assertEqual(anna.date_of_birth, date(1990, 5, 1))
+        self.assertFalse(anna.is_staff)
+        self.assertFalse(anna.is_superuser)
+        self.assertFalse(users[2].has_usable_password())
+        self.assertEqual(
+            UserPayment.objects.filter(app_user__in=users).count(), 3
+        )
+
+    def test_registered_users_are_skipped(self):
+        user = get_user_model().objects.create_user(
+            "petro@corp.com", "old-password"
+        )
+
+        result = import_users(io.StringIO(CSV), workers=1)
+
+        self.assertEqual(result.created, 2)
+        self.assertEqual(result.skipped, 2)
+        user.refresh_from_db()
+        self.assertTrue(user.check_password("old-password"))
+        self.assertEqual(UserPayment.objects.filter(app_user=user).count(), 1)
+
+    def test_json_lines(self):
+        rows = [
+            {"email": "anna@corp.com", "password": "secret-1"},
+            "not an object",
+            {"email": "petro@corp.com", "date_of_birth": "1990-13-01"},
+        ]
+        stream = io.StringIO(
+            "\n".join(json.dumps(row) for row in rows) + "\n\n"
+        )
+
+        result = import_users(stream, "jsonl", workers=1)
+
+        self.assertEqual(result.created, 1)
+        self.assertEqual(
+            result.errors,
+            [(2, "Not a JSON object"), (3, "Invalid date_of_birth")],
+        )
+
+    def test_rows_with_invalid_fields_are_reported(self):
+        rows = [
+            {"email": "anna@corp.com", "password": 12345},
+            {"email": "petro@corp.com", "password": None},
+            {"email": "olha@corp.com", "first_name": ["Olha"]},
+            {"email": "ivan@corp.com", "last_name": "x" * 151},
+            {"email": "maria@corp.com", "password": "x" * 5000},
+        ]
+        stream = io.StringIO("\n".join(json.dumps(row) for row in rows))
+
+        result = import_users(stream, "jsonl", workers=1)
+
+        self.assertEqual(result.created, 1)
+        self.assertFalse(
+            get_user_model().objects.get(
+                email="petro@corp.com"
+            ).has_usable_password()
+        )
+        self.assertEqual(
+            result.errors,
+            [
+                (1, "Invalid password"),
+                (3, "Invalid first_name"),
+                (4, "Invalid last_name"),
+                (5, "Invalid password"),
+            ],
+        )
+
+    def test_command(self):
+        with tempfile.NamedTemporaryFile(
+            "w", suffix=".csv", delete=False
+        ) as file:
+            file.write(CSV)
+        self.addCleanup(os.remove, file.name)
+        output, errors = io.StringIO(), io.StringIO()
+
+        call_command(
+            "import_users",
+            file.name,
+            workers=1,
+            stdout=output,
+            stderr=errors,
+        )
+
+        self.assertIn(
+            "3 user(s) imported, 1 already registered, 1 invalid",
+            output.getvalue(),
+        )
+        self.assertIn("line 4: Invalid email", errors.getvalue())
+
+        with self.assertRaises(CommandError):
+            call_command("import_users", file.name + ".missing")
+
+
+class ImportUsersApiTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.admin = get_user_model().objects.create_superuser(
+            "admin@admin.com", "admin123456"
+        )
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        override = override_settings(USER_IMPORT_DIR=self.directory)
+        override.enable()
+        self.addCleanup(override.disable)
+        popen = mock.patch("user.bulk_import.subprocess.Popen")
+        self.popen = popen.start()
+        self.addCleanup(popen.stop)
+
+    def upload(self, name, content, **data):
+        return self.client.post(
+            IMPORT_URL,
+            {"file": SimpleUploadedFile(name, content.encode()), **data},
+            format="multipart",
+        )
+
+    def run_job(self):
+        """Run the command the import was handed to"""
+        command = self.popen.call_args.args[0]
+        self.assertEqual(command[2], "import_users")
+        call_command(
+            *command[2:],
+            "--workers",
+            "1",
+            stdout=io.StringIO(),
+            stderr=io.StringIO(),
+        )
+
+    def test_admin_required(self):
+        user = get_user_model().objects.create_user(
+            "user@user.com", "user123456"
+        )
+        self.client.force_authenticate(user)
+
+        res = self.upload("users.csv", CSV)
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+        self.popen.assert_not_called()
+
+    def test_import_runs_in_the_background(self):
+        self.client.force_authenticate(self.admin)
+
+        res = self.upload("users.csv", CSV)
+
+        self.assertEqual(res.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(res["Location"], res.data["url"])
+        self.assertEqual(get_user_model().objects.count(), 1)
+        self.assertEqual(
+            self.client.get(res.data["url"]).data, {"status": "running"}
+        )
+        upload = self.popen.call_args.args[0][3]
+        self.assertEqual(os.stat(upload).st_mode & 0o777, 0o600)
+
+        self.run_job()
+
+        job = self.client.get(res.data["url"]).data
+        self.assertEqual(job["status"], "done")
+        self.assertEqual(job["created"], 3)
+        self.assertEqual(job["skipped"], 1)
+        self.assertEqual(job["errors"][0]["line"], 4)
+        self.assertFalse(os.path.exists(upload))
+        user = get_user_model().objects.get(email="petro@corp.com")
+        self.assertTrue(check_password("secret-2", user.password))
+
+    def test_import_json_lines_by_extension(self):
+        self.client.force_authenticate(self.admin)
+
+        res = self.upload(
+            "users.jsonl", json.dumps({"email": "anna@corp.com"}) + "\n"
+        )
+        self.run_job()
+
+        self.assertEqual(self.client.get(res.data["url"]).data["created"], 1)
+
+    def test_invalid_requests(self):
+        self.client.force_authenticate(self.admin)
+
+        res = self.client.post(IMPORT_URL, {}, format="multipart")
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+        res = self.upload("users.csv", CSV, format="xml")
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+        with override_settings(USER_IMPORT_MAX_SIZE=10):
+            res = self.upload("users.csv", CSV)
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+        self.popen.assert_not_called()
+        res = self.client.get(
+            reverse("user:user-import-status", args=[uuid.uuid4()])
+        )
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
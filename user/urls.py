@@ -4,11 +4,14 @@ from rest_framework_simplejwt.views import (
     TokenRefreshView,
     TokenVerifyView,
 )
+from user.login import AsyncTokenObtainPairView
 from user.views import (
     CreateUserView,
     ListUserView,
     UpdateUserView,
     DetailUserView,
+    ImportUsersView,
+    ImportUsersStatusView,
 )
 
 
@@ -17,7 +20,18 @@ urlpatterns = [
     path("<int:pk>/", DetailUserView.as_view(), name="user-detail"),
     path("register/", CreateUserView.as_view(), name="user-register"),
     path("update/", UpdateUserView.as_view(), name="user-update"),
+    path("import/", ImportUsersView.as_view(), name="user-import"),
+    path(
+        "import/<uuid:job_id>/",
+        ImportUsersStatusView.as_view(),
+        name="user-import-status",
+    ),
     path("token/", TokenObtainPairView.as_view(), name="token-obtain-pair"),
+    path(
+        "token/async/",
+        AsyncTokenObtainPairView.as_view(),
+        name="token-obtain-pair-async",
+    ),
     path("token/refresh/", TokenRefreshView.as_view(), name="token-refresh"),
     path("token/verify/", TokenVerifyView.as_view(), name="token-verify"),
 ]
@@ -1,9 +1,22 @@
-from rest_framework import generics
+from django.conf import settings
+from django.http import Http404
+from django.urls import reverse
+from rest_framework import generics, status
 from rest_framework.authtoken.serializers import AuthTokenSerializer
 from rest_framework.authtoken.views import ObtainAuthToken
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.exceptions import ValidationError
+from rest_framework.parsers import MultiPartParser
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
+from rest_framework.response import Response
 from rest_framework.settings import api_settings
+from rest_framework.views import APIView
 
+from user.bulk_import import (
+    FORMATS,
+    detect_format,
+    get_import_job,
+    start_import_job,
+)
 from user.models import User
 from user.serializers import (
     UserSerializer,
@@ -37,3 +50,50 @@ class DetailUserView(generics.RetrieveAPIView):
 class CreateTokenView(ObtainAuthToken):
     renderer_classes = api_settings.DEFAULT_RENDERER_CLASSES
     serializer_class = AuthTokenSerializer
+
+
+class ImportUsersView(APIView):
+    """Import users from an uploaded CSV or JSON lines file (``file``,
+    the ``format`` defaults to the file extension). The import runs in
+    the background, the answer links to its status."""
+
+    parser_classes = (MultiPartParser,)
+    permission_classes = (IsAdminUser,)
+
+    def post(self, request):
+        upload = request.FILES.get("file")
+        if upload is None:
+            raise ValidationError({"file": "No file was submitted."})
+        if upload.size > settings.USER_IMPORT_MAX_SIZE:
+            raise ValidationError(
+                {
+                    "file": "Ensure the file has at most "
+                    f"{settings.USER_IMPORT_MAX_SIZE} bytes."
+                }
+            )
+        file_format = request.data.get("format") or detect_format(
+            upload.name
+        )
+        if file_format not in FORMATS:
+            raise ValidationError(
+                {"format": f"Unknown format {file_format!r}, use csv or jsonl"}
+            )
+        job_id = start_import_job(upload, file_format)
+        url = reverse("user:user-import-status", args=[job_id])
+        return Response(
+            {"id": job_id, "status": "running", "url": url},
+            status=status.HTTP_202_ACCEPTED,
+            headers={"Location": url},
+        )
+
+
+class ImportUsersStatusView(APIView):
+    """``running`` until the import is done, then its result"""
+
+    permission_classes = (IsAdminUser,)
+
+    def get(self, request, job_id):
+        job = get_import_job(str(job_id))
+        if job is None:
+            raise Http404
+        return Response(job)